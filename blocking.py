@@ -0,0 +1,296 @@
+import sys
+import numpy as np
+import pandas as pd
+import instrumentation
+import tables
+from evaluation import pair_keys
+# Candidate-pair generation (blocking) baseline for matching a variant dataset against its original.
+# Comparing all pairs of Person or Address rows is quadratic, so candidates come from one of two indexes
+# over the fields the variators perturb:
+#   minhash: MinHash signatures of the character 3-grams of the key fields, banded into LSH buckets;
+#            records sharing a bucket in any band become candidates (roughly Jaccard similarity >= 0.5
+#            with the default 16 bands of 4 hashes).
+#   sorted_neighbourhood: one pass per key field; the records of both tables are sorted on the
+#            normalised field and every record is paired with the next window - 1 records.
+# Both are vectorised NumPy/pandas code and seeded, so the same inputs give the same candidates.
+#   python blocking.py original_dir variant_dir golden_standard.csv [minhash|sorted_neighbourhood]
+
+# Key fields per entity type (the fields changed by variation_helpers / variation_planner)
+BLOCKING_FIELDS = {
+    'Address': ['text', 'city', 'postalCode'],
+    'ContactPoint': ['email'],
+    'HealthcareOrganization': ['healthcareOrganizationName'],
+    'ServiceDepartment': ['serviceDepartmentName'],
+    'Person': ['personName'],
+    'HealthcarePersonnel': ['email']
+}
+
+# Parts of field values shared by most records, dropped from the keys (all generated emails use few domains)
+KEY_STRIP_PATTERNS = {
+    'email': r'@.*$'
+}
+
+METHODS = ('minhash', 'sorted_neighbourhood')
+
+SHINGLE_SIZE = 3
+# Strings are cut to this many characters before shingling
+MAX_KEY_LENGTH = 64
+# Code points are below 2 ** 21, so three of them fit in one 64-bit shingle value
+_code_base = np.uint64(1 << 21)
+_mix = np.uint64(0x9E3779B97F4A7C15)
+_no_hash = np.iinfo(np.uint64).max
+
+
+def normalise_keys(df, fields):
+    """Lower-cased, whitespace-collapsed concatenation of the key fields per row ('' when all are missing)"""
+    columns = []
+    for field in fields:
+        if field in df.columns:
+            column = df[field].fillna('').astype(str)
+            if field in KEY_STRIP_PATTERNS:
+                column = column.str.replace(KEY_STRIP_PATTERNS[field], '', regex=True)
+            columns.append(column)
+    if not columns:
+        return pd.Series([''] * len(df), index=df.index)
+    keys = columns[0].str.cat(columns[1:], sep=' ') if len(columns) > 1 else columns[0]
+    return keys.str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def shingle_hashes(keys, q=SHINGLE_SIZE, max_length=MAX_KEY_LENGTH):
+    """
+    Character q-grams of every key as 64-bit values, built on a code point matrix
+    Args:
+        keys: Array or Series of normalised strings
+        q: Shingle length (at most 3)
+        max_length: Keys are cut to this length
+    Returns:
+        Tuple of (flat uint64 array of the shingles of all keys in row order, shingle count per key)
+    """
+    # Pad with a space on both sides so that short keys still have a shingle and word ends count
+    padded = np.asarray([f" {key[:max_length]} " if key else '' for key in keys], dtype=f"<U{max_length + 2}")
+    width = max(np.char.str_len(padded).max(initial=0), q)
+    codes = padded.astype(f"<U{width}").view(np.uint32).reshape(len(padded), width).astype(np.uint64)
+    positions = width + 1 - q
+    shingles = np.zeros((len(padded), positions), dtype=np.uint64)
+    for offset in range(q):
+        shingles = shingles * _code_base + codes[:, offset:offset + positions]
+    counts = np.maximum(np.char.str_len(padded) + 1 - q, 0)
+    return shingles[np.arange(positions) < counts[:, None]], counts
+
+
+def minhash_signatures(keys, num_perm=64, seed=0, q=SHINGLE_SIZE, chunksize=200000):
+    """
+    MinHash signatures of the character q-gram sets of keys
+    Args:
+        keys: Array or Series of normalised strings
+        num_perm: Number of hash functions
+        seed: Seed of the hash functions
+        q: Shingle length
+        chunksize: Rows hashed at once (bounds the size of the shingle arrays)
+    Returns:
+        n x num_perm uint64 array (rows of empty keys are all _no_hash)
+    """
+    rng = np.random.default_rng(seed)
+    salts = rng.integers(0, np.iinfo(np.int64).max, num_perm, dtype=np.int64).astype(np.uint64)
+    multipliers = rng.integers(0, np.iinfo(np.int64).max, num_perm, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+    keys = np.asarray(keys, dtype=object)
+    signatures = np.full((len(keys), num_perm), _no_hash, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for start in range(0, len(keys), chunksize):
+            shingles, counts = shingle_hashes(keys[start:start + chunksize], q)
+            rows = start + np.flatnonzero(counts)
+            # The shingles of a key are contiguous, so the minimum per key is one reduceat per hash function
+            offsets = (np.cumsum(counts) - counts)[counts > 0]
+            for k in range(num_perm):
+                hashed = (shingles ^ salts[k]) * multipliers[k]
+                hashed ^= hashed >> np.uint64(29)
+                signatures[rows, k] = np.minimum.reduceat(hashed, offsets) if len(offsets) else hashed[:0]
+    return signatures
+
+
+def band_keys(signatures, bands):
+    """One 64-bit bucket key per row and band (n x bands array)"""
+    rows = signatures.shape[1] // bands
+    keys = np.zeros((len(signatures), bands), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for r in range(rows):
+            keys = keys * _mix ^ signatures[:, r::rows][:, :bands]
+    return keys
+
+
+def _join_buckets(left_keys, right_keys, max_block_size):
+    # Row pairs that share a bucket key; buckets with more than max_block_size records are skipped
+    left = pd.DataFrame({'key': left_keys, 'row_a': np.arange(len(left_keys))})
+    right = pd.DataFrame({'key': right_keys, 'row_b': np.arange(len(right_keys))})
+    sizes = pd.concat([left['key'], right['key']]).value_counts()
+    small = sizes.index[sizes <= max_block_size]
+    left, right = left[left['key'].isin(small)], right[right['key'].isin(small)]
+    pairs = left.merge(right, on='key')
+    return pairs['row_a'].to_numpy(), pairs['row_b'].to_numpy()
+
+
+def minhash_pairs(left_keys, right_keys, num_perm=64, bands=16, seed=0, max_block_size=1000):
+    """
+    Row pairs (left row, right row) that share at least one LSH bucket
+    Args:
+        left_keys, right_keys: Normalised keys of the two tables (right_keys None to deduplicate left)
+        num_perm: Number of MinHash functions
+        bands: Number of LSH bands (num_perm // bands hashes per band)
+        seed: Seed of the hash functions
+        max_block_size: Buckets with more records are skipped
+    Returns:
+        Tuple of row index arrays
+    """
+    dedupe = right_keys is None
+    left_keys = np.asarray(left_keys, dtype=object)
+    right_keys = left_keys if dedupe else np.asarray(right_keys, dtype=object)
+    signatures = minhash_signatures(np.concatenate([left_keys, right_keys]) if not dedupe else left_keys, num_perm, seed)
+    buckets = band_keys(signatures, bands)
+    # Empty keys have no shingles; keep them out of every bucket
+    empty = signatures[:, 0] == _no_hash
+    left_rows, right_rows = np.arange(len(left_keys)), np.arange(len(right_keys))
+    if not dedupe:
+        left_rows, right_rows = left_rows[~empty[:len(left_keys)]], right_rows[~empty[len(left_keys):]]
+        left_buckets, right_buckets = buckets[:len(left_keys)][left_rows], buckets[len(left_keys):][right_rows]
+    else:
+        left_rows = right_rows = left_rows[~empty]
+        left_buckets = right_buckets = buckets[left_rows]
+    codes = np.array([], dtype=np.int64)
+    for band in range(buckets.shape[1]):
+        row_a, row_b = _join_buckets(left_buckets[:, band], right_buckets[:, band], max_block_size)
+        row_a, row_b = left_rows[row_a], right_rows[row_b]
+        if dedupe:
+            keep = row_a < row_b
+            row_a, row_b = row_a[keep], row_b[keep]
+        # Deduplicated band by band, so pairs found in many bands are held once
+        codes = pd.unique(np.concatenate([codes, row_a.astype(np.int64) * len(right_keys) + row_b]))
+    return codes // max(len(right_keys), 1), codes % max(len(right_keys), 1)
+
+
+def sorted_neighbourhood_pairs(left_passes, right_passes=None, window=5):
+    """
+    Row pairs within window positions of each other in at least one sorting pass
+    Args:
+        left_passes, right_passes: Lists of normalised key arrays, one per pass (right_passes None to deduplicate)
+        window: Window size (every record is compared with the next window - 1 records)
+    Returns:
+        Tuple of row index arrays
+    """
+    dedupe = right_passes is None
+    n_left = len(left_passes[0]) if left_passes else 0
+    n_right = n_left if dedupe else (len(right_passes[0]) if right_passes else 0)
+    codes = []
+    for position, left_pass in enumerate(left_passes):
+        keys = np.asarray(left_pass, dtype=object)
+        if not dedupe:
+            keys = np.concatenate([keys, np.asarray(right_passes[position], dtype=object)])
+        sort_codes, _ = pd.factorize(keys, sort=True)
+        order = np.argsort(sort_codes, kind="stable")
+        # Records with an empty key are not sorted into the neighbourhood of anything
+        order = order[keys[order] != '']
+        for offset in range(1, window):
+            first, second = order[:-offset], order[offset:]
+            if dedupe:
+                row_a, row_b = np.minimum(first, second), np.maximum(first, second)
+            else:
+                cross = (first < n_left) != (second < n_left)
+                first, second = first[cross], second[cross]
+                row_a, row_b = np.minimum(first, second), np.maximum(first, second) - n_left
+            codes.append(row_a.astype(np.int64) * n_right + row_b)
+    codes = pd.unique(np.concatenate(codes)) if codes else np.array([], dtype=np.int64)
+    return codes // max(n_right, 1), codes % max(n_right, 1)
+
+
+def candidate_pairs(left, right=None, entity_type=None, method="minhash", fields=None, **options):
+    """
+    Candidate pairs of one entity type
+    Args:
+        left: Table of the original records
+        right: Table of the variant records (None to deduplicate left against itself)
+        entity_type: Entity type of the tables (selects the BLOCKING_FIELDS)
+        method: 'minhash' or 'sorted_neighbourhood'
+        fields: Key fields, overriding BLOCKING_FIELDS
+        options: Passed to minhash_pairs (num_perm, bands, seed, max_block_size)
+            or sorted_neighbourhood_pairs (window)
+    Returns:
+        DataFrame with id_a (left identifier), id_b (right identifier) and entity_type
+    """
+    fields = fields or BLOCKING_FIELDS[entity_type]
+    with instrumentation.stage(f"blocking_{method}", records=len(left) + (len(right) if right is not None else 0),
+                               entity_type=entity_type):
+        if method == "minhash":
+            rows_a, rows_b = minhash_pairs(normalise_keys(left, fields),
+                                           None if right is None else normalise_keys(right, fields), **options)
+        elif method == "sorted_neighbourhood":
+            left_passes = [normalise_keys(left, [field]) for field in fields]
+            right_passes = None if right is None else [normalise_keys(right, [field]) for field in fields]
+            rows_a, rows_b = sorted_neighbourhood_pairs(left_passes, right_passes, **options)
+        else:
+            raise ValueError(f"Unknown blocking method: {method}")
+    right = left if right is None else right
+    return pd.DataFrame({
+        'id_a': left['identifier'].to_numpy()[rows_a],
+        'id_b': right['identifier'].to_numpy()[rows_b],
+        'entity_type': entity_type
+    })
+
+
+def block_dataset(original, variant, method="minhash", **options):
+    """
+    Candidate pairs between the original and variant tables of every entity type in both
+    Args:
+        original: Dict mapping entity type to the original (split) table
+        variant: Dict mapping entity type to the variant table
+        method, options: See candidate_pairs
+    Returns:
+        DataFrame with id_a, id_b and entity_type
+    """
+    frames = [candidate_pairs(original[entity_type], variant[entity_type], entity_type, method, **options)
+              for entity_type in BLOCKING_FIELDS if entity_type in original and entity_type in variant]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['id_a', 'id_b', 'entity_type'])
+
+
+def blocking_report(candidates, original, variant, golden):
+    """
+    Reduction ratio and pair completeness of candidate pairs per entity type
+    Args:
+        candidates: DataFrame from block_dataset
+        original, variant: The tables the candidates were generated from
+        golden: Golden standard or duplicate registry DataFrame (original_id, duplicate_id, entity_type)
+    Returns:
+        DataFrame with comparisons (all pairs), candidate_pairs, reduction_ratio, true_pairs, found
+        and pair_completeness per entity type and in total ('all')
+    """
+    golden = golden.drop_duplicates(['original_id', 'duplicate_id', 'entity_type'])
+    truth = pd.DataFrame({'entity_type': golden['entity_type'].to_numpy(),
+                          'key': pair_keys(golden['original_id'], golden['duplicate_id'])})
+    candidate_keys = pd.Series(pair_keys(candidates['id_a'], candidates['id_b']), dtype=np.uint64)
+    truth['found'] = pd.Series(truth['key'], dtype=np.uint64).isin(candidate_keys).to_numpy()
+    rows = []
+    for entity_type in BLOCKING_FIELDS:
+        if entity_type not in original or entity_type not in variant:
+            continue
+        typed = truth[truth['entity_type'] == entity_type]
+        rows.append({
+            'entity_type': entity_type,
+            'comparisons': len(original[entity_type]) * len(variant[entity_type]),
+            'candidate_pairs': int((candidates['entity_type'] == entity_type).sum()),
+            'true_pairs': len(typed),
+            'found': int(typed['found'].sum())
+        })
+    report = pd.DataFrame(rows, columns=['entity_type', 'comparisons', 'candidate_pairs', 'true_pairs', 'found'])
+    total = report.drop(columns='entity_type').sum().to_dict()
+    report = pd.concat([report, pd.DataFrame([dict(total, entity_type='all')])], ignore_index=True)
+    report['reduction_ratio'] = 1 - report['candidate_pairs'] / report['comparisons'].where(report['comparisons'] > 0)
+    report['pair_completeness'] = report['found'] / report['true_pairs'].where(report['true_pairs'] > 0)
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("usage: python blocking.py original_dir variant_dir golden_standard.csv [minhash|sorted_neighbourhood]")
+        sys.exit(1)
+    original_tables, variant_tables = tables.read_tables(sys.argv[1]), tables.read_tables(sys.argv[2])
+    candidates = block_dataset(original_tables, variant_tables, sys.argv[4] if len(sys.argv) > 4 else "minhash")
+    candidates.to_csv("candidate_pairs.csv", index=False)
+    print(blocking_report(candidates, original_tables, variant_tables, pd.read_csv(sys.argv[3])).to_string(index=False))
@@ -0,0 +1,104 @@
+import os
+import random
+import pickle
+import shutil
+# Checkpoints for long generation and variation runs (data_creator.generate_dataset, introduce_variations).
+# A checkpoint directory holds numbered part files with the records produced since the previous
+# checkpoint, and one state file with the progress, the random generator states and small bookkeeping.
+# The state file is replaced atomically after its part is written, so a crash never leaves a state
+# that points at a missing part; parts written after the last state are ignored and overwritten.
+# Restoring the random states makes a resumed run produce the same output as an uninterrupted one.
+# save_random_state/load_random_state keep the generator states next to finished data, so a later
+# run (data_creator.append_dataset) can continue the same random streams.
+
+STATE_FILE = "state.pkl"
+
+
+def _part_path(directory, number):
+    return os.path.join(directory, f"part-{number:05d}.pkl")
+
+
+def _dump(value, path):
+    with open(f"{path}.tmp", "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{path}.tmp", path)
+
+
+def random_state(rng=None):
+    """States of the random module, of Faker's shared generator and of a NumPy generator"""
+    from faker.generator import random as faker_random
+    return {
+        "random": random.getstate(),
+        "faker": faker_random.getstate(),
+        "numpy": rng.bit_generator.state if rng is not None else None
+    }
+
+
+def restore_random_state(state, rng=None):
+    """Put the generators back into a state captured by random_state"""
+    from faker.generator import random as faker_random
+    random.setstate(state["random"])
+    faker_random.setstate(state["faker"])
+    if rng is not None and state["numpy"] is not None:
+        rng.bit_generator.state = state["numpy"]
+
+
+def save_random_state(path, rng=None):
+    """Atomically write the random_state to a file"""
+    _dump(random_state(rng), path)
+
+
+def load_random_state(path, rng=None):
+    """
+    Restore the generator states written by save_random_state
+    Returns:
+        False if the file does not exist (nothing is restored), True otherwise
+    """
+    if not os.path.exists(path):
+        return False
+    with open(path, "rb") as f:
+        restore_random_state(pickle.load(f), rng)
+    return True
+
+
+def save(directory, state, tables, saved_counts):
+    """
+    Write the records added since the previous checkpoint, then the state
+    Args:
+        directory: Checkpoint directory (created if needed)
+        state: Picklable dict of progress and bookkeeping
+        tables: Dict mapping table name to the full list of records so far
+        saved_counts: Dict mapping table name to the number of records already in earlier parts;
+            updated in place
+    """
+    os.makedirs(directory, exist_ok=True)
+    parts = state.get("_parts", 0)
+    new_records = {name: records[saved_counts.get(name, 0):] for name, records in tables.items()}
+    _dump(new_records, _part_path(directory, parts))
+    saved_counts.update({name: len(records) for name, records in tables.items()})
+    _dump(dict(state, _parts=parts + 1), os.path.join(directory, STATE_FILE))
+    state["_parts"] = parts + 1
+
+
+def load(directory):
+    """
+    Read the last checkpoint of a directory
+    Returns:
+        Tuple of (state dict or None if there is no checkpoint, dict of table name -> list of records)
+    """
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return None, {}
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    tables = {}
+    for number in range(state["_parts"]):
+        with open(_part_path(directory, number), "rb") as f:
+            for name, records in pickle.load(f).items():
+                tables.setdefault(name, []).extend(records)
+    return state, tables
+
+
+def clear(directory):
+    """Remove a checkpoint directory"""
+    shutil.rmtree(directory, ignore_errors=True)
@@ -1,12 +1,24 @@
 from faker import Faker
+import os
+import sys
 import random
+import functools
 import csv
+import numpy as np
+import checkpoint
+import instrumentation
+import entity_records
+from instrumentation import timed
+from entity_records import columns_to_records
+from identifier_helpers import mint_identifiers
+from schema import FOREIGN_KEYS, identifier_owner
+from vocabulary import get_locale_faker, get_vocabulary, pick, draw, draw_by_country
 
 # This script generates synthetic healthcare data for testing purposes.
 # It creates addresses, healthcare organizations, service departments, contact points, healthcare personnel, and persons
-# Initialize Faker
+# Initialize Faker; its shared generator is only seeded when this file runs as a script
+# (Faker.seed(0) in __main__), so importing the module leaves other users' Faker streams alone
 fake = Faker()
-Faker.seed(0)
 
 # Configuration: set desired dataset sizes here
 NUM_ORGANIZATIONS = 50               # number of HealthcareOrganization to create
@@ -14,12 +26,21 @@ MIN_DEPARTMENTS_PER_ORG = 5          # minimum ServiceDepartments per organizati
 MAX_DEPARTMENTS_PER_ORG = 10         # maximum ServiceDepartments per organization
 MIN_PERSONNEL_PER_ORG = 15           # min total personnel per organization
 MAX_PERSONNEL_PER_ORG = 40           # max total personnel per organization
+CHECKPOINT_DIR = "checkpoints/data_creator"  # checkpoints of script runs; resume with --resume
+CHECKPOINT_EVERY = 10                # organizations per checkpoint of the personnel stage
+CHECKPOINT_PHASES = ["organizations", "departments", "personnel"]
+SOURCE_DIR = "src/Data_Source"       # where the tables are stored (and appended to with --append)
+GENERATOR_STATE_FILE = ".generator_state.pkl"  # random states after the last run, kept in SOURCE_DIR
+TABLE_FILES = {'Address': 'Address.csv', 'HealthcareOrganization': 'HealthcareOrganization.csv',
+               'ServiceDepartment': 'ServiceDepartment.csv', 'ContactPoint': 'ContactPoint.csv',
+               'HealthcarePersonnel': 'HealthcarePersonnel.csv', 'Person': 'Person.csv'}
 
 
 # Function to store table data as CSV
-def store_table_as_csv(data, filename):
+@timed()
+def store_table_as_csv(data, filename, directory=SOURCE_DIR):
     fieldnames = data[0].keys()
-    with open(f"src/Data_Source/{filename}", 'w', newline='', encoding='utf-8') as csvfile:
+    with open(os.path.join(directory, filename), 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
         for row in data:
@@ -27,44 +48,95 @@ def store_table_as_csv(data, filename):
 
     print(f'{filename} stored with {len(data)} records')
 
-def generate_address(country_code):
-    """
-    Generate a random address for a given country code with aligned city and postal code
+
+# Function to add records to a stored table, in the column order of its header
+@timed()
+def append_table_as_csv(data, filename, directory=SOURCE_DIR):
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        return store_table_as_csv(data, filename, directory)
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        fieldnames = next(csv.reader(csvfile))
+    with open(path, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+        for row in data:
+            writer.writerow(row)
+
+    print(f'{filename} appended with {len(data)} records')
+
+# Postal code rules per country: (lowest number, highest number, two trailing letters)
+postal_code_formats = {
+    "NL": (1000, 9999, True),     # Dutch postcodes are 4 digits + 2 letters (e.g., 1234 AB)
+    "AT": (1000, 9999, False),    # Austrian postcodes are 4 digits
+    "EE": (10000, 99999, False)   # Estonian postcodes are 5 digits
+}
+
+
+@functools.lru_cache(maxsize=None)
+def address_pieces():
     """
-    locales = {"NL": "nl_NL", "AT": "de_AT", "EE": "et_EE"}
-    fake_locale = Faker(locales[country_code])
+    Formatting strings is the slow part of a batch, so every piece is formatted once (on first use) and indexed into
     
-    # First generate a coherent address
-    if country_code == "NL":
-        # Dutch addresses: use postcode pattern and consistent city
-        city = fake_locale.city()
-        # Dutch postcodes are 4 digits + 2 letters (e.g., 1234 AB)
-        postal_code = f"{random.randint(1000, 9999)} {fake_locale.lexify(text='??', letters='ABCDEFGHIJKLMNOPQRSTUVWXYZ')}"
-        street = f"{fake_locale.street_name()} {random.randint(1, 150)}"
-    elif country_code == "AT":
-        # Austrian addresses: postal codes correspond to regions
-        city = fake_locale.city()
-        # Austrian postcodes are 4 digits, with certain ranges for different regions
-        postal_code = f"{random.randint(1000, 9999)}"
-        street = f"{fake_locale.street_name()} {random.randint(1, 150)}"
-    elif country_code == "EE":
-        # Estonian addresses
-        city = fake_locale.city()
-        # Estonian postcodes are 5 digits
-        postal_code = f"{random.randint(10000, 99999)}"
-        street = f"{fake_locale.street_name()} {random.randint(1, 150)}"
+    Returns:
+        Tuple of string arrays: numbers 0-99999, " 1" to " 150" for house numbers and " AA" to " ZZ" (plus "")
+        for Dutch postcodes
+    """
+    number_strings = np.arange(100000).astype(str)
+    house_number_strings = np.char.add(" ", number_strings[:151])
+    postal_code_suffixes = np.array([f" {a}{b}" for a in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" for b in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"] + [""])
+    return number_strings, house_number_strings, postal_code_suffixes
+
+
+def generate_addresses(country_codes, rng=None):
+    """
+    Generate one address per country code in a few vectorised steps
     
-    # Format the full address text with consistent components
-    address_text = f"{street}, {postal_code} {city}, {country_code}"
+    Parameters:
+        country_codes: Sequence of country codes ("NL", "AT" or "EE")
+        rng: Optional NumPy generator; by default it is seeded from the random module
     
-    return {
-        "identifier": fake.uuid4(),
-        "text": street,
-        "city": city,
-        "postalCode": postal_code,
-        "country": country_code
-    }
+    Returns:
+        Dictionary mapping each Address column to a NumPy array
+    """
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    country_codes = np.asarray(country_codes, dtype=str)
+    n = len(country_codes)
+    with instrumentation.stage("generate_addresses", records=n, entity_type="Address"):
+        codes, country = np.unique(country_codes, return_inverse=True)
+        for code in codes:
+            if code not in postal_code_formats:
+                raise ValueError(f"Unsupported country code: {code}")
+        low, high, with_letters = np.array([postal_code_formats[code] for code in codes], dtype=np.int64).reshape(-1, 3).T
+        number_strings, house_number_strings, postal_code_suffixes = address_pieces()
+
+        # Postal code number in the country's range, followed by two letters where the format has them
+        numbers = low[country] + (rng.random(n) * (high - low + 1)[country]).astype(np.int64)
+        suffixes = np.where(with_letters[country] == 1, rng.integers(0, 26 * 26, size=n), 26 * 26)
+        postal_codes = np.char.add(number_strings[numbers], postal_code_suffixes[suffixes])
+
+        # Street and city are picked from the locale vocabularies, the street gets a house number
+        streets = draw_by_country(codes, country, "street_name", rng)
+        streets = np.char.add(streets, house_number_strings[rng.integers(1, 151, size=n)])
+        cities = draw_by_country(codes, country, "city", rng)
+
+        return {
+            "identifier": mint_identifiers(n, seed=rng.integers(2**63)),
+            "text": streets,
+            "city": cities,
+            "postalCode": postal_codes,
+            "country": country_codes
+        }
+
+
+@timed(entity_type="Address")
+def generate_address(country_code):
+    """
+    Generate a random address for a given country code with aligned city and postal code
+    """
+    return columns_to_records("Address", generate_addresses([country_code]))[0]
 
+@timed(entity_type="Address")
 def generate_related_address(parent_address, country_code):
     """
     Generate an address related to a parent address (for departments in the same organization)
@@ -85,8 +157,7 @@ def generate_related_address(parent_address, country_code):
     city_postal_part = parts[1]
     
     # Keep the same city and postal code but modify the street/building number
-    locales = {"NL": "nl_NL", "AT": "de_AT", "EE": "et_EE"}
-    fake_locale = Faker(locales[country_code])
+    fake_locale = get_locale_faker(country_code)
     
     # Extract street name without number
     street_components = street_part.split()
@@ -106,35 +177,38 @@ def generate_related_address(parent_address, country_code):
     # Create new address text with same city/postal but different street
     address_text = f"{new_street}, {city_postal_part}"
     
-    return {
-        "identifier": fake.uuid4(),
-        "text": new_street,
-        "city": parent_data["city"],
-        "postalCode": parent_data["postalCode"],
-        "country": parent_data["country"]
-    }
+    return entity_records.Address(
+        identifier=fake.uuid4(),
+        text=new_street,
+        city=parent_data["city"],
+        postalCode=parent_data["postalCode"],
+        country=parent_data["country"]
+    )
 
 
 # Function to generate a random canonical name based on country
+@timed()
 def generate_organization_name(country_code):
     if country_code == "NL":
-        return fake.company() + " Zorg"
+        return pick(None, "company") + " Zorg"
     elif country_code == "AT":
-        return fake.company() + " Gesundheitszentrum"
+        return pick(None, "company") + " Gesundheitszentrum"
     elif country_code == "EE":
-        return fake.company() + " Tervisekeskus"
+        return pick(None, "company") + " Tervisekeskus"
     else:
-        return fake.company() + " Healthcare"
+        return pick(None, "company") + " Healthcare"
     
 
+@timed(entity_type="HealthcareOrganization")
 def generate_organization(organization_name, address, contact_point):
-    return {
-        "identifier": fake.uuid4(),
-        "healthcareOrganizationName": organization_name,
-        "address": address["identifier"],
-        "contactPoint": contact_point["identifier"]
-    }
-
+    return entity_records.HealthcareOrganization(
+        identifier=fake.uuid4(),
+        healthcareOrganizationName=organization_name,
+        address=address["identifier"],
+        contactPoint=contact_point["identifier"]
+    )
+
+@timed(entity_type="ContactPoint")
 def generate_contact_point(entity_type, country_code="NL", organization_name=None, department_name=None):
     """
     Generate a comprehensive contact point with multiple communication channels
@@ -161,10 +235,6 @@ def generate_contact_point(entity_type, country_code="NL", organization_name=Non
     else:  # department
         contact_types = ["Appointments", "Information", "Emergency", "Staff", "Referrals"]
     
-    # Generate localized faker for phone numbers
-    locales = {"NL": "nl_NL", "AT": "de_AT", "EE": "et_EE"}
-    fake_locale = Faker(locales.get(country_code, "en_US"))
-    
     # Email domain based on entity type
     email_domains = {
         "organization": ["healthcare.org"],
@@ -175,14 +245,14 @@ def generate_contact_point(entity_type, country_code="NL", organization_name=Non
     organization_name_first = ''.join(c for c in organization_name.split()[0] if c.isalnum())
     department_name_first = department_name.split()[0] if department_name else fake.word()
     # Create contact point
-    contact_point = {
-        "identifier": fake.uuid4(),
-        "contactType": random.choice(contact_types),
-        "phone": fake_locale.phone_number(),
-        "email": f"{organization_name_first}@{random.choice(email_domains[entity_type])}" if entity_type == "organization" else f"{organization_name_first}.{department_name_first}@{random.choice(email_domains[entity_type])}",
-        "availableLanguage": [available_languages[0]] + (["en"] if "en" in available_languages and random.choice([True, False]) else []),
-        "fax": fake_locale.phone_number()
-    }
+    contact_point = entity_records.ContactPoint(
+        identifier=fake.uuid4(),
+        contactType=random.choice(contact_types),
+        phone=pick(country_code, "phone_number"),
+        email=f"{organization_name_first}@{random.choice(email_domains[entity_type])}" if entity_type == "organization" else f"{organization_name_first}.{department_name_first}@{random.choice(email_domains[entity_type])}",
+        availableLanguage=[available_languages[0]] + (["en"] if "en" in available_languages and random.choice([True, False]) else []),
+        fax=pick(country_code, "phone_number")
+    )
     
     return contact_point
 
@@ -232,38 +302,40 @@ medical_departments = [
     "Urologic"
 ]
 
-def generate_service_department(organization):
+@timed(entity_type="ServiceDepartment")
+def generate_service_department(organization, dept_address=None):
     """
     Generate a single service department for a healthcare organization
     
     Parameters:
         organization: Dictionary containing the healthcare organization data
+        dept_address: Optional pre-generated address in the organization's country
     
     Returns:
         A dictionary containing the service department data
     """
-    # Find the organization's address identifier
-    org_address_id = organization["address"]
-    org_country = next((a["country"] for a in addresses if a["identifier"] == org_address_id), "NL")
-    
     # Select a department name
     department_name = random.choice(medical_departments)
     
-    # Generate a related address for the department
-    dept_address = generate_related_address(org_address_id, org_country)
+    if dept_address is None:
+        # Generate a related address for the department
+        org_address_id = organization["address"]
+        org_country = next((a["country"] for a in addresses if a["identifier"] == org_address_id), "NL")
+        dept_address = generate_related_address(org_address_id, org_country)
+    org_country = dept_address["country"]
     addresses.append(dept_address)  # Add this new address to our addresses list
     
     # Generate contact point for department
     contact_point = generate_contact_point("department", org_country, organization["healthcareOrganizationName"], department_name)
     contact_points.append(contact_point)
 
-    department = {
-        "identifier": fake.uuid4(),
-        "serviceDepartmentName": department_name,
-        "address": dept_address["identifier"],  # Use the new related address
-        "isPartOf": organization["identifier"],
-        "contactPoint": contact_point["identifier"]
-    }
+    department = entity_records.ServiceDepartment(
+        identifier=fake.uuid4(),
+        serviceDepartmentName=department_name,
+        address=dept_address["identifier"],  # Use the new related address
+        isPartOf=organization["identifier"],
+        contactPoint=contact_point["identifier"]
+    )
     
     return department
 
@@ -313,47 +385,110 @@ department_job_titles = {
 }
 
 
-def generate_healthcare_personnel(organization, department):
+# Job titles as one flat array with the slice of each department, built on first use
+default_job_titles = ["Healthcare Specialist", "Medical Professional"]
+job_title_table = {}
+
+def job_title_slices(department_names):
+    """Return the flat job title array and the (offset, count) of the titles of each department name"""
+    if not job_title_table:
+        titles = [default_job_titles] + list(department_job_titles.values())
+        counts = np.array([len(t) for t in titles])
+        job_title_table["titles"] = np.array([title for t in titles for title in t])
+        job_title_table["offsets"] = dict(zip([None] + list(department_job_titles), zip(np.cumsum(counts) - counts, counts)))
+    offsets = job_title_table["offsets"]
+    slices = np.array([offsets.get(name, offsets[None]) for name in department_names], dtype=np.int64).reshape(-1, 2)
+    return job_title_table["titles"], slices[:, 0], slices[:, 1]
+
+
+# Email local parts handed out so far (email_suffixes keeps the last number used per local part),
+# so that two persons with the same name get jan.jansen@ and jan.jansen2@ instead of one shared address
+email_local_parts = set()
+email_suffixes = {}
+
+def reserve_emails(emails):
+    """Mark email addresses as taken, e.g. those of stored personnel before appending new ones"""
+    email_local_parts.update(str(email).split("@")[0] for email in emails if isinstance(email, str))
+
+
+def unique_local_parts(local_parts):
+    """Number the local parts that are already taken (second "janjansen" becomes "janjansen2") and reserve them"""
+    unique = []
+    for local in local_parts.tolist():
+        if local in email_local_parts:
+            suffix = email_suffixes.get(local, 1) + 1
+            while f"{local}{suffix}" in email_local_parts:
+                suffix += 1
+            email_suffixes[local] = suffix
+            local = f"{local}{suffix}"
+        email_local_parts.add(local)
+        unique.append(local)
+    return np.array(unique, dtype=str)
+
+
+# Distinct first and last names, built on first use. Names are drawn uniformly from these rather than
+# with the provider's frequencies, so that a few common names do not produce many same-named persons
+name_parts = {}
+
+def draw_names(rng, n):
+    """Draw n person names (first and last name drawn separately) and their unique email local parts"""
+    if not name_parts:
+        name_parts.update({provider: np.unique(get_vocabulary(None, provider)) for provider in ("first_name", "last_name")})
+    first_names, last_names = (name_parts[provider][rng.integers(0, len(name_parts[provider]), size=n)]
+                               for provider in ("first_name", "last_name"))
+    names = np.char.add(np.char.add(first_names, " "), last_names)
+    local = np.char.lower(names)
+    for char in (" ", ".", "'"):
+        local = np.char.replace(local, char, "")
+    return names, unique_local_parts(local)
+
+
+def generate_personnel_batch(organization, departments, rng=None):
     """
-    Generate a single healthcare personnel record with associated person record
+    Generate all personnel of one organization, with their person records, in one vectorised step
+    
+    Every department first gets 2 personnel, then random departments are topped up until the
+    organization reaches a random headcount between MIN_PERSONNEL_PER_ORG and MAX_PERSONNEL_PER_ORG.
     
     Parameters:
         organization: Dictionary containing the healthcare organization data
-        department: Dictionary containing the service department data
+        departments: List of the organization's service department dictionaries
+        rng: Optional NumPy generator; by default it is seeded from the random module
     
     Returns:
-        Tuple of (person_dict, personnel_dict) - the created person and personnel records
+        Tuple of (person columns, personnel columns), each a dictionary mapping column names to NumPy arrays
     """
-    department_name = department["serviceDepartmentName"]
-    
-    # Select an appropriate job title based on the department
-    job_titles = department_job_titles.get(department_name, ["Healthcare Specialist", "Medical Professional"])
-    job_title = random.choice(job_titles)
-    
-    person_name = fake.name()
-    email_local_part = person_name.lower().replace(" ", "").replace(".", "").replace("'", "")
-    email_address = f"{email_local_part}@healthcare.org"
-
-    # Create person record
-    person = {
-        "identifier": fake.uuid4(),
-        "personName": person_name,
-        "birthDate": fake.date_of_birth(minimum_age=25, maximum_age=65).isoformat(),
-        "gender": random.choice(["Male", "Female", "Other"]),
-        "knowsLanguage": random.choice(["nl", "de", "et"])
-    }
-
-    # Create personnel record
-    personnel = {
-        "identifier": person["identifier"],
-        "institution": organization["identifier"],
-        "department": department["identifier"],
-        "jobTitle": job_title,
-        "email": email_address
-    }
-    
-    return person, personnel
-
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    target_total_personnel = rng.integers(MIN_PERSONNEL_PER_ORG, MAX_PERSONNEL_PER_ORG + 1)
+    extra = max(target_total_personnel - 2 * len(departments), 0) if departments else 0
+    assigned = np.concatenate([np.repeat(np.arange(len(departments)), 2), rng.integers(0, len(departments), size=extra)]).astype(np.int64)
+    n = len(assigned)
+    with instrumentation.stage("generate_personnel_batch", records=n, entity_type="HealthcarePersonnel"):
+        department_ids = np.array([d["identifier"] for d in departments])[assigned] if n else np.array([], dtype=str)
+
+        # Select an appropriate job title based on the department
+        titles, offsets, counts = job_title_slices([d["serviceDepartmentName"] for d in departments])
+        picks = (rng.random(n) * counts[assigned]).astype(np.int64)
+        job_titles = titles[offsets[assigned] + picks]
+
+        person_names, local_parts = draw_names(rng, n)
+        identifiers = mint_identifiers(n, seed=rng.integers(2**63))
+        person = {
+            "identifier": identifiers,
+            "personName": person_names,
+            "birthDate": draw(None, "date_of_birth", rng, n),
+            "gender": np.array(["Male", "Female", "Other"])[rng.integers(0, 3, size=n)],
+            "knowsLanguage": np.array(["nl", "de", "et"])[rng.integers(0, 3, size=n)]
+        }
+        personnel = {
+            "identifier": identifiers,
+            "institution": np.full(n, organization["identifier"]),
+            "department": department_ids,
+            "jobTitle": job_titles,
+            "email": np.char.add(local_parts, "@healthcare.org")
+        }
+        return person, personnel
 
 
 #################################################################################################################
@@ -367,71 +502,269 @@ contact_points = []
 service_department = []
 healthcare_personnel = []
 persons = []
-## how many HCO do we want?
-for _ in range(NUM_ORGANIZATIONS):  # Select the amount of organizations
-    country_code = random.choice(["NL", "AT", "EE"])
-    address = generate_address(country_code)
-    addresses.append(address)
 
-    organization_name = generate_organization_name(country_code)
+def generate_dataset(num_organizations=NUM_ORGANIZATIONS, checkpoint_dir=None, resume=False, existing_emails=None):
+    """
+    Generate the full master data set into the module level tables
+    
+    Parameters:
+        num_organizations: Number of HealthcareOrganization records to create
+        checkpoint_dir: Directory for checkpoints after the organizations, after the departments and
+            every CHECKPOINT_EVERY organizations of the personnel stage (None for no checkpoints)
+        resume: Continue from the last checkpoint in checkpoint_dir instead of starting over
+        existing_emails: Email addresses of records generated earlier, which the new personnel must not reuse
+    
+    Returns:
+        Dictionary mapping each entity type to its list of records
+    """
+    tables = {'addresses': addresses, 'healthcare_organization': healthcare_organization, 'contact_points': contact_points,
+              'service_department': service_department, 'healthcare_personnel': healthcare_personnel, 'persons': persons}
+    for table in tables.values():
+        table.clear()
+    email_local_parts.clear()
+    email_suffixes.clear()
+    reserve_emails(existing_emails if existing_emails is not None else [])
+    # Addresses are generated in batches with one NumPy generator, seeded from the random module
+    rng = np.random.default_rng(random.getrandbits(64))
+
+    state, saved_counts = {"phase": None, "num_organizations": num_organizations}, {}
+    if checkpoint_dir and resume:
+        loaded, records = checkpoint.load(checkpoint_dir)
+        if loaded is not None:
+            if loaded["num_organizations"] != num_organizations:
+                raise ValueError(f"Checkpoint in {checkpoint_dir} is for {loaded['num_organizations']} organizations")
+            state = loaded
+            for name, table in tables.items():
+                table.extend(records.get(name, []))
+            saved_counts = {name: len(table) for name, table in tables.items()}
+            reserve_emails(personnel["email"] for personnel in healthcare_personnel)
+            checkpoint.restore_random_state(state["random_state"], rng)
+    elif checkpoint_dir:
+        checkpoint.clear(checkpoint_dir)
+    completed = CHECKPOINT_PHASES.index(state["phase"]) + 1 if state["phase"] else 0
+
+    def save_checkpoint(phase, **progress):
+        if checkpoint_dir:
+            state.update(progress, phase=phase, random_state=checkpoint.random_state(rng))
+            checkpoint.save(checkpoint_dir, state, tables, saved_counts)
+
+    ## how many HCO do we want?
+    if completed < 1:
+        with instrumentation.stage("generate_organizations"):
+            country_codes = [random.choice(["NL", "AT", "EE"]) for _ in range(num_organizations)]  # Select the amount of organizations
+            org_addresses = columns_to_records("Address", generate_addresses(country_codes, rng))
+            for country_code, address in zip(country_codes, org_addresses):
+                addresses.append(address)
+
+                organization_name = generate_organization_name(country_code)
+
+                # Generate contact point for organization
+                contact_point = generate_contact_point("organization", country_code, organization_name)
+                contact_points.append(contact_point)
+                organization = generate_organization(organization_name, address, contact_point)
+                healthcare_organization.append(organization)
+        save_checkpoint("organizations", country_codes=country_codes)
+    else:
+        country_codes = state["country_codes"]
+
+    # Dictionary to store the departments by organization
+    org_departments = {}
+    if completed < 2:
+        with instrumentation.stage("generate_departments"):
+            # Select the amount of departments and generate all department addresses in the organizations' countries at once
+            department_counts = [random.randint(MIN_DEPARTMENTS_PER_ORG, MAX_DEPARTMENTS_PER_ORG) for _ in healthcare_organization]
+            department_countries = np.repeat(country_codes, department_counts)
+            dept_addresses = iter(columns_to_records("Address", generate_addresses(department_countries, rng)))
+
+            # Generate data for ServiceDepartment and organize by institution
+            for org, department_count in zip(healthcare_organization, department_counts):
+                org_departments[org["identifier"]] = []
+                for _ in range(department_count):
+                    department = generate_service_department(org, next(dept_addresses))
+                    service_department.append(department)
+                    org_departments[org["identifier"]].append(department)
+        save_checkpoint("departments", department_ids={org: [d["identifier"] for d in departments]
+                                                       for org, departments in org_departments.items()})
+    else:
+        departments_by_id = {department["identifier"]: department for department in service_department}
+        org_departments = {org: [departments_by_id[d] for d in ids] for org, ids in state["department_ids"].items()}
+
+    with instrumentation.stage("generate_personnel"):
+        # Generate personnel for each organization, one batch per organization
+        start = state.get("next_organization", 0)
+        for position, org in enumerate(healthcare_organization[start:], start):
+            # Skip if org has no departments
+            if org_departments.get(org["identifier"], []):
+                person_columns, personnel_columns = generate_personnel_batch(org, org_departments[org["identifier"]], rng)
+                persons.extend(columns_to_records("Person", person_columns))
+                healthcare_personnel.extend(columns_to_records("HealthcarePersonnel", personnel_columns))
+            # The personnel stage is still open, so these checkpoints keep the departments phase
+            if (position + 1) % CHECKPOINT_EVERY == 0 and position + 1 < len(healthcare_organization):
+                save_checkpoint("departments", next_organization=position + 1)
+    if completed < 3:
+        save_checkpoint("personnel", next_organization=len(healthcare_organization))
+
+    return {
+        'Address': addresses,
+        'HealthcareOrganization': healthcare_organization,
+        'ServiceDepartment': service_department,
+        'ContactPoint': contact_points,
+        'HealthcarePersonnel': healthcare_personnel,
+        'Person': persons
+    }
 
-    # Generate contact point for organization
-    contact_point = generate_contact_point("organization", country_code, organization_name)
-    contact_points.append(contact_point)
-    organization = generate_organization(organization_name, address, contact_point)
-    healthcare_organization.append(organization)
-
-# Dictionary to store the departments by organization
-org_departments = {}
-# Generate data for ServiceDepartment and organize by institution
-for org in healthcare_organization:
-    org_departments[org["identifier"]] = []
-    # Find the organization's address identifier
-    for _ in range(random.randint(MIN_DEPARTMENTS_PER_ORG, MAX_DEPARTMENTS_PER_ORG)):  # Select the amount of departments
-        department = generate_service_department(org)
-        service_department.append(department)
-        org_departments[org["identifier"]].append(department)
-
-# Generate personnel for each organization
-for org in healthcare_organization:
-    # Skip if org has no departments
-    if not org_departments.get(org["identifier"], []):
-        continue
-        
-    # Define target personnel count for this organization
-    target_total_personnel = random.randint(MIN_PERSONNEL_PER_ORG, MAX_PERSONNEL_PER_ORG)  # Select the amount of personnel
-    current_personnel_count = 0
+
+def generate_tables(num_organizations=NUM_ORGANIZATIONS, checkpoint_dir=None, resume=False):
+    """
+    Generate the full master data set as in-memory tables (see tables.py)
     
-    # First ensure all departments have at least 2 personnel
-    for department in org_departments[org["identifier"]]:
-        department_name = department["serviceDepartmentName"]
-        
-        # Add exactly 2 personnel to each department first
-        for _ in range(2):
-            person, personnel = generate_healthcare_personnel(org, department)
-            persons.append(person)
-            healthcare_personnel.append(personnel)
-            current_personnel_count += 1
-    
-    # Then add remaining personnel to reach the desired total
-    while current_personnel_count < target_total_personnel:
-        # Randomly select a department for additional personnel
-        department = random.choice(org_departments[org["identifier"]])
-        department_name = department["serviceDepartmentName"]
-        
-        person, personnel = generate_healthcare_personnel(org, department)
-        persons.append(person)
-        healthcare_personnel.append(personnel)       
-        current_personnel_count += 1
-
-
-# store tables
-store_table_as_csv(addresses, 'Address.csv')
-store_table_as_csv(healthcare_organization, 'HealthcareOrganization.csv')
-store_table_as_csv(service_department, 'ServiceDepartment.csv')
-store_table_as_csv(contact_points, 'ContactPoint.csv')
-store_table_as_csv(healthcare_personnel, 'HealthcarePersonnel.csv')
-store_table_as_csv(persons, 'Person.csv')
+    Parameters:
+        num_organizations: Number of HealthcareOrganization records to create
+        checkpoint_dir, resume: See generate_dataset
+    
+    Returns:
+        Dictionary mapping each entity type to a DataFrame
+    """
+    import tables
+    return tables.dataset(generate_dataset(num_organizations, checkpoint_dir, resume))
+
+
+def stored_column(directory, entity_type, column):
+    """Values of one column of a stored table (empty if the table does not exist), read without the other columns"""
+    import pandas as pd
+    path = os.path.join(directory, TABLE_FILES[entity_type])
+    if not os.path.exists(path):
+        return pd.Series(dtype=object)
+    return pd.read_csv(path, usecols=[column], dtype=str)[column].dropna()
+
+
+def existing_identifiers(directory=SOURCE_DIR):
+    """
+    Hash index of the identifiers in the stored tables (only their identifier columns are read)
+    
+    Parameters:
+        directory: Directory with the stored tables
+    
+    Returns:
+        Dictionary mapping each identifier-owning entity type to a set of identifiers
+    """
+    known = {}
+    for entity_type in TABLE_FILES:
+        known.setdefault(identifier_owner(entity_type), set()).update(stored_column(directory, entity_type, 'identifier'))
+    return known
+
+
+def resolve_identifier_collisions(dataset, known):
+    """
+    Give new records whose identifier is already taken a fresh one, and rewrite the references to it
+    
+    Parameters:
+        dataset: Dictionary mapping entity type to its list of new records (changed in place)
+        known: Identifier index from existing_identifiers; the new identifiers are added to it
+    
+    Returns:
+        Number of identifiers replaced
+    """
+    id_maps = {}
+    for entity_type, records in dataset.items():
+        if identifier_owner(entity_type) != entity_type:
+            continue
+        taken = known.setdefault(entity_type, set())
+        collided = [record["identifier"] for record in records if record["identifier"] in taken]
+        id_map = {}
+        while len(id_map) < len(collided):
+            for identifier in mint_identifiers(len(collided) - len(id_map), seed=random.getrandbits(64)):
+                if identifier not in taken:
+                    id_map[collided[len(id_map)]] = str(identifier)
+                    taken.add(identifier)
+        taken.update(record["identifier"] for record in records)
+        if id_map:
+            id_maps[entity_type] = id_map
+    if id_maps:
+        for entity_type, records in dataset.items():
+            references = dict(FOREIGN_KEYS.get(entity_type, {}), identifier=identifier_owner(entity_type))
+            for column, target in references.items():
+                id_map = id_maps.get(target)
+                if id_map:
+                    for record in records:
+                        record[column] = id_map.get(record[column], record[column])
+    return sum(len(id_map) for id_map in id_maps.values())
+
+
+def append_dataset(num_new_organizations, directory=SOURCE_DIR, kg_path=None):
+    """
+    Grow the stored master data set by new organizations with their departments and personnel
+    Only the new entities are generated and appended; the stored records are neither regenerated nor rewritten.
+    The random streams continue from the state saved by the previous run or append, so new records do not
+    repeat the values drawn for the stored ones.
+    
+    Parameters:
+        num_new_organizations: Number of HealthcareOrganization records to add
+        directory: Directory with the stored tables
+        kg_path: Optional knowledge graph file (.ttl or .nt) to append the triples of the new entities to
+    
+    Returns:
+        Dictionary mapping each entity type to its list of new records
+    """
+    with instrumentation.stage("load_identifiers"):
+        known = existing_identifiers(directory)
+    state_path = os.path.join(directory, GENERATOR_STATE_FILE)
+    if not checkpoint.load_random_state(state_path):
+        # Tables stored before the state was kept: start a stream of their own instead of the
+        # Faker.seed(0) stream, which would repeat the stored identifiers and names
+        seed = len(known.get('HealthcareOrganization', ()))
+        random.seed(seed)
+        Faker.seed(seed)
+    new_dataset = generate_dataset(num_new_organizations, existing_emails=stored_column(directory, 'HealthcarePersonnel', 'email'))
+    replaced = resolve_identifier_collisions(new_dataset, known)
+    if replaced:
+        print(f'{replaced} identifiers already in use were replaced')
+
+    with instrumentation.stage("append_tables"):
+        for entity_type, filename in TABLE_FILES.items():
+            if new_dataset[entity_type]:
+                append_table_as_csv(new_dataset[entity_type], filename, directory)
+    checkpoint.save_random_state(state_path)
+
+    if kg_path:
+        import tables
+        src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+        if src not in sys.path:
+            sys.path.insert(0, src)
+        from ConvertCSVtoKG import append_graph
+        append_graph(tables.dataset(new_dataset), kg_path)
+    return new_dataset
+
+
+if __name__ == "__main__":
+    # python data_creator.py [--resume] [--database file.sqlite|file.duckdb]
+    # python data_creator.py --append N [kg_file]
+    if "--append" in sys.argv:
+        arguments = sys.argv[sys.argv.index("--append") + 1:]
+        append_dataset(int(arguments[0]), kg_path=arguments[1] if len(arguments) > 1 else None)
+        instrumentation.write_summary('data_creator_summary.json')
+        sys.exit(0)
+
+    Faker.seed(0)
+    dataset = generate_dataset(checkpoint_dir=CHECKPOINT_DIR, resume="--resume" in sys.argv)
+
+    # store tables
+    with instrumentation.stage("store_tables"):
+        store_table_as_csv(addresses, 'Address.csv')
+        store_table_as_csv(healthcare_organization, 'HealthcareOrganization.csv')
+        store_table_as_csv(service_department, 'ServiceDepartment.csv')
+        store_table_as_csv(contact_points, 'ContactPoint.csv')
+        store_table_as_csv(healthcare_personnel, 'HealthcarePersonnel.csv')
+        store_table_as_csv(persons, 'Person.csv')
+    if "--database" in sys.argv:
+        import tables
+        from database import write_database
+        write_database(tables.dataset(dataset), sys.argv[sys.argv.index("--database") + 1])
+    # Keep the random states, so that --append continues these streams
+    checkpoint.save_random_state(os.path.join(SOURCE_DIR, GENERATOR_STATE_FILE))
+
+    checkpoint.clear(CHECKPOINT_DIR)
+    instrumentation.write_summary('data_creator_summary.json')
 
 
 #################################################################################################################
@@ -0,0 +1,189 @@
+import os
+import sys
+import sqlite3
+import pandas as pd
+import instrumentation
+import tables
+from schema import ENTITY_TYPES, FIELDS, FOREIGN_KEYS, identifier_owner
+# Bulk loads a dataset into an embedded database file (SQLite, or DuckDB when installed) with the keys
+# of the data model in readme.md: identifier is the primary key of every table (UNIQUE and a foreign key
+# to Person for HealthcarePersonnel), the foreign keys of schema.FOREIGN_KEYS reference their tables and
+# every foreign key column gets an index. A golden standard can be loaded as a table of its own.
+#   - SQLite: one transaction with journaling off and batched executemany; the secondary indexes are
+#     built after the rows are in, and dangling foreign keys are counted once at the end (foreign_key_check)
+#   - DuckDB: each DataFrame is inserted in one statement through DuckDB's native DataFrame scan
+# Tables are created in dependency order (schema.ENTITY_TYPES), so parents are loaded before children.
+#   python database.py data_dir database_file [golden_standard.csv]
+# (the backend follows the extension: .duckdb or .ddb for DuckDB, anything else for SQLite)
+
+BACKENDS = ("sqlite", "duckdb")
+DUCKDB_EXTENSIONS = (".duckdb", ".ddb")
+BATCH_SIZE = 50000                   # rows per executemany call (SQLite)
+GOLDEN_TABLE = "golden_standard"
+# Golden standard columns that get an index
+GOLDEN_INDEXES = ['original_id', 'duplicate_id', 'entity_type']
+
+
+def backend_for(path):
+    """Backend name of a database file, from its extension"""
+    return "duckdb" if os.path.splitext(path)[1].lower() in DUCKDB_EXTENSIONS else "sqlite"
+
+
+def connect(path, backend=None):
+    """Open a database file with the given backend (by default the one of its extension)"""
+    backend = backend or backend_for(path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown database backend {backend!r}; use one of {BACKENDS}")
+    if backend == "duckdb":
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("DuckDB databases need duckdb: pip install duckdb") from e
+        return duckdb.connect(path)
+    return sqlite3.connect(path)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def create_table_sql(entity_type, columns, prefix=""):
+    """
+    CREATE TABLE statement of an entity type with its key constraints
+    Args:
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        columns: Columns of the table (schema columns plus extras such as anchor)
+        prefix: Prefix of the table names, also used for the referenced tables
+    """
+    definitions = []
+    references = FOREIGN_KEYS.get(entity_type, {})
+    for column in columns:
+        definition = f"{_quote(column)} TEXT"
+        if column == 'identifier':
+            definition += " PRIMARY KEY" if identifier_owner(entity_type) == entity_type else " NOT NULL UNIQUE"
+        definitions.append(definition)
+    for column, target in references.items():
+        if column in columns:
+            definitions.append(f"FOREIGN KEY ({_quote(column)}) REFERENCES {_quote(prefix + target)} (identifier)")
+    return f"CREATE TABLE {_quote(prefix + entity_type)} (\n  " + ",\n  ".join(definitions) + "\n)"
+
+
+def index_sql(table, columns):
+    """CREATE INDEX statements for columns of a table"""
+    return [f"CREATE INDEX {_quote(f'idx_{table}_{column}')} ON {_quote(table)} ({_quote(column)})" for column in columns]
+
+
+def _text_frame(df):
+    # Every column of an entity table is TEXT: lists get their CSV string form, numbers read back from
+    # CSV (e.g. postal codes) become strings again and missing values become NULL
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        text = values.astype(str)
+        if pd.api.types.is_numeric_dtype(values):
+            text = text.str.removesuffix('.0')
+        columns[column] = text.astype(object).where(values.notna(), None)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _sql_type(values):
+    if pd.api.types.is_float_dtype(values):
+        return "DOUBLE"
+    if pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return "BIGINT"
+    return "TEXT"
+
+
+def _insert(connection, backend, table, df):
+    if backend == "duckdb":
+        connection.register("_load", df)
+        connection.execute(f"INSERT INTO {_quote(table)} SELECT * FROM _load")
+        connection.unregister("_load")
+        return
+    statement = f"INSERT INTO {_quote(table)} VALUES ({', '.join('?' * len(df.columns))})"
+    for start in range(0, len(df), BATCH_SIZE):
+        connection.executemany(statement, df.iloc[start:start + BATCH_SIZE].itertuples(index=False, name=None))
+
+
+def write_database(tables_to_load, path, golden=None, backend=None, prefix="", replace=True):
+    """
+    Bulk load a dataset (and optionally its golden standard) into a database file
+    Args:
+        tables_to_load: Dict mapping entity type to DataFrame (extra columns such as anchor are kept)
+        path: Database file; created if needed
+        golden: Optional golden standard DataFrame, loaded as the golden_standard table (prefixed)
+        backend: "sqlite" or "duckdb" (by default from the file extension)
+        prefix: Prefix of the table names, to keep several datasets (e.g. original_ and variant) in one file
+        replace: Drop tables of the same name first
+    Returns:
+        Dict mapping each foreign key (table, column) to its number of dangling references
+    """
+    backend = backend or backend_for(path)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = connect(path, backend)
+    try:
+        if backend == "sqlite":
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.execute("BEGIN")
+        loaded = [entity_type for entity_type in ENTITY_TYPES if entity_type in tables_to_load]
+        if replace:
+            for table in [prefix + GOLDEN_TABLE] + [prefix + entity_type for entity_type in reversed(loaded)]:
+                connection.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        for entity_type in loaded:
+            df = tables_to_load[entity_type]
+            columns = [c for c in FIELDS[entity_type] if c in df.columns] + [c for c in df.columns if c not in FIELDS[entity_type]]
+            with instrumentation.stage("database_load", records=len(df), entity_type=entity_type):
+                connection.execute(create_table_sql(entity_type, columns, prefix))
+                _insert(connection, backend, prefix + entity_type, _text_frame(df[columns]))
+        if golden is not None:
+            with instrumentation.stage("database_load", records=len(golden), entity_type=GOLDEN_TABLE):
+                columns = ", ".join(f"{_quote(c)} {_sql_type(golden[c])}" for c in golden.columns)
+                connection.execute(f"CREATE TABLE {_quote(prefix + GOLDEN_TABLE)} ({columns})")
+                _insert(connection, backend, prefix + GOLDEN_TABLE, golden.astype(object).where(golden.notna(), None))
+        with instrumentation.stage("database_indexes"):
+            for entity_type in loaded:
+                columns = [c for c in FOREIGN_KEYS.get(entity_type, {}) if c in tables_to_load[entity_type].columns and c != 'identifier']
+                if 'anchor' in tables_to_load[entity_type].columns:
+                    columns.append('anchor')
+                for statement in index_sql(prefix + entity_type, columns):
+                    connection.execute(statement)
+            if golden is not None:
+                for statement in index_sql(prefix + GOLDEN_TABLE, [c for c in GOLDEN_INDEXES if c in golden.columns]):
+                    connection.execute(statement)
+        connection.commit()
+        return foreign_key_check(connection, loaded, prefix)
+    finally:
+        connection.close()
+
+
+def foreign_key_check(connection, entity_types=ENTITY_TYPES, prefix=""):
+    """
+    Count the foreign key values without a referenced row
+    Returns:
+        Dict mapping (table, column) to the number of dangling references
+    """
+    dangling = {}
+    for entity_type in entity_types:
+        for column, target in FOREIGN_KEYS.get(entity_type, {}).items():
+            if target not in entity_types:
+                continue
+            child, parent = _quote(prefix + entity_type), _quote(prefix + target)
+            (count,) = connection.execute(
+                f"SELECT COUNT(*) FROM {child} c WHERE c.{_quote(column)} IS NOT NULL AND NOT EXISTS "
+                f"(SELECT 1 FROM {parent} p WHERE p.identifier = c.{_quote(column)})").fetchone()
+            dangling[(prefix + entity_type, column)] = count
+    return dangling
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python database.py data_dir database_file [golden_standard.csv]")
+        sys.exit(1)
+    golden_standard = pd.read_csv(sys.argv[3]) if len(sys.argv) > 3 else None
+    problems = write_database(tables.read_tables(sys.argv[1]), sys.argv[2], golden_standard)
+    print(f"{sys.argv[2]} written ({backend_for(sys.argv[2])})")
+    for (table, column), count in problems.items():
+        if count:
+            print(f"  {table}.{column}: {count} dangling references")
@@ -0,0 +1,229 @@
+import os
+import numpy as np
+import pandas as pd
+from schema import ENTITY_TYPES, FOREIGN_KEYS
+# Organization-rooted train/test splitting: every organization is assigned to one split as a whole,
+# together with its departments, personnel, persons, addresses and contact points
+
+ROOT_ENTITY = 'HealthcareOrganization'
+
+# Columns needed to resolve the organization of every row (read before streaming the full tables)
+KEY_COLUMNS = {
+    entity_type: ['identifier'] + [c for c in FOREIGN_KEYS.get(entity_type, {}) if c != 'identifier']
+    for entity_type in ENTITY_TYPES
+}
+
+
+def organization_roots(entity_dataframes):
+    """
+    Resolve the organization every row belongs to by walking the FK graph with hash joins.
+    Tables that reference an organization inherit it (departments, personnel), tables that are
+    referenced inherit it from the referring rows (addresses, contact points, persons).
+    Args:
+        entity_dataframes: Dict mapping entity type to DataFrame (only the key columns are used)
+    Returns:
+        Dict mapping entity type to a Series identifier -> organization identifier
+    """
+    roots = {}
+    if ROOT_ENTITY in entity_dataframes:
+        ids = entity_dataframes[ROOT_ENTITY]['identifier'].dropna().unique()
+        roots[ROOT_ENTITY] = pd.Series(ids, index=ids)
+    changed = True
+    while changed:
+        changed = False
+        for entity_type, foreign_keys in FOREIGN_KEYS.items():
+            if entity_type not in entity_dataframes:
+                continue
+            df = entity_dataframes[entity_type]
+            for column, target in foreign_keys.items():
+                if column not in df.columns or target not in entity_dataframes:
+                    continue
+                if target in roots:
+                    # Forward: the row belongs to the organization of the row it references
+                    owner = pd.Series(df[column].map(roots[target]).values, index=df['identifier'].values)
+                    changed |= _merge_roots(roots, entity_type, owner)
+                if entity_type in roots:
+                    # Backward: a referenced row belongs to the organization of its first referrer
+                    owner = pd.Series(df['identifier'].map(roots[entity_type]).values, index=df[column].values)
+                    changed |= _merge_roots(roots, target, owner)
+    return roots
+
+
+def _merge_roots(roots, entity_type, owner):
+    # Adds identifiers that have no organization yet; returns True if any were added
+    owner = owner[owner.index.notna() & owner.notna()]
+    owner = owner[~owner.index.duplicated()]
+    if entity_type in roots:
+        owner = owner[~owner.index.isin(roots[entity_type].index)]
+        if owner.empty:
+            return False
+        owner = pd.concat([roots[entity_type], owner])
+    elif owner.empty:
+        return False
+    roots[entity_type] = owner
+    return True
+
+
+def organization_strata(entity_dataframes, stratify_by=('country', 'department_mix'), department_bins=2):
+    """
+    Label every organization with the stratum used for a stratified split
+    Args:
+        entity_dataframes: Dict mapping entity type to DataFrame
+        stratify_by: Any of 'country' (country of the organization address) and
+            'department_mix' (number of departments, binned into department_bins quantiles)
+        department_bins: Number of quantile bins for the department count
+    Returns:
+        Series organization identifier -> stratum label
+    """
+    organizations = entity_dataframes[ROOT_ENTITY].drop_duplicates('identifier').set_index('identifier')
+    strata = pd.Series('', index=organizations.index)
+    if 'country' in stratify_by and 'Address' in entity_dataframes:
+        countries = entity_dataframes['Address'].drop_duplicates('identifier').set_index('identifier')['country']
+        strata = strata + organizations['address'].map(countries).fillna('?').astype(str)
+    if 'department_mix' in stratify_by and 'ServiceDepartment' in entity_dataframes:
+        departments = entity_dataframes['ServiceDepartment']['isPartOf'].value_counts()
+        department_counts = organizations.index.to_series().map(departments).fillna(0)
+        bins = pd.qcut(department_counts.rank(method='first'), department_bins, labels=False)
+        strata = strata + '/' + bins.astype(str)
+    return strata
+
+
+def assign_organizations(organization_ids, strata=None, test_size=0.3, seed=None):
+    """
+    Assign organizations to 'train' or 'test'.
+    With strata, organizations are ordered by stratum and sampled systematically, so every stratum
+    gets its proportional share of test organizations and the overall test count is exact.
+    Args:
+        organization_ids: Identifiers of the organizations
+        strata: Optional Series organization identifier -> stratum label
+        test_size: Fraction of organizations that go to the test split
+        seed: Optional seed for a reproducible split
+    Returns:
+        Series organization identifier -> 'train' or 'test'
+    """
+    rng = np.random.default_rng(seed)
+    ids = pd.Index(pd.unique(np.asarray(organization_ids)))
+    order = pd.DataFrame({
+        'stratum': strata.reindex(ids).fillna('').values if strata is not None else '',
+        'key': rng.random(len(ids))
+    }, index=ids).sort_values(['stratum', 'key'])
+    positions = np.arange(len(ids)) + rng.random()
+    test = np.floor((positions + 1) * test_size) > np.floor(positions * test_size)
+    return pd.Series(np.where(test, 'test', 'train'), index=order.index).reindex(ids)
+
+
+def split_labels(roots, assignment):
+    """
+    Map the identifiers of every table to the split of their organization
+    Args:
+        roots: Organization roots returned by organization_roots
+        assignment: Series organization identifier -> split name
+    Returns:
+        Dict mapping entity type to a Series identifier -> split name
+    """
+    return {entity_type: owner.map(assignment) for entity_type, owner in roots.items()}
+
+
+def _label_rows(entity_type, df, labels, orphan_split):
+    if entity_type in labels:
+        split = df['identifier'].map(labels[entity_type])
+    else:
+        split = pd.Series(np.nan, index=df.index, dtype=object)
+    return split.fillna(orphan_split) if orphan_split else split
+
+
+def split_tables(entity_dataframes, assignment, roots=None, orphan_split='train'):
+    """
+    Split in-memory tables by organization
+    Args:
+        entity_dataframes: Dict mapping entity type to DataFrame
+        assignment: Series organization identifier -> split name
+        roots: Organization roots (computed when not given)
+        orphan_split: Split for rows that no organization reaches (None drops them)
+    Returns:
+        Dict mapping split name to a dict of entity type -> DataFrame
+    """
+    if roots is None:
+        roots = organization_roots(entity_dataframes)
+    labels = split_labels(roots, assignment)
+    splits = {name: {} for name in pd.unique(assignment.values)}
+    if orphan_split:
+        splits.setdefault(orphan_split, {})
+    for entity_type, df in entity_dataframes.items():
+        split = _label_rows(entity_type, df, labels, orphan_split)
+        for name in splits:
+            splits[name][entity_type] = df[split.values == name].reset_index(drop=True)
+    return splits
+
+
+def write_split_csv(source_dir, output_dirs, suffixes=None, test_size=0.3, stratify_by=('country', 'department_mix'),
+                    seed=None, orphan_split='train', chunksize=100000):
+    """
+    Split the CSV tables of a dataset into train and test directories.
+    Only the key columns are loaded to build the organization index; the full tables are then
+    streamed once in chunks and every chunk is appended to the file of its split.
+    Args:
+        source_dir: Directory with <EntityType>.csv files
+        output_dirs: Dict split name ('train', 'test') -> output directory
+        suffixes: Optional dict split name -> file name suffix (e.g. {'test': '_s'})
+        test_size: Fraction of organizations that go to the test split
+        stratify_by: Strata for organization sampling, see organization_strata (empty for none)
+        seed: Optional seed for a reproducible split
+        orphan_split: Split for rows that no organization reaches (None drops them)
+        chunksize: Rows per chunk while streaming the tables
+    Returns:
+        Series organization identifier -> split name
+    """
+    suffixes = suffixes or {}
+    paths = {entity_type: os.path.join(source_dir, f'{entity_type}.csv') for entity_type in ENTITY_TYPES}
+    paths = {entity_type: path for entity_type, path in paths.items() if os.path.exists(path)}
+
+    keys = {entity_type: pd.read_csv(path, usecols=KEY_COLUMNS[entity_type]) for entity_type, path in paths.items()}
+    if 'Address' in keys and 'country' in stratify_by:
+        keys['Address'] = pd.read_csv(paths['Address'], usecols=['identifier', 'country'])
+    roots = organization_roots(keys)
+    strata = organization_strata(keys, stratify_by) if stratify_by else None
+    assignment = assign_organizations(keys[ROOT_ENTITY]['identifier'], strata, test_size, seed)
+    labels = split_labels(roots, assignment)
+
+    for directory in output_dirs.values():
+        os.makedirs(directory, exist_ok=True)
+    for entity_type, path in paths.items():
+        written = set()
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            split = _label_rows(entity_type, chunk, labels, orphan_split)
+            for name, directory in output_dirs.items():
+                rows = chunk[split.values == name]
+                target = os.path.join(directory, f'{entity_type}{suffixes.get(name, "")}.csv')
+                rows.to_csv(target, mode='a' if name in written else 'w', header=name not in written, index=False)
+                written.add(name)
+    return assignment
+
+
+def check_split_leakage(splits):
+    """
+    Count identifiers that end up in more than one split and references that cross splits
+    Args:
+        splits: Dict mapping split name to a dict of entity type -> DataFrame
+    Returns:
+        Dict with 'shared_identifiers' and 'cross_split_references' per entity type (or FK column)
+    """
+    shared = {}
+    for entity_type in ENTITY_TYPES:
+        seen = [set(tables[entity_type]['identifier']) for tables in splits.values() if entity_type in tables]
+        shared[entity_type] = sum(len(a & b) for i, a in enumerate(seen) for b in seen[i + 1:])
+    crossing = {}
+    for name, tables in splits.items():
+        other_ids = {}
+        for other, other_tables in splits.items():
+            if other != name:
+                for entity_type, df in other_tables.items():
+                    other_ids.setdefault(entity_type, set()).update(df['identifier'])
+        for entity_type, foreign_keys in FOREIGN_KEYS.items():
+            if entity_type not in tables:
+                continue
+            for column, target in foreign_keys.items():
+                if column in tables[entity_type].columns and target in other_ids:
+                    key = (entity_type, column)
+                    crossing[key] = crossing.get(key, 0) + int(tables[entity_type][column].isin(other_ids[target]).sum())
+    return {'shared_identifiers': shared, 'cross_split_references': crossing}
@@ -0,0 +1,155 @@
+import copy
+from collections.abc import MutableMapping
+from schema import FIELDS
+# Compact record classes for the six entity types and the duplicate registry.
+# Each class stores its fields in __slots__ instead of a per-row dict, but still behaves like
+# a dict with a fixed set of keys (record["identifier"], record.get(...), copy.deepcopy, csv.DictWriter),
+# so the generator and variation functions accept them unchanged.
+
+
+class Record(MutableMapping):
+    """Base class of the slotted records; subclasses only set __slots__"""
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        for field in self.__slots__:
+            setattr(self, field, None)
+        for field, value in dict(*args, **kwargs).items():
+            self[field] = value
+
+    def __getitem__(self, field):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {field!r}")
+        setattr(self, field, value)
+
+    def __delitem__(self, field):
+        raise TypeError(f"Fields of a {type(self).__name__} cannot be removed; set them to None instead")
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __contains__(self, field):
+        return field in self.__slots__
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_row() == other.to_row()
+        return dict(self.items()) == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{f}={getattr(self, f)!r}' for f in self.__slots__)})"
+
+    def __reduce__(self):
+        return (self.from_row, (self.to_row(),))
+
+    def copy(self):
+        return self.from_row(self.to_row())
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.from_row(copy.deepcopy(self.to_row(), memo))
+
+    def to_row(self):
+        """Values in field order, e.g. for csv.writer or building Arrow/NumPy columns"""
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_row(cls, row):
+        record = cls.__new__(cls)
+        for field, value in zip(cls.__slots__, row):
+            setattr(record, field, value)
+        return record
+
+
+def make_record_class(name, fields):
+    """Create a Record subclass with one slot per field"""
+    return type(name, (Record,), {"__slots__": tuple(fields), "__module__": __name__})
+
+
+Address = make_record_class('Address', FIELDS['Address'])
+ContactPoint = make_record_class('ContactPoint', FIELDS['ContactPoint'])
+HealthcareOrganization = make_record_class('HealthcareOrganization', FIELDS['HealthcareOrganization'])
+ServiceDepartment = make_record_class('ServiceDepartment', FIELDS['ServiceDepartment'])
+Person = make_record_class('Person', FIELDS['Person'])
+HealthcarePersonnel = make_record_class('HealthcarePersonnel', FIELDS['HealthcarePersonnel'])
+
+# One entry of variation_helpers.duplicate_registry (the original id is the registry key)
+DuplicateEntry = make_record_class('DuplicateEntry', [
+    'duplicate_id', 'entity_type', 'variation_type', 'field_name', 'original_value', 'varied_value'
+])
+
+RECORD_CLASSES = {
+    'Address': Address,
+    'ContactPoint': ContactPoint,
+    'HealthcareOrganization': HealthcareOrganization,
+    'ServiceDepartment': ServiceDepartment,
+    'Person': Person,
+    'HealthcarePersonnel': HealthcarePersonnel
+}
+
+
+def columns_to_records(entity_type, columns):
+    """
+    Build records from a dictionary of column arrays
+    Args:
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        columns: Dictionary mapping field names to equally long sequences (lists or NumPy arrays)
+    Returns:
+        List of records
+    """
+    record_class = RECORD_CLASSES[entity_type]
+    values = [columns[field] for field in record_class.__slots__]
+    values = [v.tolist() if hasattr(v, "tolist") else v for v in values]
+    return [record_class.from_row(row) for row in zip(*values)]
+
+
+def records_to_columns(records, fields=None):
+    """
+    Turn records (or dicts) into a dictionary of column lists, ready for pd.DataFrame or pyarrow.table
+    Args:
+        records: List of records of one entity type
+        fields: Field order (defaults to the fields of the first record)
+    Returns:
+        Dictionary mapping field names to lists
+    """
+    if fields is None:
+        fields = list(records[0]) if records else []
+    if records and isinstance(records[0], Record) and tuple(fields) == records[0].__slots__:
+        return dict(zip(fields, (list(column) for column in zip(*(r.to_row() for r in records)))))
+    return {field: [r.get(field) for r in records] for field in fields}
+
+
+def records_to_frame(records, fields=None):
+    """
+    Build a DataFrame from records with the columns in field order
+    (pd.DataFrame(records) also works but sorts the columns alphabetically for non-dict rows)
+    """
+    import pandas as pd
+    return pd.DataFrame(records_to_columns(records, fields))
+
+
+def frame_to_records(entity_type, df):
+    """
+    Build records from the rows of a DataFrame (missing values become None)
+    Args:
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        df: DataFrame with the entity's columns (extra columns are ignored)
+    Returns:
+        List of records
+    """
+    fields = list(RECORD_CLASSES[entity_type].__slots__)
+    df = df.reindex(columns=fields).astype(object)
+    return columns_to_records(entity_type, df.where(df.notna(), None).to_dict('list'))
@@ -0,0 +1,239 @@
+import os
+import re
+import sys
+import glob
+import numpy as np
+import pandas as pd
+import instrumentation
+from golden_index import ClusterIndex
+# Scores deduplication results against the golden standards.
+# Predictions are candidate pairs (id_a, id_b with an optional match label or score) or clusters
+# (identifier, cluster). Every unordered pair is reduced to one 64-bit key built from the hashed
+# identifiers, so predicted and true pairs are matched with hash joins on integer arrays, and
+# prediction files are streamed in chunks. The true pairs are all pairs of each duplicate cluster
+# (see golden_index.py), so duplicates of the same original also count as matches of each other.
+# Clusters are built per golden standard file, as the files of different datasets reuse the same originals.
+#   python evaluation.py predictions.csv golden_standard.csv [more golden standards ...]
+
+GOLDEN_COLUMNS = ['original_id', 'duplicate_id', 'entity_type', 'variation_type']
+PAIR_ID_COLUMNS = [('id_a', 'id_b'), ('original_id', 'duplicate_id'), ('left_id', 'right_id')]
+NOISE_LEVELS = ('low', 'medium', 'high')
+
+_key_multiplier = np.uint64(0x9E3779B97F4A7C15)
+
+
+def pair_keys(a, b):
+    """
+    One 64-bit key per unordered identifier pair (the same for (a, b) and (b, a))
+    Args:
+        a, b: Equally long arrays of identifiers
+    Returns:
+        NumPy uint64 array
+    """
+    hash_a = pd.util.hash_array(np.asarray(a, dtype=object))
+    hash_b = pd.util.hash_array(np.asarray(b, dtype=object))
+    with np.errstate(over="ignore"):
+        return np.minimum(hash_a, hash_b) * _key_multiplier ^ np.maximum(hash_a, hash_b)
+
+
+def noise_level(path):
+    """Noise level in a golden standard file name (e.g. test_golden_standard_struct_high.csv), '' if none"""
+    match = re.search(r"_(%s)(?:_|\.|$)" % "|".join(NOISE_LEVELS), os.path.basename(path))
+    return match.group(1) if match else ''
+
+
+def read_golden(golden):
+    """
+    Read golden standards with their noise level
+    Args:
+        golden: Path or glob pattern, list of them, DataFrame, or dict noise level -> any of these
+            (without a dict the noise level is taken from the file name)
+    Returns:
+        DataFrame with original_id, duplicate_id, entity_type, variation_type, noise and source
+        (the file path, or the position of a DataFrame)
+    """
+    if isinstance(golden, dict):
+        frames = [read_golden(sources).assign(noise=noise) for noise, sources in golden.items()]
+        frames = [frame.assign(source=f"{noise}:" + frame['source']) for noise, frame in zip(golden, frames)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=GOLDEN_COLUMNS + ['noise', 'source'])
+    if isinstance(golden, (str, pd.DataFrame)):
+        golden = [golden]
+    frames = []
+    for position, source in enumerate(golden):
+        if isinstance(source, pd.DataFrame):
+            frames.append(source.reindex(columns=GOLDEN_COLUMNS).assign(noise='', source=str(position)))
+            continue
+        for path in sorted(glob.glob(source)) or [source]:
+            frame = pd.read_csv(path, usecols=lambda c: c in GOLDEN_COLUMNS).reindex(columns=GOLDEN_COLUMNS)
+            frames.append(frame.assign(noise=noise_level(path), source=path))
+    if not frames:
+        return pd.DataFrame(columns=GOLDEN_COLUMNS + ['noise', 'source'])
+    rows = pd.concat(frames, ignore_index=True)
+    return rows[rows['original_id'].notna() & rows['duplicate_id'].notna()]
+
+
+def _pair_columns(columns):
+    for pair in PAIR_ID_COLUMNS:
+        if set(pair) <= set(columns):
+            return pair
+    return tuple(columns[:2])
+
+
+def _normalise_pairs(chunk, threshold):
+    # id_a, id_b, match (and entity_type if given) for a chunk of predicted pairs
+    id_a, id_b = _pair_columns(list(chunk.columns))
+    pairs = pd.DataFrame({'id_a': chunk[id_a].values, 'id_b': chunk[id_b].values})
+    if 'match' in chunk.columns or 'label' in chunk.columns:
+        pairs['match'] = chunk['match' if 'match' in chunk.columns else 'label'].astype(bool).values
+    elif 'score' in chunk.columns and threshold is not None:
+        pairs['match'] = (chunk['score'] >= threshold).values
+    else:
+        pairs['match'] = True
+    if 'entity_type' in chunk.columns:
+        pairs['entity_type'] = chunk['entity_type'].values
+    return pairs[pairs['id_a'].notna() & pairs['id_b'].notna() & (pairs['id_a'] != pairs['id_b'])]
+
+
+def cluster_pairs(clusters):
+    """Expand predicted clusters (identifier, cluster) into id_a, id_b pairs"""
+    codes, _ = pd.factorize(clusters['cluster'])
+    keep = codes >= 0
+    entity_types = clusters['entity_type'].values[keep] if 'entity_type' in clusters.columns else np.full(keep.sum(), None)
+    pairs = ClusterIndex(clusters['identifier'].values[keep], codes[keep], entity_types).positive_pairs()
+    pairs = pairs.drop(columns='cluster').assign(match=True)
+    return pairs if 'entity_type' in clusters.columns else pairs.drop(columns='entity_type')
+
+
+def iter_predictions(predictions, chunksize=1000000, threshold=None):
+    """
+    Stream predictions as chunks of id_a, id_b, match (and entity_type when given)
+    Args:
+        predictions: CSV path or DataFrame of pairs (id_a/id_b, original_id/duplicate_id or the first two
+            columns, optional match/label or score column) or of clusters (identifier and cluster columns)
+        chunksize: Rows per chunk when reading a CSV file
+        threshold: Score from which a scored pair counts as a match (without it every pair is a match)
+    """
+    if isinstance(predictions, pd.DataFrame):
+        chunks = [predictions]
+    else:
+        columns = pd.read_csv(predictions, nrows=0).columns
+        if {'identifier', 'cluster'} <= set(columns):
+            chunks = [pd.read_csv(predictions)]
+        else:
+            chunks = pd.read_csv(predictions, chunksize=chunksize)
+    for chunk in chunks:
+        if {'identifier', 'cluster'} <= set(chunk.columns):
+            yield cluster_pairs(chunk)
+        else:
+            yield _normalise_pairs(chunk, threshold)
+
+
+def true_pairs(rows):
+    """
+    All true pairs of golden standard rows, clustered per source so that datasets do not join each other
+    Returns:
+        DataFrame with id_a, id_b, entity_type and key, one row per unordered pair
+    """
+    frames = [ClusterIndex.from_pairs(group).positive_pairs() for _, group in rows.groupby('source', sort=False)]
+    if not frames:
+        return pd.DataFrame({'id_a': [], 'id_b': [], 'entity_type': [], 'key': np.array([], dtype=np.uint64)})
+    truth = pd.concat(frames, ignore_index=True).drop(columns='cluster')
+    truth['key'] = pair_keys(truth['id_a'], truth['id_b'])
+    return truth.drop_duplicates('key', ignore_index=True)
+
+
+def _unique_keys(chunks):
+    # pd.unique uses a hash table, which is much faster than sorting for millions of keys
+    return pd.unique(np.concatenate(chunks)) if chunks else np.array([], dtype=np.uint64)
+
+
+def _hash_isin(keys, other):
+    return pd.Series(keys, dtype=np.uint64).isin(pd.Series(other, dtype=np.uint64)).to_numpy()
+
+
+def _ratio(numerator, denominator):
+    return float(numerator) / denominator if denominator else 0.0
+
+
+def _f1(precision, recall):
+    return 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+
+def evaluate(predictions, golden, threshold=None, chunksize=1000000):
+    """
+    Score predicted pairs or clusters against golden standards
+    Args:
+        predictions: See iter_predictions
+        golden: See read_golden
+        threshold: Score threshold for scored pairs
+        chunksize: Rows per chunk when streaming a prediction file
+    Returns:
+        Dict with 'overall' metrics (precision, recall, f1, pair_completeness and counts), a 'breakdown'
+        DataFrame of recall and pair completeness per noise, entity_type and variation_type, and
+        'precision_by_entity_type' when the predictions carry an entity_type column
+    """
+    with instrumentation.stage("evaluate_golden"):
+        rows = read_golden(golden)
+        truth = true_pairs(rows)
+        truth_keys = truth['key'].to_numpy(dtype=np.uint64)
+
+    with instrumentation.stage("evaluate_predictions"):
+        candidate_keys, match_keys, typed = [], [], []
+        for chunk in iter_predictions(predictions, chunksize, threshold):
+            keys = pair_keys(chunk['id_a'], chunk['id_b'])
+            candidate_keys.append(keys)
+            match_keys.append(keys[chunk['match'].values])
+            if 'entity_type' in chunk.columns:
+                typed.append(pd.DataFrame({'entity_type': chunk['entity_type'].values, 'key': keys})[chunk['match'].values])
+        candidate_keys = _unique_keys(candidate_keys)
+        match_keys = _unique_keys(match_keys)
+
+    found = _hash_isin(truth_keys, match_keys)
+    found_candidate = _hash_isin(truth_keys, candidate_keys)
+    true_positives = int(found.sum())
+    precision, recall = _ratio(true_positives, len(match_keys)), _ratio(true_positives, len(truth_keys))
+    overall = {
+        'precision': precision,
+        'recall': recall,
+        'f1': _f1(precision, recall),
+        'pair_completeness': _ratio(found_candidate.sum(), len(truth_keys)),
+        'true_positives': true_positives,
+        'predicted_matches': len(match_keys),
+        'candidate_pairs': len(candidate_keys),
+        'true_pairs': len(truth_keys)
+    }
+
+    # Attributes of the true pairs: golden rows give noise, entity_type and variation_type;
+    # pairs that are only implied by a cluster (two duplicates of one original) are 'transitive'
+    attributes = pd.DataFrame({
+        'key': pair_keys(rows['original_id'], rows['duplicate_id']),
+        'noise': rows['noise'].values, 'entity_type': rows['entity_type'].values, 'variation_type': rows['variation_type'].values
+    }).drop_duplicates()
+    truth_flags = pd.DataFrame({'key': truth_keys, 'found': found, 'found_candidate': found_candidate})
+    transitive = truth_flags[~truth_flags['key'].isin(attributes['key'])]
+    transitive = transitive.assign(noise='', entity_type=truth['entity_type'].values[transitive.index], variation_type='transitive')
+    labelled = pd.concat([attributes.merge(truth_flags, on='key'), transitive], ignore_index=True)
+    group_columns = ['noise', 'entity_type', 'variation_type']
+    breakdown = labelled.fillna({'entity_type': '', 'variation_type': ''}).groupby(group_columns).agg(
+        true_pairs=('key', 'size'), found=('found', 'sum'), found_candidate=('found_candidate', 'sum')).reset_index()
+    breakdown['recall'] = breakdown['found'] / breakdown['true_pairs']
+    breakdown['pair_completeness'] = breakdown['found_candidate'] / breakdown['true_pairs']
+    result = {'overall': overall, 'breakdown': breakdown}
+
+    if typed:
+        typed = pd.concat(typed, ignore_index=True).drop_duplicates()
+        typed['true_positive'] = _hash_isin(typed['key'].values, truth_keys)
+        by_type = typed.groupby('entity_type').agg(predicted_matches=('key', 'size'), true_positives=('true_positive', 'sum'))
+        by_type['precision'] = by_type['true_positives'] / by_type['predicted_matches']
+        result['precision_by_entity_type'] = by_type.reset_index()
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python evaluation.py predictions.csv golden_standard.csv [more golden standards ...]")
+        sys.exit(1)
+    result = evaluate(sys.argv[1], sys.argv[2:])
+    for name, value in result['overall'].items():
+        print(f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}")
+    print(result['breakdown'].to_string(index=False))
@@ -0,0 +1,191 @@
+import os
+import sys
+import glob
+import numpy as np
+import pandas as pd
+# Duplicate-cluster index over the golden standards.
+# The golden standard files are lists of (original_id, duplicate_id) pairs; one original can have
+# several duplicates and the struct/relation/syntactic datasets add further layers on the same originals.
+# ClusterIndex joins all pairs with a vectorised union-find pass and stores one compact integer
+# cluster id per identifier, so "are X and Y the same entity?" is a dictionary lookup and the
+# clusters and the full set of positive pairs come straight from the arrays.
+
+PAIR_COLUMNS = ['original_id', 'duplicate_id', 'entity_type']
+
+
+def read_pairs(sources):
+    """
+    Read the identifier pairs of golden standard files or DataFrames
+    Args:
+        sources: Paths, glob patterns or DataFrames with original_id and duplicate_id columns
+    Returns:
+        DataFrame with original_id, duplicate_id and entity_type
+    """
+    frames = []
+    for source in sources:
+        if isinstance(source, pd.DataFrame):
+            frames.append(source.reindex(columns=PAIR_COLUMNS))
+            continue
+        for path in sorted(glob.glob(source)) or [source]:
+            frames.append(pd.read_csv(path, usecols=lambda c: c in PAIR_COLUMNS).reindex(columns=PAIR_COLUMNS))
+    if not frames:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    pairs = pd.concat(frames, ignore_index=True)
+    return pairs[pairs['original_id'].notna() & pairs['duplicate_id'].notna()]
+
+
+def union_find(n, left, right):
+    """
+    Connected components of n nodes joined by edges (left[i], right[i]).
+    Each round hooks the larger root of every edge onto the smaller one (np.minimum.at)
+    and compresses paths by pointer jumping, until no edge joins two different roots.
+    Returns:
+        Array with the smallest node of its component for every node
+    """
+    parent = np.arange(n)
+    left, right = np.asarray(left), np.asarray(right)
+    while True:
+        # Path compression: point every node at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        root_left, root_right = parent[left], parent[right]
+        joined = root_left != root_right
+        if not joined.any():
+            return parent
+        low = np.minimum(root_left[joined], root_right[joined])
+        high = np.maximum(root_left[joined], root_right[joined])
+        np.minimum.at(parent, high, low)
+        left, right = left[joined], right[joined]
+
+
+class ClusterIndex:
+    """
+    Identifier -> duplicate cluster index
+    Attributes:
+        ids: NumPy array of all identifiers in the golden standards
+        clusters: Compact cluster id (0 .. n_clusters - 1) per identifier
+        entity_types: Entity type per identifier
+    """
+
+    def __init__(self, ids, clusters, entity_types):
+        self.ids = np.asarray(ids, dtype=object)
+        self.clusters = np.asarray(clusters, dtype=np.int32)
+        self.entity_types = np.asarray(entity_types, dtype=object)
+        self.positions = dict(zip(self.ids.tolist(), range(len(self.ids))))
+        self.index = pd.Index(self.ids)
+        self.n_clusters = int(self.clusters.max()) + 1 if len(self.clusters) else 0
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Build the index from a DataFrame of original_id/duplicate_id(/entity_type) pairs"""
+        codes, ids = pd.factorize(pd.concat([pairs['original_id'], pairs['duplicate_id']], ignore_index=True))
+        n_pairs = len(pairs)
+        roots = union_find(len(ids), codes[:n_pairs], codes[n_pairs:])
+        _, clusters = np.unique(roots, return_inverse=True)
+        entity_types = pd.Series(np.tile(pairs['entity_type'].to_numpy(dtype=object), 2)).groupby(codes).first()
+        return cls(ids, clusters, entity_types.reindex(range(len(ids))).to_numpy(dtype=object))
+
+    @classmethod
+    def from_golden(cls, sources):
+        """Build the index from golden standard files (paths or glob patterns) or DataFrames"""
+        return cls.from_pairs(read_pairs(sources))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, identifier):
+        return identifier in self.positions
+
+    def cluster_of(self, identifier):
+        """Cluster id of an identifier (None if it is in no golden standard)"""
+        position = self.positions.get(identifier)
+        return None if position is None else int(self.clusters[position])
+
+    def same_entity(self, a, b):
+        """True if two identifiers are the same entity according to the golden standards"""
+        if a == b:
+            return True
+        position_a, position_b = self.positions.get(a), self.positions.get(b)
+        return position_a is not None and position_b is not None and self.clusters[position_a] == self.clusters[position_b]
+
+    def cluster_ids(self, identifiers):
+        """Cluster id per identifier for a whole array at once (-1 for unknown identifiers)"""
+        positions = self.index.get_indexer(np.asarray(identifiers, dtype=object))
+        return np.where(positions >= 0, self.clusters[positions], -1)
+
+    def same_entity_many(self, a, b):
+        """Vectorised same_entity for two equally long arrays of identifiers"""
+        a, b = np.asarray(a, dtype=object), np.asarray(b, dtype=object)
+        cluster_a, cluster_b = self.cluster_ids(a), self.cluster_ids(b)
+        return (a == b) | ((cluster_a >= 0) & (cluster_a == cluster_b))
+
+    def members(self, identifier):
+        """All identifiers in the cluster of an identifier"""
+        cluster = self.cluster_of(identifier)
+        return [] if cluster is None else self.ids[self.clusters == cluster].tolist()
+
+    def _order(self):
+        order = np.argsort(self.clusters, kind="stable")
+        sizes = np.bincount(self.clusters, minlength=self.n_clusters)
+        return order, sizes
+
+    def iter_clusters(self):
+        """Yield the identifiers of every cluster as a NumPy array"""
+        if not len(self.ids):
+            return
+        order, sizes = self._order()
+        yield from np.split(self.ids[order], np.cumsum(sizes)[:-1])
+
+    def cluster_frame(self):
+        """DataFrame with identifier, cluster and entity_type per identifier"""
+        return pd.DataFrame({'identifier': self.ids, 'cluster': self.clusters, 'entity_type': self.entity_types})
+
+    def positive_pairs(self):
+        """
+        Every unordered pair of identifiers in the same cluster, built with array arithmetic
+        Returns:
+            DataFrame with id_a, id_b, cluster and entity_type
+        """
+        order, sizes = self._order()
+        starts = np.cumsum(sizes) - sizes
+        cluster = self.clusters[order]
+        rank = np.arange(len(order)) - starts[cluster]
+        # Element at rank r pairs with the (size - 1 - r) elements after it in its cluster
+        counts = sizes[cluster] - 1 - rank
+        first = np.repeat(np.arange(len(order)), counts)
+        offsets = np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+        second = first + offsets
+        return pd.DataFrame({
+            'id_a': self.ids[order][first],
+            'id_b': self.ids[order][second],
+            'cluster': cluster[first],
+            'entity_type': self.entity_types[order][first]
+        })
+
+    def save(self, path):
+        """Store the index as a compressed .npz file"""
+        np.savez_compressed(path, ids=self.ids.astype(str), clusters=self.clusters,
+                            entity_types=pd.Series(self.entity_types).fillna('').to_numpy(dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save"""
+        with np.load(path) as data:
+            entity_types = data['entity_types'].astype(object)
+            entity_types[entity_types == ''] = None
+            return cls(data['ids'].astype(object), data['clusters'], entity_types)
+
+
+if __name__ == "__main__":
+    # python golden_index.py index.npz [golden standard files or patterns ...]
+    here = os.path.dirname(os.path.abspath(__file__))
+    sources = sys.argv[2:] or [os.path.join(here, "ground_truths", "*.csv"),
+                               os.path.join(here, "src", "Data_Source", "golden_standard_duplicates.csv")]
+    index = ClusterIndex.from_golden(sources)
+    index.save(sys.argv[1] if len(sys.argv) > 1 else "golden_index.npz")
+    sizes = np.bincount(index.clusters)
+    print(f"{len(index)} identifiers in {index.n_clusters} clusters (largest {sizes.max() if len(sizes) else 0}), "
+          f"{int((sizes * (sizes - 1) // 2).sum())} positive pairs")
@@ -0,0 +1,183 @@
+import sys
+import numpy as np
+import pandas as pd
+import instrumentation
+import tables
+from blocking import BLOCKING_FIELDS, normalise_keys
+from golden_index import ClusterIndex
+# Hard negatives: pairs of distinct entities that look alike (two organizations in the same city,
+# two persons with the same surname in the same department, ...), so that benchmark precision is
+# measured on near misses rather than on random non-duplicates.
+# Every negative type is a key per record; records are grouped on the key with a hash index
+# (pd.factorize) and each record is paired with random other members of its group, so mining
+# takes linear time in the number of records however large the groups are.
+# A negative pairs the original record of one entity with the variant record of the other
+# (found through the variant's anchor column), like the golden standard pairs it is mixed with.
+#   python hard_negatives.py original_dir [variant_dir] [golden_standard.csv] [output.csv]
+
+NEGATIVE_COLUMNS = ['id_a', 'id_b', 'entity_type', 'negative_type', 'similarity']
+
+# Name tokens that occur in more than this share of the names are too common to make a near miss
+COMMON_TOKEN_SHARE = 0.01
+
+
+def _tokens(names):
+    # One row per (record position, lower-cased name token of at least three characters)
+    tokens = names.fillna('').str.lower().str.findall(r"\w{3,}").explode()
+    return tokens.dropna()
+
+
+def rare_token(names):
+    """Least frequent name token of every name (NaN if the name has no uncommon token)"""
+    tokens = _tokens(names.reset_index(drop=True))
+    frequency = tokens.map(tokens.value_counts())
+    keep = (frequency <= max(COMMON_TOKEN_SHARE * len(names), 2)).to_numpy()
+    ranked = pd.DataFrame({'row': tokens.index[keep], 'token': tokens.to_numpy()[keep], 'frequency': frequency.to_numpy()[keep]})
+    rarest = ranked.sort_values(['frequency', 'token'], kind='stable').drop_duplicates('row')
+    return pd.Series(rarest['token'].to_numpy(), index=rarest['row'].to_numpy()).reindex(range(len(names))).set_axis(names.index)
+
+
+def _combine(*keys):
+    # Composite key; missing if any part is missing
+    combined = keys[0].astype(object).where(keys[0].notna())
+    for key in keys[1:]:
+        combined = combined.where(key.notna()) + '\x1f' + key.astype(str)
+    return combined
+
+
+def _lookup(df, key_column, target, column):
+    # Value of target[column] for the id in df[key_column]
+    values = target.drop_duplicates('identifier').set_index('identifier')[column]
+    return df[key_column].map(values)
+
+
+def negative_keys(split_tables):
+    """
+    Grouping keys of every negative type
+    Args:
+        split_tables: Dict mapping entity type to the original tables
+    Returns:
+        Dict mapping entity type to a dict of negative type -> key Series aligned with the table
+    """
+    keys = {}
+    address = split_tables.get('Address')
+    if address is not None:
+        keys['Address'] = {'same_city': address['city'], 'same_postal_code': address['postalCode']}
+    organization = split_tables.get('HealthcareOrganization')
+    if organization is not None:
+        keys['HealthcareOrganization'] = {'same_name_token': rare_token(organization['healthcareOrganizationName'])}
+        if address is not None:
+            keys['HealthcareOrganization']['same_city'] = _lookup(organization, 'address', address, 'city')
+    department = split_tables.get('ServiceDepartment')
+    if department is not None:
+        keys['ServiceDepartment'] = {'same_name': department['serviceDepartmentName']}
+        if address is not None:
+            city = _lookup(department, 'address', address, 'city')
+            keys['ServiceDepartment']['same_city'] = _combine(city, department['serviceDepartmentName'].str[:1])
+    contact_point = split_tables.get('ContactPoint')
+    if contact_point is not None:
+        keys['ContactPoint'] = {'same_email_name': contact_point['email'].str.split('@').str[0]}
+    person, personnel = split_tables.get('Person'), split_tables.get('HealthcarePersonnel')
+    if person is not None:
+        surname = person['personName'].str.rsplit(n=1).str[-1]
+        keys['Person'] = {'same_surname_birth_year': _combine(surname, person['birthDate'].astype(str).str[:4])}
+        if personnel is not None:
+            department_of = _lookup(person, 'identifier', personnel, 'department')
+            keys['Person']['same_surname_department'] = _combine(surname, department_of)
+    if personnel is not None:
+        keys['HealthcarePersonnel'] = {'same_department_job_title': _combine(personnel['department'], personnel['jobTitle'])}
+        if person is not None:
+            surnames = pd.Series(surname.to_numpy(), index=person['identifier'].to_numpy())
+            surname_of = personnel['identifier'].map(surnames[~surnames.index.duplicated()])
+            keys['HealthcarePersonnel']['same_surname_institution'] = _combine(surname_of, personnel['institution'])
+    return keys
+
+
+def sample_group_pairs(key, per_record, rng):
+    """
+    Pair records with random other records of the same key value
+    Args:
+        key: Key Series (missing values are not grouped)
+        per_record: Partners drawn per record
+        rng: NumPy Generator
+    Returns:
+        Tuple of row position arrays (never a record with itself)
+    """
+    codes, _ = pd.factorize(key)
+    rows = np.flatnonzero(codes >= 0)
+    codes = codes[rows]
+    # Counting sort on the group codes: every group becomes one contiguous run of the sorted rows
+    order = np.argsort(codes, kind='stable')
+    rows, codes = rows[order], codes[order]
+    sizes = np.bincount(codes)
+    starts = np.cumsum(sizes) - sizes
+    members = np.flatnonzero(sizes[codes] > 1)
+    size, start = sizes[codes[members]], starts[codes[members]]
+    positions = members - start
+    first, second = [], []
+    for _ in range(per_record):
+        offsets = rng.integers(1, size) if len(size) else size
+        first.append(rows[members])
+        second.append(rows[start + (positions + offsets) % size])
+    if not first:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(first), np.concatenate(second)
+
+
+def mine_negatives(split_tables, variant=None, golden=None, per_record=1, seed=0, min_similarity=0.0):
+    """
+    Sample hard negative pairs for every entity type
+    Args:
+        split_tables: Dict mapping entity type to the original tables
+        variant: Dict of variant tables; id_b becomes the variant record of the second entity (through
+            its anchor column), otherwise both ids are original identifiers
+        golden: Golden standard DataFrame(s) whose duplicate clusters are never paired as negatives
+        per_record: Partners drawn per record and negative type
+        seed: Seed of the partner draws
+        min_similarity: Drop negatives whose key fields are less similar (Jaro-Winkler, 0..1)
+    Returns:
+        DataFrame with id_a, id_b, entity_type, negative_type and similarity
+    """
+    from pair_features import similarity_features
+    rng = np.random.default_rng(seed)
+    index = ClusterIndex.from_pairs(golden) if golden is not None and len(golden) else None
+    frames = []
+    for entity_type, type_keys in negative_keys(split_tables).items():
+        df = split_tables[entity_type]
+        with instrumentation.stage("hard_negatives", records=len(df) * len(type_keys), entity_type=entity_type):
+            identifiers = df['identifier'].to_numpy(dtype=object)
+            pairs = [sample_group_pairs(key, per_record, rng) for key in type_keys.values()]
+            first = np.concatenate([pair[0] for pair in pairs])
+            second = np.concatenate([pair[1] for pair in pairs])
+            negative_types = np.repeat(list(type_keys), [len(pair[0]) for pair in pairs])
+            # One row per unordered pair (the first negative type that drew it)
+            codes = np.minimum(first, second).astype(np.int64) * len(df) + np.maximum(first, second)
+            keep = ~pd.Series(codes).duplicated().to_numpy()
+            negatives = pd.DataFrame({'id_a': identifiers[first[keep]], 'id_b': identifiers[second[keep]],
+                                      'entity_type': entity_type, 'negative_type': negative_types[keep]})
+            if index is not None:
+                negatives = negatives[~index.same_entity_many(negatives['id_a'], negatives['id_b'])]
+            keys = normalise_keys(df, BLOCKING_FIELDS[entity_type]).to_numpy(dtype=object)
+            positions = pd.Index(identifiers).get_indexer
+            negatives['similarity'] = similarity_features(keys[positions(negatives['id_a'])], keys[positions(negatives['id_b'])],
+                                                          metrics=('jaro_winkler',))['jaro_winkler'].to_numpy()
+            negatives = negatives[negatives['similarity'] >= min_similarity]
+            if variant is not None and entity_type in variant and 'anchor' in variant[entity_type].columns:
+                variant_ids = variant[entity_type].drop_duplicates('anchor').set_index('anchor')['identifier']
+                negatives['id_b'] = negatives['id_b'].map(variant_ids).fillna(negatives['id_b'])
+            frames.append(negatives)
+    if not frames:
+        return pd.DataFrame(columns=NEGATIVE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[NEGATIVE_COLUMNS]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python hard_negatives.py original_dir [variant_dir] [golden_standard.csv] [output.csv]")
+        sys.exit(1)
+    original_tables = tables.read_tables(sys.argv[1])
+    variant_tables = tables.read_tables(sys.argv[2]) if len(sys.argv) > 2 else None
+    golden_pairs = pd.read_csv(sys.argv[3]) if len(sys.argv) > 3 else None
+    negatives = mine_negatives(original_tables, variant_tables, golden_pairs)
+    negatives.to_csv(sys.argv[4] if len(sys.argv) > 4 else "negatives.csv", index=False)
+    print(negatives.groupby(['entity_type', 'negative_type'])['similarity'].agg(['size', 'mean']).to_string())
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from schema import ENTITY_TYPES, FOREIGN_KEYS, identifier_owner
+# Functions for giving a copy of the master data fresh identifiers while keeping every relation intact
+
+
+def mint_identifiers(n, seed=None):
+    """
+    Mint n random version 4 UUID strings in one vectorised step
+    Args:
+        n: Number of identifiers to create
+        seed: Optional seed for reproducible identifiers
+    Returns:
+        NumPy array of UUID strings
+    """
+    rng = np.random.default_rng(seed)
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    # Each byte becomes two ASCII hex digits through a 256 entry lookup table
+    digits = _hex_pairs[raw].view(np.uint8).reshape(n, 32)
+    chars = np.full((n, 36), ord("-"), dtype=np.uint8)
+    for start, stop, offset in _hex_groups:
+        chars[:, start:stop] = digits[:, offset:offset + stop - start]
+    return chars.astype(np.uint32).view("U36").ravel()
+
+
+_hex_pairs = np.array([f"{i:02x}" for i in range(256)], dtype="S2").view(np.uint16)
+# (first char, end char, first hex digit) of the five dash separated groups
+_hex_groups = [(0, 8, 0), (9, 13, 8), (14, 18, 12), (19, 23, 16), (24, 36, 20)]
+
+
+def remap_identifiers(entity_dataframes, anchor_column="anchor", seed=None, known_ids=None):
+    """
+    Give every entity a new identifier and rewrite all foreign keys to match.
+    Identifiers are minted in bulk for each table that owns its identifiers, and every
+    reference column from schema.FOREIGN_KEYS is rewritten with a single hash join.
+    The original identifier is kept in anchor_column so duplicates can be traced back.
+    Args:
+        entity_dataframes: Dict mapping entity type to DataFrame
+        anchor_column: Column that keeps the original identifier (existing values are kept)
+        seed: Optional seed for reproducible identifiers
+        known_ids: Optional dict of entity type -> Series old id -> new id; these identifiers are used
+            instead of minted ones (identifiers are still minted for all rows, so a seed gives the same
+            identifiers to the other rows)
+    Returns:
+        Tuple of (dict of remapped DataFrame copies, dict of entity type -> Series old id -> new id)
+    """
+    rng = np.random.default_rng(seed)
+    id_maps = {}
+    for entity_type in ENTITY_TYPES:
+        if entity_type not in entity_dataframes or identifier_owner(entity_type) != entity_type:
+            continue
+        old_ids = pd.unique(entity_dataframes[entity_type]["identifier"].dropna())
+        new_ids = mint_identifiers(len(old_ids), seed=rng.integers(2**63))
+        id_maps[entity_type] = pd.Series(new_ids, index=old_ids)
+        if known_ids and entity_type in known_ids:
+            known = known_ids[entity_type]
+            id_maps[entity_type] = known[~known.index.duplicated()].reindex(old_ids).fillna(id_maps[entity_type])
+    for entity_type in entity_dataframes:
+        owner = identifier_owner(entity_type)
+        if owner != entity_type and owner in id_maps:
+            id_maps[entity_type] = id_maps[owner]
+
+    remapped = {}
+    for entity_type, df in entity_dataframes.items():
+        df = df.copy()
+        if anchor_column and anchor_column not in df.columns:
+            df[anchor_column] = df["identifier"]
+        if entity_type in id_maps:
+            df["identifier"] = _rewrite(df["identifier"], id_maps[entity_type])
+        for column, target in FOREIGN_KEYS.get(entity_type, {}).items():
+            if column != "identifier" and column in df.columns and target in id_maps:
+                df[column] = _rewrite(df[column], id_maps[target])
+        remapped[entity_type] = df
+    return remapped, id_maps
+
+
+def _rewrite(column, id_map):
+    # References that are missing from the map (or empty) are left as they are
+    return column.map(id_map).fillna(column)
+
+
+def remap_golden_standard(golden_df, id_maps):
+    """
+    Point the duplicate_id of each golden standard row at the remapped identifier of its original
+    Args:
+        golden_df: DataFrame with original_id, duplicate_id and entity_type columns
+        id_maps: Identifier maps returned by remap_identifiers
+    Returns:
+        Updated copy of golden_df
+    """
+    golden_df = golden_df.copy()
+    for entity_type, id_map in id_maps.items():
+        mask = golden_df["entity_type"] == entity_type
+        golden_df.loc[mask, "duplicate_id"] = golden_df.loc[mask, "original_id"].map(id_map).fillna(golden_df.loc[mask, "duplicate_id"])
+    return golden_df
+
+
+def check_referential_integrity(entity_dataframes):
+    """
+    Count references that point at identifiers which do not exist
+    Args:
+        entity_dataframes: Dict mapping entity type to DataFrame
+    Returns:
+        Dict mapping (entity type, column) to the number of dangling references
+    """
+    dangling = {}
+    for entity_type, foreign_keys in FOREIGN_KEYS.items():
+        if entity_type not in entity_dataframes:
+            continue
+        df = entity_dataframes[entity_type]
+        for column, target in foreign_keys.items():
+            if column not in df.columns or target not in entity_dataframes:
+                continue
+            references = df[column].dropna()
+            missing = ~references.isin(entity_dataframes[target]["identifier"])
+            dangling[(entity_type, column)] = int(missing.sum())
+    return dangling
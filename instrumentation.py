@@ -0,0 +1,196 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Optional timers, counters and per-stage profiler dumps for the generator,
+# variator and KG converter. Everything is a no-op unless enabled, either by
+# calling enable() or by setting MDG_PROFILE=1 in the environment.
+#   MDG_PROFILER     = "cprofile" or "pyinstrument" to dump a profile per stage
+#   MDG_PROFILE_DIR  = directory for profile dumps and the JSON summary
+
+enabled = os.environ.get("MDG_PROFILE", "") not in ("", "0")
+profiler_backend = os.environ.get("MDG_PROFILER") or None
+output_dir = os.environ.get("MDG_PROFILE_DIR", "profiles")
+
+# (stage, entity_type, variation_type) -> [calls, records, seconds]
+stage_stats = {}
+
+# Only the outermost stage is profiled; cProfile cannot be nested
+_active_profiler = None
+
+
+def enable(profiler=None, directory=None):
+    """
+    Turn instrumentation on.
+    Args:
+        profiler: None for timers only, "cprofile" or "pyinstrument" to also dump a profile per stage
+        directory: Where profile dumps and the JSON summary are written
+    """
+    global enabled, profiler_backend, output_dir
+    if profiler not in (None, "cprofile", "pyinstrument"):
+        raise ValueError(f"Unknown profiler: {profiler}")
+    enabled = True
+    profiler_backend = profiler
+    if directory:
+        output_dir = directory
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Forget all collected timings"""
+    stage_stats.clear()
+
+
+def record(stage_name, seconds, records=1, entity_type=None, variation_type=None):
+    """Add one timing sample to the stats table"""
+    key = (stage_name, entity_type, variation_type)
+    entry = stage_stats.get(key)
+    if entry is None:
+        stage_stats[key] = [1, records, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += records
+        entry[2] += seconds
+
+
+def count(stage_name, records=1, entity_type=None, variation_type=None):
+    """Add records to a stage without timing anything"""
+    if enabled:
+        record(stage_name, 0.0, records, entity_type, variation_type)
+
+
+def _start_profiler():
+    if profiler_backend == "cprofile":
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+    if profiler_backend == "pyinstrument":
+        from pyinstrument import Profiler
+        prof = Profiler()
+        prof.start()
+        return prof
+    return None
+
+
+def _stop_profiler(prof, stage_name):
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(output_dir, stage_name.replace("/", "_"))
+    if profiler_backend == "cprofile":
+        prof.disable()
+        prof.dump_stats(f"{filename}.prof")
+    else:
+        prof.stop()
+        with open(f"{filename}.txt", "w", encoding="utf-8") as f:
+            f.write(prof.output_text(unicode=True))
+
+
+@contextmanager
+def stage(stage_name, records=0, entity_type=None):
+    """
+    Time a block of work and, if a profiler backend is set, dump a profile for it.
+    Args:
+        stage_name: Name used in the summary and for the profile file
+        records: Number of records the block handles (for records/sec)
+        entity_type: Entity type the block works on, if any
+    """
+    global _active_profiler
+    if not enabled:
+        yield
+        return
+    prof = None
+    if profiler_backend and _active_profiler is None:
+        prof = _active_profiler = _start_profiler()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage_name, time.perf_counter() - start, records, entity_type)
+        if prof is not None:
+            _active_profiler = None
+            _stop_profiler(prof, stage_name)
+
+
+def timed(stage_name=None, entity_type=None):
+    """
+    Decorator that times every call of a function as one record.
+    Costs a single flag check per call while instrumentation is disabled.
+    """
+    def decorator(func):
+        name = stage_name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start, 1, entity_type)
+        return wrapper
+    return decorator
+
+
+def _rate(records, seconds):
+    return records / seconds if records and seconds > 0 else None
+
+
+def summary():
+    """
+    Build the summary of all collected timings.
+    Returns:
+        Dict with one row per stage and records/sec rolled up by entity type and variation type
+    """
+    stages = []
+    by_entity = {}
+    by_variation = {}
+    for (stage_name, entity_type, variation_type), (calls, records, seconds) in sorted(
+            stage_stats.items(), key=lambda item: tuple(str(k) for k in item[0])):
+        stages.append({
+            "stage": stage_name,
+            "entity_type": entity_type,
+            "variation_type": variation_type,
+            "calls": calls,
+            "records": records,
+            "seconds": round(seconds, 6),
+            "records_per_sec": _rate(records, seconds)
+        })
+        if variation_type is not None:
+            totals = by_variation.setdefault(f"{entity_type}/{variation_type}", [0, 0.0])
+            totals[0] += records
+            totals[1] += seconds
+        if entity_type is not None:
+            totals = by_entity.setdefault(entity_type, [0, 0.0])
+            totals[0] += records
+            totals[1] += seconds
+
+    def rollup(totals):
+        return {
+            key: {"records": records, "seconds": round(seconds, 6), "records_per_sec": _rate(records, seconds)}
+            for key, (records, seconds) in sorted(totals.items())
+        }
+
+    return {
+        "stages": stages,
+        "by_entity_type": rollup(by_entity),
+        "by_variation_type": rollup(by_variation)
+    }
+
+
+def write_summary(filename="summary.json"):
+    """Write the JSON summary into the output directory (no-op when disabled)"""
+    if not enabled:
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary(), f, indent=2)
+    print(f"Profiling summary written to {path}")
+    return path
@@ -0,0 +1,125 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import instrumentation
+import tables
+from blocking import BLOCKING_FIELDS, normalise_keys
+# String-similarity features for every golden standard pair, to bin benchmark results by difficulty.
+# The compared values are original_value/varied_value of the registry. Golden standards without them
+# (struct and relation omissions) compare the key of the original row with the key of the variant
+# row, which misses the omitted value, so the more of the key is lost the lower the similarity.
+# All pairs are scored in one batch per metric with rapidfuzz.process.cpdist (element-wise, in C,
+# on all cores), so nothing is computed one pair at a time in Python.
+#   python pair_features.py golden_standard.csv [original_dir variant_dir] [output.csv]
+
+FEATURE_COLUMNS = ['edit_distance', 'levenshtein', 'jaro_winkler', 'token_set', 'difficulty']
+
+# Mean similarity bounds of the difficulty bins
+DIFFICULTY_BINS = [-np.inf, 0.7, 0.9, np.inf]
+DIFFICULTY_LABELS = ['hard', 'medium', 'easy']
+
+
+def comparison_fields(entity_type, field_name):
+    """
+    Fields compared for an omission row: the blocking key fields and the omitted field, so the original
+    side holds the full key and the variant side the key with the omitted value left empty
+    """
+    fields = BLOCKING_FIELDS.get(entity_type, [])
+    return fields if field_name in fields else fields + [field_name]
+
+
+def field_values(golden, original=None, variant=None):
+    """
+    Original and varied value of every golden standard row
+    Args:
+        golden: Golden standard DataFrame
+        original, variant: Dicts of tables; rows without original_value/varied_value (omissions) compare
+            the comparison_fields of the original row (original_id) and the variant row (duplicate_id)
+    Returns:
+        Tuple of two string arrays ('' for missing values)
+    """
+    original_values = golden.get('original_value', pd.Series(np.nan, index=golden.index)).astype(object)
+    varied_values = golden.get('varied_value', pd.Series(np.nan, index=golden.index)).astype(object)
+    if original is not None and variant is not None:
+        missing = original_values.isna() & varied_values.isna()
+        for (entity_type, field), rows in golden[missing].groupby(['entity_type', 'field_name']):
+            fields = comparison_fields(entity_type, field)
+            for values, source, id_column in ((original_values, original, 'original_id'), (varied_values, variant, 'duplicate_id')):
+                df = source.get(entity_type)
+                if df is not None:
+                    df = df.drop_duplicates('identifier').set_index('identifier')
+                    keys = normalise_keys(df, fields)
+                    keys = keys.where(keys != '')
+                    values.loc[rows.index] = keys.reindex(rows[id_column]).to_numpy()
+    return original_values.fillna('').astype(str).to_numpy(), varied_values.fillna('').astype(str).to_numpy()
+
+
+def similarity_features(left, right, workers=-1, metrics=('edit_distance', 'levenshtein', 'jaro_winkler', 'token_set')):
+    """
+    Similarity of two equally long string arrays, element by element
+    Args:
+        left, right: String arrays
+        workers: Threads used by rapidfuzz (-1 for all cores)
+        metrics: Columns to compute
+    Returns:
+        DataFrame with edit_distance (Levenshtein distance) and the normalised levenshtein,
+        jaro_winkler and token_set similarities (0..1)
+    """
+    from rapidfuzz import process, fuzz, utils
+    from rapidfuzz.distance import Levenshtein, JaroWinkler
+    scorers = {
+        'edit_distance': (Levenshtein.distance, None, 1),
+        'levenshtein': (Levenshtein.normalized_similarity, None, 1),
+        'jaro_winkler': (JaroWinkler.normalized_similarity, None, 1),
+        'token_set': (fuzz.token_set_ratio, utils.default_process, 100)
+    }
+    left, right = list(left), list(right)
+    features = {}
+    for metric in metrics:
+        scorer, processor, scale = scorers[metric]
+        scores = process.cpdist(left, right, scorer=scorer, processor=processor, workers=workers)
+        features[metric] = scores / scale if scale != 1 else scores
+    return pd.DataFrame(features)
+
+
+def add_pair_features(golden, original=None, variant=None, workers=-1):
+    """
+    Add similarity feature columns and a difficulty bin next to a golden standard
+    Args:
+        golden: Golden standard DataFrame
+        original, variant: Dicts of tables for rows without original_value/varied_value
+        workers: Threads used by rapidfuzz (-1 for all cores)
+    Returns:
+        Copy of golden with the FEATURE_COLUMNS added (replaced if present)
+    """
+    with instrumentation.stage("pair_features", records=len(golden)):
+        left, right = field_values(golden, original, variant)
+        features = similarity_features(left, right, workers)
+        # Two empty values (nothing left to compare) carry no signal about the pair
+        features.loc[(left == '') & (right == ''), ['levenshtein', 'jaro_winkler', 'token_set']] = np.nan
+        mean_similarity = features[['levenshtein', 'jaro_winkler', 'token_set']].mean(axis=1)
+        features['difficulty'] = pd.cut(mean_similarity, DIFFICULTY_BINS, labels=DIFFICULTY_LABELS).astype(object)
+    result = golden.drop(columns=[c for c in FEATURE_COLUMNS if c in golden.columns])
+    return pd.concat([result.reset_index(drop=True), features], axis=1).set_axis(golden.index)
+
+
+if __name__ == "__main__":
+    usage = "usage: python pair_features.py golden_standard.csv [original_dir variant_dir] [output.csv]"
+    arguments = sys.argv[2:]
+    if len(sys.argv) < 2:
+        print(usage)
+        sys.exit(1)
+    if len(arguments) in (2, 3) and all(os.path.isdir(path) for path in arguments[:2]):
+        original_tables, variant_tables = tables.read_tables(arguments[0]), tables.read_tables(arguments[1])
+        output = arguments[2] if len(arguments) == 3 else sys.argv[1]
+    elif len(arguments) <= 1 and not any(os.path.isdir(path) for path in arguments):
+        original_tables = variant_tables = None
+        output = arguments[0] if arguments else sys.argv[1]
+    else:
+        # e.g. a single directory: both table directories are needed
+        print(usage)
+        sys.exit(1)
+    featured = add_pair_features(pd.read_csv(sys.argv[1]), original_tables, variant_tables)
+    featured.to_csv(output, index=False)
+    print(featured.groupby(['entity_type', 'difficulty'], dropna=False).size().to_string())
@@ -0,0 +1,354 @@
+import os
+import sys
+import json
+import copy
+import random
+import zlib
+import instrumentation
+import tables
+# Single-process pipeline runner: generate -> split -> delete -> vary -> remap -> convert.
+# Stages hand tables (see tables.py) to each other in memory; files are only written where
+# the spec asks for them. Run the default benchmark suite with
+#   python pipeline.py
+# or pass a JSON spec (same keys as DEFAULT_SPEC, missing keys use the defaults)
+#   python pipeline.py my_spec.json
+# and add --resume to continue an interrupted run from its checkpoints (see checkpoint.py)
+
+# Field deletions per dataset kind and level: (entity type -> fields, delete rate).
+# struct low/high and relation high match the data_variator and Turndupeintoset notebooks.
+struct_fields_low = {
+    'Address': ['postalCode'],
+    'Person': ['birthDate'],
+    'HealthcarePersonnel': ['email'],
+    'ContactPoint': ['availableLanguage']
+}
+struct_fields_high = {
+    'Address': ['text'],
+    'Person': ['personName'],
+    'HealthcareOrganization': ['healthcareOrganizationName'],
+    'ServiceDepartment': ['serviceDepartmentName'],
+    'HealthcarePersonnel': ['jobTitle'],
+    'ContactPoint': ['contactType']
+}
+relation_fields = {
+    'HealthcareOrganization': ['address'],
+    'ServiceDepartment': ['isPartOf'],
+    'HealthcarePersonnel': ['department']
+}
+DELETE_PRESETS = {
+    'struct': {
+        'low': (struct_fields_low, 1.0),
+        'medium': ({e: struct_fields_low.get(e, []) + struct_fields_high.get(e, []) for e in struct_fields_high}, 0.5),
+        'high': (struct_fields_high, 1.0)
+    },
+    'relation': {
+        'low': (relation_fields, 0.25),
+        'medium': (relation_fields, 0.5),
+        'high': (relation_fields, 1.0)
+    }
+}
+
+# Variation function per entity type for syntactic datasets (as in data_variator.ipynb)
+VARIATION_FUNCTIONS = {
+    'Address': 'address_variation',
+    'HealthcareOrganization': 'organization_name_variation',
+    'ServiceDepartment': 'department_name_variation',
+    'Person': 'person_variation',
+    'HealthcarePersonnel': 'email_variation',
+    'ContactPoint': 'email_variation'
+}
+
+DEFAULT_SPEC = {
+    "seed": 0,
+    "output_dir": "benchmark",
+    # Either generate a new master data set or read one from a directory of CSV files
+    "generate": {"num_organizations": 50},
+    "source": None,
+    "split": {"test_size": 0.3, "stratify_by": ["country", "department_mix"]},
+    "splits": ["train", "test"],
+    # kind: struct, relation or syntactic; fields/delete_rate/variation_rate override the presets.
+    # Syntactic datasets use variation_planner.py; "weights" ({entity type: {variation type: weight}})
+    # skews the variation mix and "planner": false switches to the per-record *_variation functions.
+    "datasets": [
+        {"kind": "struct", "levels": ["low", "medium", "high"]},
+        {"kind": "relation", "levels": ["low", "medium", "high"]}
+    ],
+    "convert": False,
+    # Add string-similarity features and a difficulty bin to every golden standard (pair_features.py)
+    "features": False,
+    # Mine hard negatives next to every golden standard (hard_negatives.py); true or a dict of
+    # mine_negatives options such as {"per_record": 2, "min_similarity": 0.5}
+    "negatives": False,
+    # Also load every dataset (original tables prefixed original_, variant tables and golden standard)
+    # into an indexed database file per dataset: "sqlite" or "duckdb" (database.py)
+    "database": None,
+    # Checkpoint the generator and the per-record variation runs (planner: false) into this directory,
+    # and continue from its checkpoints when "resume" is true (python pipeline.py spec.json --resume)
+    "checkpoint_dir": None,
+    "resume": False,
+    # Which results are written to output_dir; everything else stays in memory
+    "write": {"source": False, "splits": False, "datasets": True, "golden": True, "graphs": True}
+}
+
+
+def load_spec(spec=None):
+    """
+    Merge a spec (dict or path to a JSON file) over DEFAULT_SPEC
+    Returns:
+        Complete spec dict
+    """
+    if isinstance(spec, str):
+        with open(spec, encoding="utf-8") as f:
+            spec = json.load(f)
+    merged = copy.deepcopy(DEFAULT_SPEC)
+    for key, value in (spec or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def stage_seed(spec, *names):
+    """Deterministic seed for one stage, derived from the spec seed and the stage names"""
+    return zlib.crc32(":".join(str(n) for n in (spec["seed"],) + names).encode())
+
+
+def load_source(spec):
+    """Generate the master data set, or read it from spec['source']"""
+    if spec.get("source"):
+        return tables.read_tables(spec["source"])
+    import data_creator
+    from faker import Faker
+    seed = stage_seed(spec, "generate")
+    random.seed(seed)
+    Faker.seed(seed)
+    checkpoint_dir = os.path.join(spec["checkpoint_dir"], "generate") if spec.get("checkpoint_dir") else None
+    return data_creator.generate_tables(**spec["generate"], checkpoint_dir=checkpoint_dir, resume=spec.get("resume", False))
+
+
+def split_source(source, spec):
+    """Split the master data set by organization (see dataset_split.py)"""
+    import dataset_split
+    split = spec["split"]
+    roots = dataset_split.organization_roots(source)
+    stratify_by = split.get("stratify_by")
+    strata = dataset_split.organization_strata(source, stratify_by) if stratify_by else None
+    assignment = dataset_split.assign_organizations(
+        source[dataset_split.ROOT_ENTITY]['identifier'], strata, split.get("test_size", 0.3), seed=stage_seed(spec, "split"))
+    return dataset_split.split_tables(source, assignment, roots)
+
+
+def delete_fields(entity_dataframes, fields_map, delete_rate, variation_type):
+    """Delete values from every table; returns (tables, omission golden rows)"""
+    from variation_helpers import delete_dataframe_values
+    import pandas as pd
+    result, golden = {}, []
+    for entity_type, df in entity_dataframes.items():
+        result[entity_type], rows = delete_dataframe_values(
+            df, fields_map.get(entity_type, []), delete_rate, entity_type=entity_type, variation_type=variation_type)
+        golden.append(rows)
+    return result, pd.concat(golden, ignore_index=True)
+
+
+def build_struct(split_tables, fields_map, delete_rate, seed):
+    """Missing attributes: delete fields, then give the copy new identifiers (Turndupeintoset_missing_attributes)"""
+    from identifier_helpers import remap_identifiers
+    from variation_helpers import create_omission_golden_records
+    deleted, _ = delete_fields(split_tables, fields_map, delete_rate, "omission")
+    remapped, _ = remap_identifiers(deleted, seed=seed)
+    return remapped, create_omission_golden_records(remapped, fields_map)
+
+
+def build_relation(split_tables, fields_map, delete_rate, seed):
+    """Missing relations: give the copy new identifiers, then delete references (Turndupeintoset_relation)"""
+    from identifier_helpers import remap_identifiers
+    remapped, _ = remap_identifiers(split_tables, seed=seed)
+    return delete_fields(remapped, fields_map, delete_rate, "relation_omission")
+
+
+def build_syntactic(split_tables, noise, variation_rate, seed, weights=None, planner=True, checkpoint_dir=None, resume=False):
+    """Syntactic duplicates: vary values, then apply them to a copy with new identifiers (Turndupeintoset_syntactic)"""
+    import variation_helpers
+    from variation_planner import introduce_planned_variations
+    from identifier_helpers import remap_identifiers, remap_golden_standard
+    variation_helpers.duplicate_registry.clear()
+    # Department translations look up the contact point languages; use this split's table instead of the CSV
+    saved_contact_points = variation_helpers.contact_point_df
+    if 'ContactPoint' in split_tables:
+        variation_helpers.set_contact_points(split_tables['ContactPoint'])
+    try:
+        for entity_type, df in split_tables.items():
+            if planner:
+                introduce_planned_variations(df, entity_type, variation_rate, noise, (weights or {}).get(entity_type))
+                continue
+            variation_function = getattr(variation_helpers, VARIATION_FUNCTIONS[entity_type])
+            sampled = variation_helpers.sample_records(entity_type, df, variation_rate)
+            variation_helpers.introduce_variations(sampled, variation_function, variation_rate, entity_type, noise,
+                                                   checkpoint_dir, resume, selected=range(len(sampled)))
+    finally:
+        variation_helpers.set_contact_points(saved_contact_points)
+    golden = variation_helpers.duplicate_registry_frame()
+    remapped, id_maps = remap_identifiers(split_tables, seed=seed)
+    varied = variation_helpers.apply_golden_variations(remapped, golden)
+    return varied, remap_golden_standard(golden, id_maps)
+
+
+def build_dataset(split_tables, dataset, level, seed, checkpoint_dir=None, resume=False):
+    """
+    Build one benchmark dataset from the tables of one split
+    Args:
+        split_tables: Dict mapping entity type to DataFrame
+        dataset: Dataset entry of the spec (kind and optional overrides)
+        level: Noise level ("low", "medium" or "high")
+        seed: Seed for the random choices of this dataset
+        checkpoint_dir, resume: Checkpoints of the per-record variation runs (see introduce_variations)
+    Returns:
+        Tuple of (dict of variant tables, golden standard DataFrame)
+    """
+    kind = dataset["kind"]
+    random.seed(seed)
+    if kind == "syntactic":
+        return build_syntactic(split_tables, level, dataset.get("variation_rate", 0.8), seed,
+                               dataset.get("weights"), dataset.get("planner", True), checkpoint_dir, resume)
+    if kind not in DELETE_PRESETS:
+        raise ValueError(f"Unknown dataset kind: {kind}")
+    fields_map, delete_rate = DELETE_PRESETS[kind].get(level, (None, None))
+    fields_map = dataset.get("fields", fields_map)
+    delete_rate = dataset.get("delete_rate", delete_rate)
+    if fields_map is None or delete_rate is None:
+        raise ValueError(f"No preset for {kind} level {level!r}; give fields and delete_rate in the spec")
+    build = build_struct if kind == "struct" else build_relation
+    return build(split_tables, fields_map, delete_rate, seed)
+
+
+def convert(original, variant):
+    """Build the original and variant knowledge graphs (rdflib is only imported when converting)"""
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+    if src not in sys.path:
+        sys.path.insert(0, src)
+    from ConvertCSVtoKG import build_graphs
+    return build_graphs(original, variant, verbose=False)
+
+
+def dataset_name(dataset, level):
+    """Directory name of a dataset, e.g. struct_low or relation_high_d0.75 (rates only appear when set in the spec)"""
+    name = f"{dataset['kind']}_{level}"
+    if dataset.get("variation_rate") is not None:
+        name += f"_v{dataset['variation_rate']:g}"
+    if dataset.get("delete_rate") is not None:
+        name += f"_d{dataset['delete_rate']:g}"
+    return name
+
+
+def output_paths(output_dir, split_name, name, database="sqlite"):
+    """Output locations of one dataset: its table directory, golden standard, graphs and database file"""
+    return {
+        "tables": os.path.join(output_dir, split_name, name),
+        "golden": os.path.join(output_dir, "ground_truths", f"{split_name}_golden_standard_{name}.csv"),
+        "negatives": os.path.join(output_dir, "ground_truths", f"{split_name}_negatives_{name}.csv"),
+        "graphs": [os.path.join(output_dir, "graphs", f"{split_name}_{suffix}.ttl") for suffix in ("original", name)],
+        "database": os.path.join(output_dir, "databases", f"{split_name}_{name}.{database or 'sqlite'}")
+    }
+
+
+def finish_dataset(spec, split_name, name, original, variant, golden):
+    """
+    Convert and write one built dataset as far as the spec asks
+    Args:
+        spec: Complete spec dict
+        split_name: Split the dataset was built from
+        name: Dataset name (see dataset_name)
+        original: Tables of the split
+        variant: Variant tables
+        golden: Golden standard DataFrame
+    Returns:
+        Tuple of (result dict with tables, golden and optionally negatives and graphs, list of written paths)
+    """
+    write = spec["write"]
+    paths = output_paths(spec["output_dir"], split_name, name, spec.get("database"))
+    if spec.get("features"):
+        from pair_features import add_pair_features
+        golden = add_pair_features(golden, original, variant)
+    result, written = {"tables": variant, "golden": golden}, []
+    if write.get("datasets"):
+        written += tables.write_tables(variant, paths["tables"], columns="all")
+    if write.get("golden"):
+        os.makedirs(os.path.dirname(paths["golden"]), exist_ok=True)
+        golden.to_csv(paths["golden"], index=False)
+        written.append(paths["golden"])
+    if spec.get("negatives"):
+        from hard_negatives import mine_negatives
+        options = spec["negatives"] if isinstance(spec["negatives"], dict) else {}
+        with instrumentation.stage(f"pipeline_negatives_{name}"):
+            result["negatives"] = mine_negatives(original, variant, seed=stage_seed(spec, split_name, name, "negatives"), **options)
+        if write.get("golden"):
+            result["negatives"].to_csv(paths["negatives"], index=False)
+            written.append(paths["negatives"])
+    if spec.get("database"):
+        from database import write_database
+        with instrumentation.stage(f"pipeline_database_{name}"):
+            write_database(original, paths["database"], backend=spec["database"], prefix="original_")
+            write_database(variant, paths["database"], golden, backend=spec["database"])
+        written.append(paths["database"])
+    if spec.get("convert"):
+        with instrumentation.stage(f"pipeline_convert_{name}"):
+            result["graphs"] = convert(original, variant)
+        if write.get("graphs"):
+            os.makedirs(os.path.dirname(paths["graphs"][0]), exist_ok=True)
+            for graph, path in zip(result["graphs"], paths["graphs"]):
+                graph.serialize(destination=path, format="turtle")
+                written.append(path)
+    return result, written
+
+
+def run(spec=None):
+    """
+    Run the pipeline described by a spec
+    Args:
+        spec: Spec dict or path to a JSON spec (merged over DEFAULT_SPEC)
+    Returns:
+        Dict with the source tables, the split tables and one entry per (split, dataset name)
+        holding the variant tables, the golden standard and (if converted) the graphs
+    """
+    spec = load_spec(spec)
+    write = spec["write"]
+    output_dir = spec["output_dir"]
+    results = {"datasets": {}}
+
+    with instrumentation.stage("pipeline_source"):
+        source = results["source"] = load_source(spec)
+    if write.get("source"):
+        tables.write_tables(source, os.path.join(output_dir, "source"))
+
+    with instrumentation.stage("pipeline_split"):
+        splits = results["splits"] = split_source(source, spec)
+    if write.get("splits"):
+        for split_name, split_tables in splits.items():
+            tables.write_tables(split_tables, os.path.join(output_dir, split_name, "data"))
+
+    for split_name in spec["splits"]:
+        for dataset in spec["datasets"]:
+            for level in dataset.get("levels", ["low"]):
+                name = dataset_name(dataset, level)
+                with instrumentation.stage(f"pipeline_{name}"):
+                    checkpoint_dir = os.path.join(spec["checkpoint_dir"], split_name, name) if spec.get("checkpoint_dir") else None
+                    variant, golden = build_dataset(splits[split_name], dataset, level, stage_seed(spec, split_name, name),
+                                                    checkpoint_dir, spec.get("resume", False))
+                result, _ = finish_dataset(spec, split_name, name, splits[split_name], variant, golden)
+                results["datasets"][(split_name, name)] = result
+
+    instrumentation.write_summary("pipeline_summary.json")
+    return results
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--resume"]
+    spec = load_spec(arguments[0] if arguments else None)
+    if "--resume" in sys.argv:
+        spec["resume"] = True
+        spec["checkpoint_dir"] = spec.get("checkpoint_dir") or os.path.join(spec["output_dir"], "_checkpoints")
+    results = run(spec)
+    for (split_name, name), result in results["datasets"].items():
+        print(f"{split_name} {name}: {sum(len(df) for df in result['tables'].values())} rows, "
+              f"{len(result['golden'])} golden standard rows")
@@ -0,0 +1,85 @@
+import sys
+import numpy as np
+import pandas as pd
+import instrumentation
+import tables
+from schema import identifier_owner
+from identifier_helpers import remap_identifiers
+# Rebuilds a variant dataset from its clean tables and its golden standard (the duplicate registry),
+# without rerunning the variation functions or their translation calls.
+# Every variant is the clean tables with fresh identifiers plus field patches:
+#   - the golden standard maps original_id -> duplicate_id, which fixes the new identifiers it lists;
+#     the other identifiers are minted again from the dataset seed (pipeline.stage_seed(spec, split, name)),
+#     so with the seed the rebuilt tables are identical to the ones the pipeline built
+#   - varied_value rows patch one field of one record, omission rows empty it
+# Patches are applied per (entity type, field) as one vectorised column update.
+#   python replay.py clean_dir golden_standard.csv output_dir [seed]
+
+OMISSION_TYPES = ('omission', 'relation_omission')
+
+
+def golden_id_maps(golden):
+    """
+    Identifier maps fixed by a golden standard
+    Returns:
+        Dict mapping each identifier-owning entity type to a Series original_id -> duplicate_id
+    """
+    rows = golden[golden['duplicate_id'].notna()]
+    owners = rows['entity_type'].map(identifier_owner)
+    return {owner: group.drop_duplicates('original_id').set_index('original_id')['duplicate_id']
+            for owner, group in rows.groupby(owners)}
+
+
+def patch_fields(entity_dataframes, golden, anchor_column="anchor"):
+    """
+    Apply the varied values and omissions of a golden standard to tables with an anchor column
+    When one field of a record was changed more than once, the last golden standard row wins.
+    Returns:
+        Dict of patched DataFrame copies
+    """
+    golden = golden.drop_duplicates(['entity_type', 'original_id', 'field_name'], keep='last')
+    omitted = golden['variation_type'].isin(OMISSION_TYPES)
+    values = golden['varied_value'] if 'varied_value' in golden.columns else pd.Series(np.nan, index=golden.index)
+    patched = {}
+    for entity_type, df in entity_dataframes.items():
+        df = df.copy()
+        typed = golden['entity_type'] == entity_type
+        for (field_name, omission), changes in golden[typed].groupby(['field_name', omitted[typed]]):
+            if field_name not in df.columns:
+                continue
+            if omission:
+                df[field_name] = df[field_name].mask(df[anchor_column].isin(changes['original_id']))
+                continue
+            varied = pd.Series(values[changes.index].to_numpy(), index=changes['original_id'].to_numpy())
+            mask = df[anchor_column].isin(varied.index)
+            df[field_name] = df[field_name].astype(object)
+            df.loc[mask, field_name] = df.loc[mask, anchor_column].map(varied)
+        patched[entity_type] = df
+    return patched
+
+
+def replay_variant(clean_tables, golden, seed=None, anchor_column="anchor"):
+    """
+    Rebuild the variant tables of a dataset
+    Args:
+        clean_tables: Dict mapping entity type to the clean (split) tables the dataset was built from
+        golden: Golden standard DataFrame of the dataset (syntactic registry or omission rows)
+        seed: Seed the dataset's identifiers were minted with; without it the identifiers that are
+            not in the golden standard are new random ones
+        anchor_column: Column that keeps the original identifier
+    Returns:
+        Dict mapping entity type to variant DataFrame
+    """
+    with instrumentation.stage("replay_variant", records=len(golden)):
+        remapped, _ = remap_identifiers(clean_tables, anchor_column, seed=seed, known_ids=golden_id_maps(golden))
+        return patch_fields(remapped, golden, anchor_column)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("usage: python replay.py clean_dir golden_standard.csv output_dir [seed]")
+        sys.exit(1)
+    variant = replay_variant(tables.read_tables(sys.argv[1]), pd.read_csv(sys.argv[2]),
+                             int(sys.argv[4]) if len(sys.argv) > 4 else None)
+    for path in tables.write_tables(variant, sys.argv[3], columns="all"):
+        print(path)
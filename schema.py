@@ -0,0 +1,35 @@
+# Master data schema shared by the generator, variator and dataset tools.
+# Mirrors the tables documented in readme.md.
+
+# Entity types in dependency order: every table only references tables listed before it
+ENTITY_TYPES = [
+    'Address',
+    'ContactPoint',
+    'HealthcareOrganization',
+    'ServiceDepartment',
+    'Person',
+    'HealthcarePersonnel'
+]
+
+# Column order of each CSV table
+FIELDS = {
+    'Address': ['identifier', 'text', 'city', 'postalCode', 'country'],
+    'ContactPoint': ['identifier', 'contactType', 'phone', 'email', 'availableLanguage', 'fax'],
+    'HealthcareOrganization': ['identifier', 'healthcareOrganizationName', 'address', 'contactPoint'],
+    'ServiceDepartment': ['identifier', 'serviceDepartmentName', 'address', 'isPartOf', 'contactPoint'],
+    'Person': ['identifier', 'personName', 'birthDate', 'gender', 'knowsLanguage'],
+    'HealthcarePersonnel': ['identifier', 'institution', 'department', 'jobTitle', 'email']
+}
+
+# Foreign keys per entity type: column -> referenced entity type.
+# HealthcarePersonnel.identifier is itself a reference to Person.identifier.
+FOREIGN_KEYS = {
+    'HealthcareOrganization': {'address': 'Address', 'contactPoint': 'ContactPoint'},
+    'ServiceDepartment': {'isPartOf': 'HealthcareOrganization', 'address': 'Address', 'contactPoint': 'ContactPoint'},
+    'HealthcarePersonnel': {'identifier': 'Person', 'institution': 'HealthcareOrganization', 'department': 'ServiceDepartment'}
+}
+
+
+def identifier_owner(entity_type):
+    """Return the entity type that owns the identifiers of entity_type (Person for HealthcarePersonnel)"""
+    return FOREIGN_KEYS.get(entity_type, {}).get('identifier', entity_type)
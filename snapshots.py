@@ -0,0 +1,261 @@
+import os
+import sys
+import json
+import random
+import datetime
+import numpy as np
+import pandas as pd
+import instrumentation
+import tables
+from schema import ENTITY_TYPES, identifier_owner
+# Temporal snapshots of a master data set: a base snapshot followed by a sequence of time-stamped
+# steps in which the data drifts (staff move departments, addresses change, organizations rename,
+# new organizations open and staff leave).
+# Each step is stored as a compact change delta (CDC style) instead of a full copy of the tables:
+# one row per inserted or updated field and one row per deleted record,
+#   step, timestamp, op (insert/update/delete), entity_type, identifier, field_name, value
+# so hundreds of versions cost little more than the changes they contain. Any snapshot is
+# materialised by applying the deltas up to it to the base tables, one vectorised update per field.
+# New records come from data_creator's generators; updates draw new values with them as well.
+#   python snapshots.py generate source_dir output_dir steps [seed]
+#   python snapshots.py materialise snapshot_dir step output_dir
+
+DELTA_COLUMNS = ['step', 'timestamp', 'op', 'entity_type', 'identifier', 'field_name', 'value']
+MANIFEST_FILE = "manifest.json"
+
+# Share of the records changed per step:
+#   update - per change kind below, share of its records that get a new value
+#   insert - new organizations (with their departments, contact points, addresses and personnel)
+#            relative to the number of organizations
+#   delete - personnel that leave (HealthcarePersonnel and Person rows)
+DEFAULT_RATES = {"update": 0.01, "insert": 0.01, "delete": 0.01}
+
+# Update kinds: entity type and the fields a change rewrites
+UPDATE_KINDS = {
+    "department_move": ('HealthcarePersonnel', ['department']),
+    "address_change": ('Address', ['text', 'city', 'postalCode']),
+    "organization_rename": ('HealthcareOrganization', ['healthcareOrganizationName'])
+}
+
+START_DATE = "2024-01-01"
+INTERVAL_DAYS = 30
+
+
+def step_timestamp(step, start=START_DATE, interval_days=INTERVAL_DAYS):
+    """ISO date of a step (step 0 is the base snapshot)"""
+    return (datetime.date.fromisoformat(start) + datetime.timedelta(days=step * interval_days)).isoformat()
+
+
+def _field_rows(op, entity_type, df, fields):
+    # Long format: one row per (record, field)
+    return pd.DataFrame({
+        'op': op,
+        'entity_type': entity_type,
+        'identifier': np.tile(df['identifier'].to_numpy(dtype=object), len(fields)),
+        'field_name': np.repeat(fields, len(df)),
+        'value': np.concatenate([df[field].to_numpy(dtype=object) for field in fields]) if fields else []
+    })
+
+
+def department_moves(current, chosen, rng):
+    """New department of the chosen personnel rows: another department of the same institution"""
+    departments = current['ServiceDepartment']
+    personnel = current['HealthcarePersonnel'][chosen]
+    codes, organizations = pd.factorize(departments['isPartOf'])
+    # Department rows grouped by organization: one contiguous run per organization
+    order = np.flatnonzero(codes >= 0)
+    order = order[np.argsort(codes[order], kind='stable')]
+    sizes = np.bincount(codes[order], minlength=len(organizations))
+    starts = np.cumsum(sizes) - sizes
+    group = organizations.get_indexer(personnel['institution'])
+    known = group >= 0
+    group = group[known]
+    picks = order[starts[group] + (rng.random(len(group)) * sizes[group]).astype(np.int64)]
+    moved = personnel[known].assign(department=departments['identifier'].to_numpy(dtype=object)[picks])
+    return moved[moved['department'].to_numpy() != personnel['department'].to_numpy()[known]]
+
+
+def address_changes(current, chosen, rng):
+    """New street, city and postal code for the chosen addresses, in the same country"""
+    import data_creator
+    addresses = current['Address'][chosen]
+    addresses = addresses[addresses['country'].isin(list(data_creator.postal_code_formats))]
+    generated = data_creator.generate_addresses(addresses['country'].to_numpy(dtype=str), rng)
+    return addresses.assign(**{field: generated[field] for field in UPDATE_KINDS["address_change"][1]})
+
+
+def organization_renames(current, chosen, rng):
+    """New name for the chosen organizations, in the style of their country"""
+    import data_creator
+    organizations = current['HealthcareOrganization'][chosen]
+    countries = current['Address'].drop_duplicates('identifier').set_index('identifier')['country']
+    names = [data_creator.generate_organization_name(country) for country in organizations['address'].map(countries)]
+    return organizations.assign(healthcareOrganizationName=names)
+
+
+CHANGE_FUNCTIONS = {
+    "department_move": department_moves,
+    "address_change": address_changes,
+    "organization_rename": organization_renames
+}
+
+
+def make_delta(current, step, rates=DEFAULT_RATES, seed=0, known_ids=None, timestamp=None):
+    """
+    Draw the changes of one step
+    Args:
+        current: Dict mapping entity type to the tables of the previous snapshot
+        step: Step number (1 for the first change)
+        rates: Dict with the update, insert and delete rates (see DEFAULT_RATES)
+        seed: Seed of the snapshot sequence; each step draws from its own stream
+        known_ids: Identifier index (data_creator.existing_identifiers) that new identifiers are kept
+            unique against; updated in place
+        timestamp: Timestamp of the step (step_timestamp(step) by default)
+    Returns:
+        Delta DataFrame with DELTA_COLUMNS
+    """
+    import data_creator
+    from faker import Faker
+    rates = dict(DEFAULT_RATES, **rates)
+    rng = np.random.default_rng([seed, step])
+    # The record generators draw from the random module and Faker
+    step_seed = int(rng.integers(2**63))
+    random.seed(step_seed)
+    Faker.seed(step_seed)
+    frames = []
+
+    personnel = current['HealthcarePersonnel']
+    leaving = personnel['identifier'][rng.random(len(personnel)) < rates["delete"]]
+    for entity_type in ('HealthcarePersonnel', 'Person'):
+        frames.append(pd.DataFrame({'op': 'delete', 'entity_type': entity_type, 'identifier': leaving.to_numpy(dtype=object)}))
+
+    for kind, (entity_type, fields) in UPDATE_KINDS.items():
+        df = current[entity_type]
+        chosen = (rng.random(len(df)) < rates["update"]) & ~df['identifier'].isin(leaving).to_numpy()
+        if chosen.any():
+            frames.append(_field_rows('update', entity_type, CHANGE_FUNCTIONS[kind](current, chosen, rng), fields))
+
+    new_organizations = rng.binomial(len(current['HealthcareOrganization']), rates["insert"])
+    if new_organizations:
+        new_dataset = data_creator.generate_dataset(new_organizations, existing_emails=personnel['email'])
+        if known_ids is not None:
+            data_creator.resolve_identifier_collisions(new_dataset, known_ids)
+        for entity_type, df in tables.dataset(new_dataset).items():
+            frames.append(_field_rows('insert', entity_type, df, [f for f in df.columns if f != 'identifier']))
+
+    delta = pd.concat(frames, ignore_index=True)
+    delta.insert(0, 'step', step)
+    delta.insert(1, 'timestamp', timestamp or step_timestamp(step))
+    return delta.reindex(columns=DELTA_COLUMNS)
+
+
+def apply_delta(current, delta):
+    """
+    Apply a delta to a snapshot: deletes, then updates (the last value of a field wins), then inserts
+    Returns:
+        Dict of the changed tables (unchanged tables are shared with current)
+    """
+    result = dict(current)
+    for entity_type, changes in delta.groupby('entity_type', sort=False):
+        df = result.get(entity_type, tables.table(entity_type))
+        ops = changes['op'].to_numpy()
+        deleted = changes['identifier'][ops == 'delete']
+        if len(deleted):
+            df = df[~df['identifier'].isin(deleted)]
+        df = df.copy()
+        for field_name, rows in changes[ops == 'update'].groupby('field_name', sort=False):
+            values = rows.drop_duplicates('identifier', keep='last').set_index('identifier')['value']
+            mask = df['identifier'].isin(values.index)
+            df[field_name] = df[field_name].astype(object)
+            df.loc[mask, field_name] = df.loc[mask, 'identifier'].map(values)
+        inserts = changes[ops == 'insert']
+        if len(inserts):
+            identifiers = inserts['identifier'].unique()
+            wide = inserts.pivot(index='identifier', columns='field_name', values='value').reindex(identifiers)
+            df = pd.concat([df, tables.conform(entity_type, wide.rename_axis(None, axis=1).reset_index())], ignore_index=True)
+        result[entity_type] = df.reset_index(drop=True)
+    return result
+
+
+def change_counts(delta):
+    """Number of records inserted, updated and deleted by a delta (a record counts once however many fields change)"""
+    records = delta.drop_duplicates(['op', 'entity_type', 'identifier'])
+    return records['op'].value_counts().reindex(['insert', 'update', 'delete'], fill_value=0).astype(int).to_dict()
+
+
+def delta_path(snapshot_dir, step):
+    return os.path.join(snapshot_dir, "deltas", f"delta_{step:05d}.csv")
+
+
+def read_delta(snapshot_dir, step):
+    """Read the delta of one step"""
+    return pd.read_csv(delta_path(snapshot_dir, step), dtype={'identifier': str, 'field_name': str, 'value': str})
+
+
+def generate_snapshots(base, output_dir, steps, rates=DEFAULT_RATES, seed=0, start=START_DATE, interval_days=INTERVAL_DAYS):
+    """
+    Write a base snapshot and the deltas of a sequence of steps
+    Args:
+        base: Dict mapping entity type to the tables of the base snapshot
+        output_dir: Directory for base/, deltas/ and the manifest
+        steps: Number of steps after the base snapshot
+        rates: Dict with the update, insert and delete rates (see DEFAULT_RATES)
+        seed: Seed of the sequence; the same seed and base give the same deltas
+        start, interval_days: Timestamp of the base snapshot and time between steps
+    Returns:
+        Manifest dict (also written to output_dir)
+    """
+    rates = dict(DEFAULT_RATES, **rates)
+    tables.write_tables(base, os.path.join(output_dir, "base"))
+    os.makedirs(os.path.join(output_dir, "deltas"), exist_ok=True)
+    manifest = {"seed": seed, "rates": rates, "start": start, "interval_days": interval_days, "steps": []}
+    # One identifier index for the whole sequence, so a deleted identifier is never given out again
+    known_ids = {}
+    for entity_type, df in base.items():
+        known_ids.setdefault(identifier_owner(entity_type), set()).update(df['identifier'].dropna())
+    current = base
+    for step in range(1, steps + 1):
+        with instrumentation.stage("snapshot_step", records=sum(len(df) for df in current.values())):
+            delta = make_delta(current, step, rates, seed, known_ids, step_timestamp(step, start, interval_days))
+            delta.to_csv(delta_path(output_dir, step), index=False)
+            current = apply_delta(current, delta)
+        manifest["steps"].append({"step": step, "timestamp": step_timestamp(step, start, interval_days), **change_counts(delta)})
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def materialise(snapshot_dir, step=None):
+    """
+    Rebuild the tables of one snapshot from the base tables and the deltas up to it
+    Args:
+        snapshot_dir: Directory written by generate_snapshots
+        step: Snapshot to rebuild (0 for the base, None for the last one)
+    Returns:
+        Dict mapping entity type to DataFrame
+    """
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    last = len(manifest["steps"])
+    step = last if step is None else step
+    if not 0 <= step <= last:
+        raise ValueError(f"{snapshot_dir} has snapshots 0 to {last}, not {step}")
+    current = tables.read_tables(os.path.join(snapshot_dir, "base"))
+    for number in range(1, step + 1):
+        with instrumentation.stage("materialise_step"):
+            current = apply_delta(current, read_delta(snapshot_dir, number))
+    return {entity_type: current[entity_type] for entity_type in ENTITY_TYPES if entity_type in current}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 5 and sys.argv[1] == "generate":
+        written = generate_snapshots(tables.read_tables(sys.argv[2]), sys.argv[3], int(sys.argv[4]),
+                                     seed=int(sys.argv[5]) if len(sys.argv) > 5 else 0)
+        print(f"{len(written['steps'])} deltas written to {sys.argv[3]}")
+    elif len(sys.argv) >= 5 and sys.argv[1] == "materialise":
+        for path in tables.write_tables(materialise(sys.argv[2], int(sys.argv[3])), sys.argv[4]):
+            print(path)
+    else:
+        print("usage: python snapshots.py generate source_dir output_dir steps [seed]\n"
+              "       python snapshots.py materialise snapshot_dir step output_dir")
+        sys.exit(1)
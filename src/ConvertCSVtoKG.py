@@ -1,253 +1,287 @@
 import pandas as pd
 import re
 import os
+import sys
 from rdflib import Graph, Namespace, URIRef, Literal, RDF, XSD, RDFS
 
-print("===== HEALTHCARE KNOWLEDGE GRAPH GENERATOR =====")
-
-# ============= 1. DATA LOADING =============
-
-print("\n1. Loading CSV data...")
-#Load CSV files
-healthcare_org_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/HealthcareOrganization.csv")
-service_dept_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/ServiceDepartment.csv")
-Address_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/Address.csv")
-HealthcarePersonnel_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/HealthcarePersonnel.csv")
-Person_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/Person.csv")
-contact_point_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/ContactPoint.csv")
-
-# sound = "low"
-
-# healthcare_org_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/HealthcareOrganization_{sound}.csv")
-# service_dept_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/ServiceDepartment_{sound}.csv")
-# Address_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/Address_{sound}.csv")
-# HealthcarePersonnel_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/HealthcarePersonnel_{sound}.csv")
-# Person_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/Person_{sound}.csv")
-# contact_point_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/ContactPoint_{sound}.csv")
-
-# healthcare_org_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/HealthcareOrganization.csv")
-# service_dept_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/ServiceDepartment.csv")
-# Address_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/Address.csv")
-# HealthcarePersonnel_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/HealthcarePersonnel.csv")
-# Person_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/Person.csv")
-# contact_point_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/ContactPoint.csv")
-
-
-# noise = 'low'
-# # Load variant CSV files
-# healthcare_org_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/HealthcareOrganization_{noise}.csv")
-# service_dept_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/ServiceDepartment_{noise}.csv")
-# Address_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/Address_{noise}.csv")
-# HealthcarePersonnel_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/HealthcarePersonnel_{noise}.csv")
-# Person_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/Person_{noise}.csv")
-# contact_point_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/ContactPoint_{noise}.csv")
-
-#Load variant CSV files
-healthcare_org_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/HealthcareOrganization.csv")
-service_dept_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/ServiceDepartment.csv")
-Address_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/Address.csv")
-HealthcarePersonnel_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/HealthcarePersonnel.csv")
-Person_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/Person.csv")
-contact_point_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/ContactPoint.csv")
-
-
-
-# ============= 3. CREATE AND POPULATE KNOWLEDGE GRAPHS =============
-
-print("\n4. Creating knowledge graphs...")
-# Initialize RDF graphs
-g_original = Graph()
-g_var = Graph()
-
-# Define namespaces for both graphs
-for g in [g_original, g_var]:
-    g.bind("schema", SCHEMA := Namespace("https://schema.org/"))
-    g.bind("ex", EX := Namespace("http://example.org/"))
+# Shared helpers such as instrumentation live in the repository root. Importers that have it on the
+# path (pipeline.py, data_creator.py) use it as is; a script run or an import from src/ adds it here
+try:
+    import instrumentation
+except ModuleNotFoundError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import instrumentation
+
+# Nothing is loaded or built at import time; run this file as a script (see main) or
+# call build_graphs() / build_graph() with already loaded tables.
+
+SCHEMA = Namespace("https://schema.org/")
+EX = Namespace("http://example.org/")
+
+
+def new_graph():
+    """Create an empty RDF graph with the project namespaces bound"""
+    g = Graph()
+    g.bind("schema", SCHEMA)
+    g.bind("ex", EX)
     g.bind("xsd", XSD)
     g.bind("rdfs", RDFS)
-
-# Helper function to process entity data for both graphs
-def process_entity(entity_type, original_df, var_df, process_func):
+    return g
+
+# Triples of each entity type, applied to whole columns: (URI path, class, properties).
+# A property is (predicate, column, object kind, skip missing values): kind "literal" gives an xsd:string
+# literal, any other kind is the URI path of the referenced entity. Properties that do not skip missing
+# values write them as they are (e.g. a "nan" literal), like the row-by-row converter did.
+TRIPLE_MAPS = {
+    'HealthcareOrganization': ("HealthcareOrganization", SCHEMA.MedicalOrganization, [
+        (SCHEMA.identifier, 'identifier', "literal", False),
+        (SCHEMA.name, 'healthcareOrganizationName', "literal", False),
+        (RDFS.label, 'healthcareOrganizationName', "literal", False),
+        (SCHEMA.address, 'address', "Address", False),
+        (SCHEMA.contactPoint, 'contactPoint', "ContactPoint", False)
+    ]),
+    'ServiceDepartment': ("ServiceDepartment", SCHEMA.Department, [
+        (SCHEMA.identifier, 'identifier', "literal", False),
+        (SCHEMA.name, 'serviceDepartmentName', "literal", False),
+        (RDFS.label, 'serviceDepartmentName', "literal", False),
+        (SCHEMA.address, 'address', "Address", False),
+        (SCHEMA.parentOrganization, 'isPartOf', "HealthcareOrganization", False),
+        (SCHEMA.contactPoint, 'contactPoint', "ContactPoint", False)
+    ]),
+    'ContactPoint': ("ContactPoint", SCHEMA.ContactPoint, [
+        (SCHEMA.identifier, 'identifier', "literal", False),
+        (SCHEMA.contactType, 'contactType', "literal", False),
+        (RDFS.label, 'contactType', "literal", False),
+        (SCHEMA.telephone, 'phone', "literal", False),
+        (SCHEMA.email, 'email', "literal", False),
+        (SCHEMA.availableLanguage, 'availableLanguage', "literal", False),
+        (SCHEMA.faxNumber, 'fax', "literal", False)
+    ]),
+    'Person': ("Person", SCHEMA.Person, [
+        (SCHEMA.identifier, 'identifier', "literal", False),
+        (SCHEMA.name, 'personName', "literal", False),
+        (RDFS.label, 'personName', "literal", False),
+        (SCHEMA.birthDate, 'birthDate', "literal", True),
+        (SCHEMA.gender, 'gender', "literal", True),
+        (SCHEMA.knowsLanguage, 'knowsLanguage', "literal", True)
+    ]),
+    # Personnel share the URI of their Person; the class and identifier are only added for
+    # personnel without a Person record (see add_table)
+    'HealthcarePersonnel': ("Person", SCHEMA.Person, [
+        (SCHEMA.worksFor, 'institution', "HealthcareOrganization", True),
+        (SCHEMA.memberOf, 'department', "ServiceDepartment", True),
+        (SCHEMA.jobTitle, 'jobTitle', "literal", True),
+        (SCHEMA.email, 'email', "literal", True)
+    ]),
+    'Address': ("Address", SCHEMA.PostalAddress, [
+        (SCHEMA.identifier, 'identifier', "literal", False),
+        (SCHEMA.streetAddress, 'text', "literal", True),
+        (RDFS.label, 'text', "literal", True),
+        (SCHEMA.addressLocality, 'city', "literal", True),
+        (SCHEMA.postalCode, 'postalCode', "literal", True),
+        (SCHEMA.addressCountry, 'country', "literal", True)
+    ])
+}
+
+# Order in which the tables are added, with the name used in progress messages
+GRAPH_ORDER = [
+    ('HealthcareOrganization', "Healthcare Organizations"),
+    ('ServiceDepartment', "Service Departments"),
+    ('ContactPoint', "Contact Points"),
+    ('Person', "Persons"),
+    ('HealthcarePersonnel', "Healthcare Personnel"),
+    ('Address', "Addresses")
+]
+
+
+def _uris(path, values):
+    # One URIRef per value, formatted the way f"{EX}{path}/{value}" formats it
+    return [URIRef(f"{EX}{path}/{value}") for value in values.tolist()]
+
+
+def add_table(g, entity_type, df, person_ids=None):
     """
-    Process entities for both original and replacement graphs using the same function
+    Add the triples of one table to a graph, one property (column) at a time
     
     Args:
-        entity_type: String name of the entity type (for logging)
-        original_df: DataFrame for original graph
-        var_df: DataFrame for replacement graph
-        process_func: Function to process a single row for a graph
+        g: Graph receiving the triples
+        entity_type: Entity type name from TRIPLE_MAPS
+        df: Table of the entity type
+        person_ids: For HealthcarePersonnel, the Person identifiers of the same dataset; personnel
+            without a Person record get the Person class and identifier themselves
     """
-    print(f"  - Adding {entity_type}...")
-    
-    # Process each dataset with its corresponding graph
-    for name, (df, graph) in [("Original", (original_df, g_original)), 
-                              ("Variant", (var_df, g_var))]:
-        for _, row in df.iterrows():
-            process_func(graph, row)
-
-# ---- HEALTHCARE ORGANIZATIONS ----
-def process_org(g, row):
-    org_uri = URIRef(f"{EX}HealthcareOrganization/{row['identifier']}")
-    
-    # Use only schema.org class
-    g.add((org_uri, RDF.type, SCHEMA.MedicalOrganization))
-    
-    g.add((org_uri, SCHEMA.identifier, Literal(row['identifier'], datatype=XSD.string)))
-    g.add((org_uri, SCHEMA.name, Literal(row['healthcareOrganizationName'], datatype=XSD.string)))
-    g.add((org_uri, RDFS.label, Literal(row['healthcareOrganizationName'], datatype=XSD.string)))  # <-- Add this line
-    
-    # Add address 
-    address_uri = URIRef(f"{EX}Address/{row['address']}")
-    g.add((org_uri, SCHEMA.address, address_uri))
-    
-    contact_point_uri = URIRef(f"{EX}ContactPoint/{row['contactPoint']}")
-    g.add((org_uri, SCHEMA.contactPoint, contact_point_uri))
-
-process_entity("Healthcare Organizations", healthcare_org_df, healthcare_org_df_var, process_org)
-
-# ---- SERVICE DEPARTMENTS ----
-def process_dept(g, row):
-    dept_uri = URIRef(f"{EX}ServiceDepartment/{row['identifier']}")
-    
-    # Use only schema.org class
-    g.add((dept_uri, RDF.type, SCHEMA.Department))
-    
-    g.add((dept_uri, SCHEMA.identifier, Literal(row['identifier'], datatype=XSD.string)))
-    g.add((dept_uri, SCHEMA.name, Literal(row['serviceDepartmentName'], datatype=XSD.string)))
-    g.add((dept_uri, RDFS.label, Literal(row['serviceDepartmentName'], datatype=XSD.string)))  # <-- Add this line
-    
-    # Add address
-    address_uri = URIRef(f"{EX}Address/{row['address']}")
-    g.add((dept_uri, SCHEMA.address, address_uri))
-    
-    # Link to parent organization if specified
-    org_uri = URIRef(f"{EX}HealthcareOrganization/{row['isPartOf']}")
-    g.add((dept_uri, SCHEMA.parentOrganization, org_uri))
-    
-    contact_point_uri = URIRef(f"{EX}ContactPoint/{row['contactPoint']}")
-    g.add((dept_uri, SCHEMA.contactPoint, contact_point_uri))
-
-process_entity("Service Departments", service_dept_df, service_dept_df_var, process_dept)
-
-# ---- CONTACT POINTS ----
-def process_contact(g, row):
-    contact_point_uri = URIRef(f"{EX}ContactPoint/{row['identifier']}")
-    
-    g.add((contact_point_uri, RDF.type, SCHEMA.ContactPoint))
-    
-    # Add contact point properties
-    g.add((contact_point_uri, SCHEMA.identifier, Literal(row['identifier'], datatype=XSD.string)))
-    g.add((contact_point_uri, SCHEMA.contactType, Literal(row['contactType'], datatype=XSD.string)))
-    g.add((contact_point_uri, RDFS.label, Literal(row['contactType'], datatype=XSD.string)))
-
-    g.add((contact_point_uri, SCHEMA.telephone, Literal(row['phone'], datatype=XSD.string)))
-    g.add((contact_point_uri, SCHEMA.email, Literal(row['email'], datatype=XSD.string)))
-    g.add((contact_point_uri, SCHEMA.availableLanguage, Literal(row['availableLanguage'], datatype=XSD.string)))
-    g.add((contact_point_uri, SCHEMA.faxNumber, Literal(row['fax'], datatype=XSD.string)))
-
-process_entity("Contact Points", contact_point_df, contact_point_df_var, process_contact)
-
-# ---- PERSONS ----
-def process_person(g, row):
-    person_uri = URIRef(f"{EX}Person/{row['identifier']}")
-    
-    # Define this entity as a Person according to schema.org
-    g.add((person_uri, RDF.type, SCHEMA.Person))
-    
-    # Add properties with datatypes
-    g.add((person_uri, SCHEMA.identifier, Literal(row['identifier'], datatype=XSD.string)))
-    g.add((person_uri, SCHEMA.name, Literal(row['personName'], datatype=XSD.string)))
-    g.add((person_uri, RDFS.label, Literal(row['personName'], datatype=XSD.string)))  # <-- Add this line
-    
-    # Add birthDate if available - use date datatype
-    if pd.notnull(row.get('birthDate')):
-        g.add((person_uri, SCHEMA.birthDate, Literal(row['birthDate'], datatype=XSD.string)))
-    
-    # Add gender if available
-    if pd.notnull(row.get('gender')):
-        g.add((person_uri, SCHEMA.gender, Literal(row['gender'], datatype=XSD.string)))
-    
-    # Add language if available
-    if pd.notnull(row.get('knowsLanguage')):
-        g.add((person_uri, SCHEMA.knowsLanguage, Literal(row['knowsLanguage'], datatype=XSD.string)))
-
-process_entity("Persons", Person_df, Person_df_var, process_person)
-
-# ---- HEALTHCARE PERSONNEL ----
-def process_personnel(g, row, person_df):
-    personnel_id = row['identifier']
-    
-    # Find matching Person record if it exists
-    matching_person = person_df[person_df['identifier'] == personnel_id]
-    has_person_data = not matching_person.empty
-    
-    # Use the person URI directly - no separate personnel_uri variable needed
-    person_uri = URIRef(f"{EX}Person/{personnel_id}")
-    
-    # Only add type and identifier if it doesn't already exist as a Person
-    if not has_person_data:
-        g.add((person_uri, RDF.type, SCHEMA.Person))
-        g.add((person_uri, SCHEMA.identifier, Literal(personnel_id, datatype=XSD.string)))
+    path, rdf_class, properties = TRIPLE_MAPS[entity_type]
+    typed = df['identifier']
+    if entity_type == 'HealthcarePersonnel':
+        typed = typed[~typed.isin(person_ids if person_ids is not None else [])]
+    subjects = _uris(path, df['identifier'])
+    g.addN((subject, RDF.type, rdf_class, g) for subject in _uris(path, typed))
+    if entity_type == 'HealthcarePersonnel':
+        g.addN((subject, SCHEMA.identifier, Literal(value, datatype=XSD.string), g)
+               for subject, value in zip(_uris(path, typed), typed.tolist()))
+    for predicate, column, kind, skip_missing in properties:
+        if column not in df.columns:
+            continue
+        values = df[column]
+        present = values.notna().to_numpy() if skip_missing else None
+        column_subjects = [subject for subject, keep in zip(subjects, present) if keep] if skip_missing else subjects
+        values = values[present] if skip_missing else values
+        if kind == "literal":
+            objects = [Literal(value, datatype=XSD.string) for value in values.tolist()]
+        else:
+            objects = _uris(kind, values)
+        g.addN((subject, predicate, value, g) for subject, value in zip(column_subjects, objects))
+
+
+def build_graph(tables, name="Original", verbose=False):
+    """
+    Build the knowledge graph of one dataset
     
-    # Link to institution if available
-    if pd.notnull(row.get('institution')):
-        org_uri = URIRef(f"{EX}HealthcareOrganization/{row['institution']}")
-        g.add((person_uri, SCHEMA.worksFor, org_uri))
+    Args:
+        tables: Dict mapping entity type to DataFrame (missing entity types are skipped)
+        name: Dataset name used in the progress messages
+        verbose: Print a line per entity type
     
-    # Link to department if available
-    if pd.notnull(row.get('department')):
-        dept_uri = URIRef(f"{EX}ServiceDepartment/{row['department']}")
-        g.add((person_uri, SCHEMA.memberOf, dept_uri))
+    Returns:
+        Graph
+    """
+    g = new_graph()
+    person_ids = tables['Person']['identifier'] if 'Person' in tables else None
+    for entity_type, label in GRAPH_ORDER:
+        df = tables.get(entity_type)
+        if df is None:
+            continue
+        if verbose:
+            print(f"  - Adding {label} ({name})...")
+        with instrumentation.stage("add_table", records=len(df), entity_type=entity_type):
+            add_table(g, entity_type, df, person_ids)
+    return g
+
+
+def build_graphs(original, variant, verbose=True):
+    """
+    Build the original and variant knowledge graphs
     
-    # Add job title if available
-    if pd.notnull(row.get('jobTitle')):
-        g.add((person_uri, SCHEMA.jobTitle, Literal(row['jobTitle'], datatype=XSD.string)))
+    Args:
+        original: Dict mapping entity type to DataFrame for the original graph (e.g. from tables.read_tables
+            or straight from an in-memory pipeline)
+        variant: Dict mapping entity type to DataFrame for the variant graph
+        verbose: Print a line per entity type and graph
     
-    # Add email if available
-    if pd.notnull(row.get('email')):
-        g.add((person_uri, SCHEMA.email, Literal(row['email'], datatype=XSD.string)))
-
-# Special case for personnel since it needs person dataframe too
-print("  - Adding Healthcare Personnel...")
-for _, row in HealthcarePersonnel_df.iterrows():
-    process_personnel(g_original, row, Person_df)
+    Returns:
+        Tuple of (original graph, variant graph)
+    """
+    return build_graph(original, "Original", verbose), build_graph(variant, "Variant", verbose)
 
-for _, row in HealthcarePersonnel_df_var.iterrows():
-    process_personnel(g_var, row, Person_df_var)
 
-# ---- ADDRESSES ----
-def process_address(g, row):
-    address_uri = URIRef(f"{EX}Address/{row['identifier']}")
-    
-    g.add((address_uri, RDF.type, SCHEMA.PostalAddress))
-    
-    g.add((address_uri, SCHEMA.identifier, Literal(row['identifier'], datatype=XSD.string)))
-    
-    if pd.notnull(row.get('text')):
-        g.add((address_uri, SCHEMA.streetAddress, Literal(row['text'], datatype=XSD.string)))
-        g.add((address_uri, RDFS.label, Literal(row['text'], datatype=XSD.string)))  # <-- Add this line
-    
-
-    if pd.notnull(row.get('city')):
-        g.add((address_uri, SCHEMA.addressLocality, Literal(row['city'], datatype=XSD.string)))
+def append_graph(tables, destination, format=None):
+    """
+    Append the triples of new entities to a stored knowledge graph file without loading it
+    Turtle and N-Triples files may contain several documents one after the other (prefixes can be
+    declared again), so the new triples are serialized on their own and added to the end of the file.
     
-    if pd.notnull(row.get('postalCode')):
-        g.add((address_uri, SCHEMA.postalCode, Literal(row['postalCode'], datatype=XSD.string)))
+    Args:
+        tables: Dict mapping entity type to DataFrame with only the new records
+        destination: Graph file; created if it does not exist
+        format: rdflib format name; guessed from the file extension by default
     
-    if pd.notnull(row.get('country')):
-        g.add((address_uri, SCHEMA.addressCountry, Literal(row['country'], datatype=XSD.string)))
-
-process_entity("Addresses", Address_df, Address_df_var, process_address)
-
-# ============= 5. SAVE KNOWLEDGE GRAPHS =============
-
-print("\n5. Saving knowledge graphs...")
-# Save the graphs
-g_original.serialize(destination=f"src/Knowledge Graphs/test.ttl", format="turtle")
-g_var.serialize(destination=f"src/Knowledge Graphs/test.ttl", format="turtle")
-
-print("\nDone! Created:")
-print("  - healthcare_graph_original.ttl - Graph using original data")
-print("  - healthcare_graph_replaced.ttl - Graph with replaced instances")
-
-
+    Returns:
+        Number of triples appended
+    """
+    from rdflib.util import guess_format
+    g = build_graph(tables, "Appended")
+    with instrumentation.stage("serialize_append", records=len(g)):
+        data = g.serialize(format=format or guess_format(destination) or "turtle", encoding="utf-8")
+        with open(destination, 'ab') as f:
+            f.write(b"\n" + data)
+    return len(g)
+
+
+def main():
+    print("===== HEALTHCARE KNOWLEDGE GRAPH GENERATOR =====")
+
+    # ============= 1. DATA LOADING =============
+
+    print("\n1. Loading CSV data...")
+    #Load CSV files
+    healthcare_org_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/HealthcareOrganization.csv")
+    service_dept_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/ServiceDepartment.csv")
+    Address_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/Address.csv")
+    HealthcarePersonnel_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/HealthcarePersonnel.csv")
+    Person_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/Person.csv")
+    contact_point_df = pd.read_csv("src/Data_Source/Sample_15_test/sample_relation/ContactPoint.csv")
+
+    # sound = "low"
+
+    # healthcare_org_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/HealthcareOrganization_{sound}.csv")
+    # service_dept_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/ServiceDepartment_{sound}.csv")
+    # Address_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/Address_{sound}.csv")
+    # HealthcarePersonnel_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/HealthcarePersonnel_{sound}.csv")
+    # Person_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/Person_{sound}.csv")
+    # contact_point_df = pd.read_csv(f"src/Data_Source/Sample_35_train/train_struct/ContactPoint_{sound}.csv")
+
+    # healthcare_org_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/HealthcareOrganization.csv")
+    # service_dept_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/ServiceDepartment.csv")
+    # Address_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/Address.csv")
+    # HealthcarePersonnel_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/HealthcarePersonnel.csv")
+    # Person_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/Person.csv")
+    # contact_point_df = pd.read_csv(f"src/Data_Source/Sample_35_train/traindata_dupe/ContactPoint.csv")
+
+
+    # noise = 'low'
+    # # Load variant CSV files
+    # healthcare_org_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/HealthcareOrganization_{noise}.csv")
+    # service_dept_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/ServiceDepartment_{noise}.csv")
+    # Address_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/Address_{noise}.csv")
+    # HealthcarePersonnel_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/HealthcarePersonnel_{noise}.csv")
+    # Person_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/Person_{noise}.csv")
+    # contact_point_df_var = pd.read_csv(f"src/Data_Source/Sample_15_test/sample_struct/ContactPoint_{noise}.csv")
+
+    #Load variant CSV files
+    healthcare_org_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/HealthcareOrganization.csv")
+    service_dept_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/ServiceDepartment.csv")
+    Address_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/Address.csv")
+    HealthcarePersonnel_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/HealthcarePersonnel.csv")
+    Person_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/Person.csv")
+    contact_point_df_var = pd.read_csv(f"src/Data_Source/Sample_35_train/train_relation/ContactPoint.csv")
+
+    original = {
+        'HealthcareOrganization': healthcare_org_df,
+        'ServiceDepartment': service_dept_df,
+        'Address': Address_df,
+        'HealthcarePersonnel': HealthcarePersonnel_df,
+        'Person': Person_df,
+        'ContactPoint': contact_point_df
+    }
+    variant = {
+        'HealthcareOrganization': healthcare_org_df_var,
+        'ServiceDepartment': service_dept_df_var,
+        'Address': Address_df_var,
+        'HealthcarePersonnel': HealthcarePersonnel_df_var,
+        'Person': Person_df_var,
+        'ContactPoint': contact_point_df_var
+    }
+
+    # ============= 3. CREATE AND POPULATE KNOWLEDGE GRAPHS =============
+
+    print("\n4. Creating knowledge graphs...")
+    g_original, g_var = build_graphs(original, variant)
+
+    # ============= 5. SAVE KNOWLEDGE GRAPHS =============
+
+    print("\n5. Saving knowledge graphs...")
+    # Save the graphs
+    with instrumentation.stage("serialize_turtle_Original", records=len(g_original)):
+        g_original.serialize(destination=f"src/Knowledge Graphs/test.ttl", format="turtle")
+    with instrumentation.stage("serialize_turtle_Variant", records=len(g_var)):
+        g_var.serialize(destination=f"src/Knowledge Graphs/test.ttl", format="turtle")
+
+    instrumentation.write_summary('kg_summary.json')
+
+    print("\nDone! Created:")
+    print("  - healthcare_graph_original.ttl - Graph using original data")
+    print("  - healthcare_graph_replaced.ttl - Graph with replaced instances")
+
+
+if __name__ == "__main__":
+    main()
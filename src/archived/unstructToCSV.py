@@ -1,19 +1,24 @@
-import stanza
 import re
 from dateutil import parser
-import pandas as pd
 import uuid
 
-# Download and initialize Stanza pipeline (first time only)
-# Comment this out after first run if you don't want to download each time
-stanza.download('en')
-nlp = stanza.Pipeline('en', processors='tokenize,mwt,pos,lemma,ner')
+# The Stanza model is downloaded and loaded on the first extraction, not at import time
+nlp = None
+
+def get_nlp():
+    """Download (first time only) and build the Stanza pipeline on first use"""
+    global nlp
+    if nlp is None:
+        import stanza
+        stanza.download('en')
+        nlp = stanza.Pipeline('en', processors='tokenize,mwt,pos,lemma,ner')
+    return nlp
 
 def extract_entities_from_story(text):
     """Extract structured information from a healthcare professional story using Stanza."""
     
     # Process with Stanza
-    doc = nlp(text)
+    doc = get_nlp()(text)
     
     # Initialize entity containers
     entities = {
@@ -278,11 +283,8 @@ story4 = """Amy Kaiser is a renowned Sleep Technician working at Robbins Group Z
 
 story5 = """Danielle Beasley, a respected Neurological Nurse, serves patients at Peterson LLC Zorg. Located at Lisahof 123 in Groesbeek, Netherlands, Danielle, born January 16, 1963, offers outstanding neurological care. Reach Danielle at daniellebeasley@healthcare.org or call (0323) 659927."""
 
-# Example extraction
-extracted_data = extract_entities_from_story(story1)
-#print("Example extraction:", extracted_data)
-
 def convert_to_dataframes(stories):
+    import pandas as pd
     all_entities = []
     
     for story in stories:
@@ -307,24 +309,28 @@ def convert_to_dataframes(stories):
         "ContactPoint": contact_points_df
     }
 
-# Process all stories
-all_stories = [story1, story2, story3, story4, story5]
-dfs = convert_to_dataframes(all_stories)
+if __name__ == "__main__":
+    # Example extraction
+    extracted_data = extract_entities_from_story(story1)
+    #print("Example extraction:", extracted_data)
 
+    # Process all stories
+    all_stories = [story1, story2, story3, story4, story5]
+    dfs = convert_to_dataframes(all_stories)
 
 
-# Print summary of extracted entities
-print("\nExtraction summary:")
-for entity_type, df in dfs.items():
-    print(f"{entity_type}: {len(df)} records")
 
-# Save to CSV files
-# output_dir = "src/data/unstructured/"
-# import os
-# if not os.path.exists(output_dir):
-#     os.makedirs(output_dir)
+    # Print summary of extracted entities
+    print("\nExtraction summary:")
+    for entity_type, df in dfs.items():
+        print(f"{entity_type}: {len(df)} records")
 
-# for entity_name, df in dfs.items():
-#     df.to_csv(f"{output_dir}{entity_name}.csv", index=False)
-#     print(f"Saved {entity_name}.csv with {len(df)} records")
+    # Save to CSV files
+    # output_dir = "src/data/unstructured/"
+    # import os
+    # if not os.path.exists(output_dir):
+    #     os.makedirs(output_dir)
 
+    # for entity_name, df in dfs.items():
+    #     df.to_csv(f"{output_dir}{entity_name}.csv", index=False)
+    #     print(f"Saved {entity_name}.csv with {len(df)} records")
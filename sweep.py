@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import itertools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import instrumentation
+import pipeline
+import tables
+# Parameter sweep over the pipeline: every combination of a grid of
+# (split, kind, level, variation_rate, delete_rate) is built in a process pool.
+# The source tables are generated (or read) and split once in the parent and written as
+# Arrow IPC files (tables.write_mapped); workers memory-map them instead of unpickling them,
+# so worker start-up is cheap and the pages are shared between all workers.
+# Each dataset directory gets a manifest with the fingerprint of its inputs, and combinations
+# whose manifest matches are skipped, so rerunning a sweep only builds what changed.
+#   python sweep.py [grid.json] [workers]
+# grid.json holds {"spec": {...pipeline spec...}, "grid": {...}}; both parts are optional.
+
+GRID_KEYS = ("split", "kind", "level", "variation_rate", "delete_rate")
+
+# The train/test x low/medium/high x struct/relation suite
+DEFAULT_GRID = {
+    "split": ["train", "test"],
+    "kind": ["struct", "relation"],
+    "level": ["low", "medium", "high"]
+}
+
+MANIFEST = "_sweep.json"
+
+# Split tables of an in-process sweep, or the directory of the memory-mapped split tables in a worker
+_shared = {}
+
+
+def expand_grid(grid, splits=None):
+    """
+    Expand a grid into the list of jobs to build
+    Args:
+        grid: Dict mapping keys of GRID_KEYS to lists of values. A missing split uses the given splits
+            (or the DEFAULT_GRID splits), a missing kind the DEFAULT_GRID kinds and a missing level "low";
+            missing rates use the pipeline presets
+        splits: Splits of the spec, used when the grid has no split
+    Returns:
+        List of job dicts; variation_rate is only kept for syntactic jobs and delete_rate only
+        for struct/relation jobs, so combinations that do not apply are built once
+    """
+    defaults = {"split": list(splits or DEFAULT_GRID["split"]), "kind": DEFAULT_GRID["kind"], "level": ["low"]}
+    jobs, seen = [], set()
+    for combination in itertools.product(*(grid.get(key) or defaults.get(key) or [None] for key in GRID_KEYS)):
+        job = dict(zip(GRID_KEYS, combination))
+        if job["kind"] == "syntactic":
+            job["delete_rate"] = None
+        else:
+            job["variation_rate"] = None
+        job = {key: value for key, value in job.items() if value is not None}
+        key = tuple(sorted(job.items()))
+        if key not in seen:
+            seen.add(key)
+            jobs.append(job)
+    return jobs
+
+
+def job_dataset(job):
+    """Pipeline dataset entry of a job"""
+    return {key: job[key] for key in ("kind", "variation_rate", "delete_rate") if key in job}
+
+
+def source_signature(spec):
+    """What the source tables depend on: the source CSV files (size and mtime) or the generator settings"""
+    if spec.get("source"):
+        files = sorted(f for f in os.listdir(spec["source"]) if f.endswith(".csv"))
+        stats = [os.stat(os.path.join(spec["source"], f)) for f in files]
+        return [(f, stat.st_size, stat.st_mtime_ns) for f, stat in zip(files, stats)]
+    return spec["generate"]
+
+
+def fingerprint(spec, job, signature):
+    """Hash of everything a job's outputs depend on"""
+    inputs = {"job": job, "seed": spec["seed"], "split": spec["split"], "source": signature,
+              "convert": spec.get("convert"), "features": spec.get("features"),
+              "negatives": spec.get("negatives"), "database": spec.get("database"), "write": spec["write"]}
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def manifest_path(spec, job):
+    name = pipeline.dataset_name(job_dataset(job), job["level"])
+    return os.path.join(pipeline.output_paths(spec["output_dir"], job["split"], name)["tables"], MANIFEST)
+
+
+def up_to_date(spec, job, digest):
+    """True if the job's manifest matches the fingerprint and all outputs it lists still exist"""
+    path = manifest_path(spec, job)
+    if not os.path.exists(path):
+        return False
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest.get("fingerprint") == digest and all(os.path.exists(p) for p in manifest.get("outputs", []))
+
+
+def _init_worker(directory):
+    _shared["directory"] = directory
+
+
+def _split_tables(split_name):
+    # A worker opens each split once and keeps it for its later jobs. The text columns are backed by
+    # the memory-mapped Arrow files, so all workers share the same pages and a job only copies the
+    # columns its stages change
+    if "splits" in _shared:
+        return _shared["splits"][split_name]
+    opened = _shared.setdefault("opened", {})
+    if split_name not in opened:
+        opened[split_name] = tables.read_mapped(os.path.join(_shared["directory"], split_name))
+    return opened[split_name]
+
+
+def run_job(spec, job, digest):
+    """
+    Build and write one dataset of the sweep (runs in a worker process)
+    Returns:
+        Tuple of (job, written paths, seconds)
+    """
+    start = time.perf_counter()
+    split_tables = _split_tables(job["split"])
+    dataset = job_dataset(job)
+    name = pipeline.dataset_name(dataset, job["level"])
+    variant, golden = pipeline.build_dataset(split_tables, dataset, job["level"], pipeline.stage_seed(spec, job["split"], name))
+    _, written = pipeline.finish_dataset(spec, job["split"], name, split_tables, variant, golden)
+    # The manifest is written last, so an interrupted job is rebuilt on the next run
+    path = manifest_path(spec, job)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": digest, "job": job, "outputs": written}, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+    return job, written, time.perf_counter() - start
+
+
+def sweep(spec=None, grid=None, workers=None, force=False):
+    """
+    Build every combination of a grid, in parallel
+    Args:
+        spec: Pipeline spec dict or path to a JSON spec (its datasets key is ignored; its splits are
+            only used when the grid has no split)
+        grid: Dict mapping keys of GRID_KEYS to lists of values (defaults to DEFAULT_GRID)
+        workers: Number of worker processes (defaults to the CPU count; 1 runs in this process)
+        force: Rebuild combinations that are up to date
+    Returns:
+        Dict with lists of 'built' (job, paths, seconds) tuples and 'skipped' jobs
+    """
+    spec = pipeline.load_spec(spec)
+    jobs = expand_grid(grid or DEFAULT_GRID, spec["splits"])
+    signature = source_signature(spec)
+    digests = [fingerprint(spec, job, signature) for job in jobs]
+    pending = [(job, digest) for job, digest in zip(jobs, digests) if force or not up_to_date(spec, job, digest)]
+    results = {"built": [], "skipped": [job for job, digest in zip(jobs, digests) if (job, digest) not in pending]}
+    if not pending:
+        return results
+
+    with instrumentation.stage("sweep_source"):
+        splits = pipeline.split_source(pipeline.load_source(spec), spec)
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    with instrumentation.stage("sweep_jobs", records=len(pending)):
+        if workers == 1:
+            _shared["splits"] = splits
+            results["built"] = [run_job(spec, job, digest) for job, digest in pending]
+        else:
+            os.makedirs(spec["output_dir"], exist_ok=True)
+            directory = tempfile.mkdtemp(prefix="_shared_", dir=spec["output_dir"])
+            try:
+                for split_name in {job["split"] for job, _ in pending}:
+                    tables.write_mapped(splits[split_name], os.path.join(directory, split_name))
+                with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(directory,)) as pool:
+                    futures = [pool.submit(run_job, spec, job, digest) for job, digest in pending]
+                    results["built"] = [future.result() for future in as_completed(futures)]
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+    _shared.clear()
+    instrumentation.write_summary("sweep_summary.json")
+    return results
+
+
+if __name__ == "__main__":
+    config = {}
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            config = json.load(f)
+    results = sweep(config.get("spec"), config.get("grid"), int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    for job, paths, seconds in results["built"]:
+        print(f"built {pipeline.dataset_name(job_dataset(job), job['level'])} ({job['split']}) in {seconds:.1f}s")
+    print(f"{len(results['built'])} built, {len(results['skipped'])} up to date")
@@ -0,0 +1,173 @@
+import os
+import pandas as pd
+from schema import ENTITY_TYPES, FIELDS
+from entity_records import records_to_columns
+# Column-oriented in-memory tables shared by the generator, variator, splitter and KG converter.
+# A dataset is a dict mapping entity type to a pandas DataFrame whose columns follow schema.FIELDS
+# (extra columns such as "anchor" are kept after the schema columns). Stages hand these dicts to
+# each other directly, so a whole pipeline can run in one process; CSV is only read or written at the edges.
+
+
+def table(entity_type, data=None):
+    """
+    Build a table for an entity type with the schema columns in order
+    Args:
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        data: DataFrame, dict of columns (lists or NumPy arrays), list of records/dicts, or None for an empty table
+    Returns:
+        DataFrame
+    """
+    fields = FIELDS[entity_type]
+    if data is None:
+        return pd.DataFrame({field: pd.Series(dtype=object) for field in fields})
+    if isinstance(data, list):
+        data = records_to_columns(data, list(data[0]) if data else fields)
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    return conform(entity_type, df)
+
+
+def conform(entity_type, df):
+    """Reorder (and add missing) schema columns, keeping extra columns at the end"""
+    fields = FIELDS[entity_type]
+    if list(df.columns[:len(fields)]) == fields:
+        return df
+    extras = [column for column in df.columns if column not in fields]
+    return df.reindex(columns=fields + extras)
+
+
+def dataset(data):
+    """
+    Turn a dict of entity type -> records/columns/DataFrame (e.g. the result of data_creator.generate_dataset)
+    into a dict of tables
+    """
+    return {entity_type: table(entity_type, data[entity_type]) for entity_type in ENTITY_TYPES if entity_type in data}
+
+
+def read_tables(directory, suffix="", entity_types=ENTITY_TYPES):
+    """
+    Read the CSV files of a dataset
+    Args:
+        directory: Directory with <EntityType><suffix>.csv files
+        suffix: File name suffix, e.g. "_s" or "_low"
+        entity_types: Entity types to read (missing files are skipped)
+    Returns:
+        Dict mapping entity type to DataFrame
+    """
+    tables = {}
+    for entity_type in entity_types:
+        path = os.path.join(directory, f"{entity_type}{suffix}.csv")
+        if os.path.exists(path):
+            tables[entity_type] = conform(entity_type, pd.read_csv(path))
+    return tables
+
+
+def write_tables(tables, directory, suffix="", columns="schema"):
+    """
+    Write a dataset as CSV files
+    Args:
+        tables: Dict mapping entity type to DataFrame
+        directory: Output directory (created if needed)
+        suffix: File name suffix
+        columns: "schema" to write only the schema columns, "all" to keep extra columns such as anchor
+    Returns:
+        List of written paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for entity_type, df in tables.items():
+        path = os.path.join(directory, f"{entity_type}{suffix}.csv")
+        out = df[[c for c in FIELDS[entity_type] if c in df.columns]] if columns == "schema" else df
+        out.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Memory-mapped tables need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def write_mapped(tables, directory):
+    """
+    Write a dataset as one uncompressed Arrow IPC (Feather) file per table so other processes can
+    memory-map it. Text columns (lists as their CSV string form) are stored as Arrow large strings.
+    Args:
+        tables: Dict mapping entity type to DataFrame
+        directory: Output directory
+    Returns:
+        List of written paths
+    """
+    pa = _pyarrow()
+    from pyarrow import feather
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for entity_type, df in tables.items():
+        arrays = []
+        for column in df.columns:
+            values = df[column]
+            if values.dtype == object or pd.api.types.is_string_dtype(values):
+                text = values.astype(object)
+                text = text.where(text.isna(), text.astype(str))
+                arrays.append(pa.array(text.to_numpy(), type=pa.large_string(), from_pandas=True))
+            else:
+                arrays.append(pa.array(values.to_numpy(), from_pandas=True))
+        path = os.path.join(directory, f"{entity_type}.arrow")
+        feather.write_feather(pa.table(arrays, names=list(df.columns)), path, compression="uncompressed")
+        paths.append(path)
+    return paths
+
+
+def open_mapped(directory, entity_types=ENTITY_TYPES):
+    """
+    Memory-map a dataset written by write_mapped. Nothing is read until a column is used,
+    and the pages are shared by every process that maps the same files.
+    Returns:
+        Dict mapping entity type to a pyarrow.Table whose buffers point into the mapped file
+    """
+    pa = _pyarrow()
+    mapped = {}
+    for entity_type in entity_types:
+        path = os.path.join(directory, f"{entity_type}.arrow")
+        if os.path.exists(path):
+            mapped[entity_type] = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return mapped
+
+
+def mapped_table(entity_type, mapped, columns=None):
+    """
+    Build a DataFrame from a memory-mapped table without copying it: text columns become pandas
+    strings backed by the mapped Arrow buffers (missing values are NaN), so columns a stage only reads
+    stay shared pages and a stage that changes a column gets its own copy of that column only
+    Args:
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        mapped: pyarrow.Table from open_mapped
+        columns: Optional list of the columns to include (all by default)
+    """
+    pa = _pyarrow()
+    if columns is not None:
+        mapped = mapped.select([column for column in columns if column in mapped.column_names])
+    df = mapped.to_pandas(types_mapper={pa.large_string(): pd.StringDtype("pyarrow_numpy")}.get)
+    return conform(entity_type, df) if columns is None else df
+
+
+def read_mapped(directory, entity_types=ENTITY_TYPES, columns=None):
+    """
+    Open a dataset written by write_mapped as a dict of tables backed by the mapped files
+    Args:
+        columns: Optional dict entity type -> list of the columns to include
+    """
+    return {entity_type: mapped_table(entity_type, mapped, (columns or {}).get(entity_type))
+            for entity_type, mapped in open_mapped(directory, entity_types).items()}
+
+
+def to_arrow(tables):
+    """
+    Convert a dataset to pyarrow Tables (pyarrow is only imported here)
+    Returns:
+        Dict mapping entity type to pyarrow.Table
+    """
+    pa = _pyarrow()
+    return {entity_type: pa.Table.from_pandas(df, preserve_index=False) for entity_type, df in tables.items()}
@@ -0,0 +1,67 @@
+import random
+import pytest
+from faker import Faker
+import checkpoint
+import data_creator
+import pipeline
+import variation_helpers
+
+
+def crash_after(monkeypatch, saves):
+    """Make checkpoint.save raise KeyboardInterrupt once it has written the given number of checkpoints"""
+    save, calls = checkpoint.save, []
+
+    def failing(*args, **kwargs):
+        save(*args, **kwargs)
+        calls.append(1)
+        if len(calls) == saves:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(checkpoint, "save", failing)
+
+
+def generated(**kwargs):
+    random.seed(5)
+    Faker.seed(5)
+    dataset = data_creator.generate_dataset(12, **kwargs)
+    return {entity_type: [record.to_row() for record in records] for entity_type, records in dataset.items()}
+
+
+@pytest.mark.parametrize("saves", [1, 2, 4])
+def test_generation_resume_equals_uninterrupted_run(tmp_path, monkeypatch, saves):
+    monkeypatch.setattr(data_creator, "CHECKPOINT_EVERY", 3)
+    expected = generated()
+    with monkeypatch.context() as patch:
+        crash_after(patch, saves)
+        with pytest.raises(KeyboardInterrupt):
+            generated(checkpoint_dir=str(tmp_path))
+    # Other draws in between must not change the resumed run
+    random.seed(999)
+    Faker.seed(999)
+    assert generated(checkpoint_dir=str(tmp_path), resume=True) == expected
+
+
+@pytest.mark.parametrize("failing_call", [5, 40])
+def test_variation_resume_equals_uninterrupted_run(tmp_path, monkeypatch, failing_call):
+    calls = {"count": 0, "fail_at": None}
+
+    def translate(text, lang):
+        calls["count"] += 1
+        if calls["fail_at"] and calls["count"] >= calls["fail_at"]:
+            raise RuntimeError("rate limited")
+        return f"{lang}:{text}"
+    monkeypatch.setattr(variation_helpers, "translate", translate)
+    monkeypatch.setattr(variation_helpers, "checkpoint_every", 20)
+    spec = {"generate": {"num_organizations": 12}, "write": {"datasets": False, "golden": False}, "splits": ["train"],
+            "datasets": [{"kind": "syntactic", "levels": ["high"], "planner": False}]}
+
+    def run(**options):
+        dataset = pipeline.run(dict(spec, **options))["datasets"][("train", "syntactic_high")]
+        return dataset["golden"], dataset["tables"]
+    golden, variant = run()
+    calls["fail_at"] = failing_call
+    with pytest.raises(RuntimeError):
+        run(checkpoint_dir=str(tmp_path))
+    calls["fail_at"] = None
+    resumed_golden, resumed_variant = run(checkpoint_dir=str(tmp_path), resume=True)
+    assert resumed_golden.equals(golden)
+    assert all(resumed_variant[entity_type].equals(variant[entity_type]) for entity_type in variant)
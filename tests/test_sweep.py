@@ -0,0 +1,24 @@
+import sweep
+
+
+def test_expand_grid_fills_missing_keys():
+    assert sweep.expand_grid({"split": ["train"], "kind": ["struct"]}) == [{"split": "train", "kind": "struct", "level": "low"}]
+    assert sweep.expand_grid({"level": ["high"]}, splits=["test"]) == [
+        {"split": "test", "kind": "struct", "level": "high"},
+        {"split": "test", "kind": "relation", "level": "high"}
+    ]
+
+
+def test_expand_grid_keeps_rates_where_they_apply():
+    jobs = sweep.expand_grid({"split": ["train"], "kind": ["syntactic", "struct"], "variation_rate": [0.5], "delete_rate": [0.25]})
+    assert jobs == [
+        {"split": "train", "kind": "syntactic", "level": "low", "variation_rate": 0.5},
+        {"split": "train", "kind": "struct", "level": "low", "delete_rate": 0.25}
+    ]
+
+
+def test_sweep_with_partial_grid(tmp_path):
+    spec = {"generate": {"num_organizations": 6}, "output_dir": str(tmp_path), "splits": ["train"]}
+    built = sweep.sweep(spec, {"kind": ["struct"]}, workers=1)
+    assert [job for job, _, _ in built["built"]] == [{"split": "train", "kind": "struct", "level": "low"}]
+    assert sweep.sweep(spec, {"kind": ["struct"]}, workers=1)["skipped"] == [{"split": "train", "kind": "struct", "level": "low"}]
@@ -1,9 +1,13 @@
+import os
 import random
 import copy
 import uuid
-from faker import Faker
-from deep_translator import GoogleTranslator
-import pandas as pd
+import time
+import checkpoint
+import instrumentation
+from entity_records import DuplicateEntry
+# Faker, deep_translator and pandas are imported lazily, on the code paths that need them,
+# so that short variation jobs do not pay for loading them at import time
 # main file for introducing variations to entities in a dataset
 # Variation rate
 variation_rate_default = 0.2
@@ -15,6 +19,9 @@ duplicate_registry = {}
 # Add this global dictionary at the top with other globals
 variation_id_cache = {}
 
+# Variations per checkpoint of introduce_variations (when it is given a checkpoint_dir)
+checkpoint_every = 500
+
 def generate_consistent_uuid(original_id, entity_type):
     """Generate a consistent UUID based on original ID and entity type only"""
     cache_key = f"{original_id}_{entity_type}"
@@ -28,42 +35,109 @@ def register_duplicate(original_id, duplicate_id, entity_type, variation_type, f
     if original_id not in duplicate_registry:
         duplicate_registry[original_id] = []
     
-    duplicate_registry[original_id].append({
-        'duplicate_id': duplicate_id,
-        'entity_type': entity_type,
-        'variation_type': variation_type,
-        'field_name': field_name,
-        'original_value': original_value,
-        'varied_value': varied_value
-    })
-
-def introduce_variations(data_list, variation_function, variation_rate=variation_rate_default, entity_type=None, noise="low"):
+    duplicate_registry[original_id].append(DuplicateEntry.from_row(
+        (duplicate_id, entity_type, variation_type, field_name, original_value, varied_value)
+    ))
+
+def introduce_variations(data_list, variation_function, variation_rate=variation_rate_default, entity_type=None, noise="low",
+                         checkpoint_dir=None, resume=False, selected=None):
+    """
+    Vary a random sample of records and register every variation as a duplicate
+    Args:
+        data_list: List of records
+        variation_function: One of the *_variation functions
+        variation_rate: Fraction of records that get a variation
+        entity_type: Entity type name (defaults to the name of the variation function)
+        noise: "low" or "high"
+        checkpoint_dir: Directory for checkpoints every checkpoint_every variations (in a subdirectory
+            per entity type), so runs that call the translator can be resumed
+        resume: Continue from the last checkpoint; the variations and registry rows made before it are
+            restored and the random state is put back, so the result equals an uninterrupted run
+        selected: Indices of the records to vary, in order; by default a random sample of variation_rate
+            of the records (see sample_indices)
+    Returns:
+        data_list followed by the varied records
+    """
     base_entity_type = entity_type or variation_function.__name__.replace("_variation", "")
     parent_entity_type = "Person" if base_entity_type == "HealthcarePersonnel" else base_entity_type
-    selected_indices = random.sample(range(len(data_list)), int(len(data_list) * variation_rate))
-    variations = []
-    for index in selected_indices:
-        original_item = data_list[index]
-        varied_item, variation_info = variation_function(original_item, noise_severity=noise)
+    directory = os.path.join(checkpoint_dir, base_entity_type) if checkpoint_dir else None
+    state, saved = checkpoint.load(directory) if directory and resume else (None, {})
+    if state is None:
+        if directory:
+            checkpoint.clear(directory)
+        state = {"selected": list(selected) if selected is not None else sample_indices(len(data_list), variation_rate), "done": 0}
+        variations, registered = [], []
+    else:
+        checkpoint.restore_random_state(state["random_state"])
+        variations, registered = saved.get("variations", []), saved.get("registry", [])
+        for row in registered:
+            register_duplicate(*row)
+    saved_counts = {"variations": len(variations), "registry": len(registered)}
+    selected_indices = state["selected"]
+    for position in range(state["done"], len(selected_indices)):
+        original_item = data_list[selected_indices[position]]
+        if instrumentation.enabled:
+            start = time.perf_counter()
+            varied_item, variation_info = variation_function(original_item, noise_severity=noise)
+            instrumentation.record("introduce_variations", time.perf_counter() - start,
+                                   entity_type=base_entity_type, variation_type=variation_info["variation_type"])
+        else:
+            varied_item, variation_info = variation_function(original_item, noise_severity=noise)
         consistent_uuid = generate_consistent_uuid(
             original_item["identifier"], 
             parent_entity_type
         )
         varied_item["identifier"] = consistent_uuid
         variations.append(varied_item)
-        register_duplicate(
-            original_id=original_item["identifier"],
-            duplicate_id=varied_item["identifier"],
-            entity_type=base_entity_type,
-            variation_type=variation_info["variation_type"],
-            field_name=variation_info["field_name"],
-            original_value=variation_info.get("original_value", ""),
-            varied_value=variation_info.get("varied_value", "")
-        )
+        row = (original_item["identifier"], varied_item["identifier"], base_entity_type, variation_info["variation_type"],
+               variation_info["field_name"], variation_info.get("original_value", ""), variation_info.get("varied_value", ""))
+        register_duplicate(*row)
+        registered.append(row)
+        if directory and ((position + 1) % checkpoint_every == 0 or position + 1 == len(selected_indices)):
+            state.update(done=position + 1, random_state=checkpoint.random_state())
+            checkpoint.save(directory, state, {"variations": variations, "registry": registered}, saved_counts)
     return data_list + variations
 
+def sample_indices(count, variation_rate=variation_rate_default):
+    """Random sample of variation_rate of count row positions, in the order they get varied"""
+    return random.sample(range(count), int(count * variation_rate))
+
+
+def sample_records(entity_type, df, variation_rate=variation_rate_default):
+    """
+    Draw the rows to vary and build records for them only, leaving the rest of the table as columns
+    Returns:
+        List of records of the sampled rows, in sample order
+    """
+    from entity_records import frame_to_records
+    return frame_to_records(entity_type, df.iloc[sample_indices(len(df), variation_rate)])
+
+
+def introduce_table_variations(df, variation_function, variation_rate=variation_rate_default, entity_type=None, noise="low"):
+    """
+    introduce_variations for a table: returns a new DataFrame with the original rows followed by the variations
+    Only the sampled rows are turned into records; the original rows stay columns and are concatenated
+    with the variations.
+    Args:
+        df: DataFrame of one entity type (schema columns; extra columns are dropped)
+        variation_function: One of the *_variation functions
+        variation_rate: Fraction of rows that get a variation
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        noise: "low" or "high"
+    Returns:
+        DataFrame in schema column order
+    """
+    import pandas as pd
+    from entity_records import RECORD_CLASSES, records_to_frame
+    sampled = sample_records(entity_type, df, variation_rate)
+    variations = introduce_variations(sampled, variation_function, entity_type=entity_type, noise=noise,
+                                      selected=range(len(sampled)))[len(sampled):]
+    fields = list(RECORD_CLASSES[entity_type].__slots__)
+    return pd.concat([df.reindex(columns=fields), records_to_frame(variations, fields)], ignore_index=True)
+
 #### Address variations
 
+@instrumentation.timed()
 def delete_values(data_list, fields_to_delete, delete_rate=1.0):
     """
     Set specified fields fields to None for a percentage of entities in the list.
@@ -83,10 +157,149 @@ def delete_values(data_list, fields_to_delete, delete_rate=1.0):
         new_list.append(entity_copy)
     return new_list
 
+# Column order of the omission golden standards in ground_truths/
+omission_columns = ['entity_type', 'original_id', 'duplicate_id', 'variation_type', 'field_name']
+
+@instrumentation.timed()
+def delete_dataframe_values(df, fields_to_delete, delete_rate=1.0, entity_type=None, variation_type="omission",
+                            inplace=False, seed=None, anchor_column="anchor"):
+    """
+    DataFrame version of delete_values: null the specified fields for a percentage of rows.
+    One Bernoulli mask is drawn for all (row, field) pairs at once and applied column by column.
+    Args:
+        df: DataFrame of one entity type
+        fields_to_delete: List of column names to delete values from
+        delete_rate: Float between 0.0 and 1.0, fraction of rows to delete each field in
+        entity_type: Entity type written to the ground truth rows
+        variation_type: "omission" for attributes, "relation_omission" for relations
+        inplace: Modify df itself instead of a copy
+        seed: Optional seed; by default it is drawn from the random module so random.seed() still applies
+        anchor_column: Column holding the original identifier, if present
+    Returns:
+        Tuple of (DataFrame with deleted values, DataFrame of omission ground truth rows)
+    """
+    import numpy as np
+    import pandas as pd
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = np.random.default_rng(seed)
+    fields = [field for field in fields_to_delete if field in df.columns]
+    if not inplace:
+        df = df.copy()
+    mask = rng.random((len(df), len(fields))) <= delete_rate
+    for position, field in enumerate(fields):
+        df[field] = df[field].mask(mask[:, position])
+
+    # Ground truth rows in row-major order, like the per-row builders in the notebooks
+    rows, columns = np.nonzero(mask)
+    original_ids = df[anchor_column] if anchor_column in df.columns else df["identifier"]
+    golden_df = pd.DataFrame({
+        "entity_type": entity_type,
+        "original_id": original_ids.to_numpy()[rows],
+        "duplicate_id": df["identifier"].to_numpy()[rows],
+        "variation_type": variation_type,
+        "field_name": np.asarray(fields, dtype=object)[columns]
+    }, columns=omission_columns)
+    return df, golden_df
+
+def create_omission_golden_records(entity_dataframes, omitted_fields_map, variation_type="omission", anchor_column="anchor"):
+    """
+    Build the omission golden standard for all entity types from their missing values.
+    Every empty cell in an omitted field becomes one ground truth row; the cells are found
+    with a column-wise isna mask that is stacked per table and concatenated once.
+    Args:
+        entity_dataframes: Dict mapping entity type to DataFrame
+        omitted_fields_map: Dict mapping entity type to the list of omitted fields
+        variation_type: "omission" for attributes, "relation_omission" for relations
+        anchor_column: Column holding the original identifier, if present
+    Returns:
+        DataFrame with the columns of the omission golden standards in ground_truths/
+    """
+    import numpy as np
+    import pandas as pd
+    frames = []
+    for entity_type, df in entity_dataframes.items():
+        fields = [field for field in omitted_fields_map.get(entity_type, []) if field in df.columns]
+        if not fields:
+            continue
+        missing = df[fields].isna().set_axis(range(len(df)), axis=0)
+        stacked = missing.stack()
+        stacked = stacked[stacked]
+        rows = stacked.index.get_level_values(0).to_numpy()
+        original_ids = df[anchor_column] if anchor_column in df.columns else df["identifier"]
+        frames.append(pd.DataFrame({
+            "entity_type": entity_type,
+            "original_id": original_ids.to_numpy()[rows],
+            "duplicate_id": df["identifier"].to_numpy()[rows],
+            "variation_type": variation_type,
+            "field_name": np.asarray(stacked.index.get_level_values(1), dtype=object)
+        }, columns=omission_columns))
+    if not frames:
+        return pd.DataFrame(columns=omission_columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+class _LazyFaker:
+    """Stand-in for a Faker instance that only imports and builds Faker on first use"""
+    def __init__(self):
+        self._faker = None
+
+    def __getattr__(self, name):
+        if self._faker is None:
+            from faker import Faker
+            self._faker = Faker()
+        return getattr(self._faker, name)
+
+
+fake = _LazyFaker()
+
+# Translators are built once per target language on the first translation variation
+translators = {}
 
+def translate(text, target_language):
+    """Translate English text to the target language with a cached GoogleTranslator"""
+    if target_language not in translators:
+        from deep_translator import GoogleTranslator
+        translators[target_language] = GoogleTranslator(source="english", target=target_language)
+    return translators[target_language].translate(text)
 
+# Language code -> target language of the translator
+translation_languages = {"nl": "dutch", "de": "german", "et": "estonian", "en": "english"}
+# Expansions used by the country_expansion and language_expansion variations
+country_names = {"NL": "Netherlands", "AT": "Austria", "EE": "Estonia"}
+language_names = {"nl": "Dutch", "de": "German", "et": "Estonian"}
+# Organization name suffixes of data_creator.py, kept out of abbreviations and typos
+organization_suffixes = [" Zorg", " Gesundheitszentrum", " Tervisekeskus", " Healthcare"]
 
-fake = Faker()
+# Contact point table used to pick the translation language of a department
+contact_point_path = "Data_source/Baseline/ContactPoint.csv"
+contact_point_df = None
+# Contact point identifier -> first available language, built once per table
+contact_point_languages = None
+
+def load_contact_points():
+    """Read the contact point table once, the first time a department translation needs it"""
+    global contact_point_df
+    if contact_point_df is None:
+        import pandas as pd
+        contact_point_df = pd.read_csv(contact_point_path)
+    return contact_point_df
+
+def set_contact_points(df):
+    """Use an in-memory contact point table (e.g. of one split) instead of reading contact_point_path"""
+    global contact_point_df, contact_point_languages
+    contact_point_df = df
+    contact_point_languages = None
+
+def contact_point_language(identifier):
+    """First available language code of a contact point, e.g. "nl" ("" if unknown)"""
+    global contact_point_languages
+    if contact_point_languages is None:
+        df = load_contact_points()
+        # availableLanguage is "['nl', 'en']" in CSV files and a list in generated tables
+        languages = df["availableLanguage"].astype(str).str.strip('[]').str.split(',').str[0].str.strip("'")
+        contact_point_languages = dict(zip(df["identifier"], languages))
+    return contact_point_languages.get(identifier, "")
 
 def address_variation(address, noise_severity = "low"):
     """Generate variations of an address with balanced distribution"""
@@ -166,8 +379,7 @@ def address_variation(address, noise_severity = "low"):
     if selected_variation == "country_expansion":
         var = copy.deepcopy(address)
         original_country = var["country"]
-        country_map = {"NL": "Netherlands", "AT": "Austria", "EE": "Estonia"}
-        var["country"] = country_map[var["country"]]
+        var["country"] = country_names[var["country"]]
         var["identifier"] = fake.uuid4()  # Generate a new UUID
         return var, {
             "variation_type": "country_expansion", 
@@ -293,13 +505,8 @@ def person_variation(person, noise_severity = "low"):
     if selected_variation == "language_expansion":
         var = copy.deepcopy(person)
         original_value = var["knowsLanguage"]
-        language_map = {
-            "nl": "Dutch",
-            "de": "German",
-            "et": "Estonian"
-        }
-        if var["knowsLanguage"] in language_map:
-            var["knowsLanguage"] = language_map[var["knowsLanguage"]]
+        if var["knowsLanguage"] in language_names:
+            var["knowsLanguage"] = language_names[var["knowsLanguage"]]
             var["identifier"] = fake.uuid4()  # Generate a new UUID
             return var, {
                 "variation_type": "language_expansion", 
@@ -375,11 +582,10 @@ def organization_name_variation(organization, noise_severity = "low"):
         original_name = var["healthcareOrganizationName"]
         
         # Identify the suffix part
-        suffixes = [" Zorg", " Gesundheitszentrum", " Tervisekeskus", " Healthcare"]
         suffix = ""
         main_name = original_name
         
-        for potential_suffix in suffixes:
+        for potential_suffix in organization_suffixes:
             if original_name.endswith(potential_suffix):
                 suffix = potential_suffix
                 main_name = original_name[:-len(suffix)]
@@ -403,11 +609,10 @@ def organization_name_variation(organization, noise_severity = "low"):
         original_name = var["healthcareOrganizationName"]
         
         # Identify the suffix part
-        suffixes = [" Zorg", " Gesundheitszentrum", " Tervisekeskus", " Healthcare"]
         suffix = ""
         main_name = original_name
         
-        for potential_suffix in suffixes:
+        for potential_suffix in organization_suffixes:
             if original_name.endswith(potential_suffix):
                 suffix = potential_suffix
                 main_name = original_name[:-len(suffix)]
@@ -444,9 +649,97 @@ def organization_name_variation(organization, noise_severity = "low"):
                 "varied_value": new_name
             }
 
+# Short forms and alternative names of the department names in data_creator.py
+department_abbreviations = {
+    "Anesthesia": "Anesth Dept",
+    "Cardiovascular": "Cardio",
+    "Community Health": "Comm Health",
+    "Dentistry": "Dental",
+    "Dermatology": "Derm",
+    "Diet Nutrition": "Diet & Nutr",
+    "Emergency": "ER",
+    "Endocrine": "Endo",
+    "Gastroenterologic": "GI",
+    "Genetic": "Gen Med",
+    "Geriatric": "Geri",
+    "Gynecologic": "GYN",
+    "Hematologic": "Hema",
+    "Infectious": "ID",
+    "Laboratory Science": "Lab",
+    "Midwifery": "Midwife Svc",
+    "Musculoskeletal": "MSK",
+    "Neurologic": "Neuro",
+    "Nursing": "Nurs",
+    "Obstetric": "OB",
+    "Oncologic": "Onc",
+    "Optometric": "Opt",
+    "Otolaryngologic": "ENT",
+    "Pathology": "Path",
+    "Pediatric": "Peds",
+    "Pharmacy Specialty": "Pharm",
+    "Physiotherapy": "PT",
+    "Plastic Surgery": "Plastics",
+    "Podiatric": "Foot Care",
+    "Primary Care": "PCP",
+    "Psychiatric": "Psych",
+    "Public Health": "Pub Health",
+    "Pulmonary": "Pulm",
+    "Radiography": "Rad",
+    "Renal": "Kidney",
+    "Respiratory Therapy": "Resp",
+    "Rheumatologic": "Rheum",
+    "Speech Pathology": "Speech",
+    "Surgical": "Surg",
+    "Toxicologic": "Tox",
+    "Urologic": "Uro"
+}
+
+department_alternatives = {
+    "Anesthesia": "Anesthesiology Department",
+    "Cardiovascular": "Heart Center",
+    "Community Health": "Community Care Services",
+    "Dentistry": "Dental Services",
+    "Dermatology": "Skin Care Center",
+    "Diet Nutrition": "Nutritional Services",
+    "Emergency": "Emergency Services",
+    "Endocrine": "Hormone & Metabolism Center",
+    "Gastroenterologic": "Digestive Health Center",
+    "Genetic": "Medical Genetics Department",
+    "Geriatric": "Elderly Care Services",
+    "Gynecologic": "Women's Health Center",
+    "Hematologic": "Blood Disorders Clinic",
+    "Infectious": "Infection Control & Prevention",
+    "Laboratory Science": "Clinical Laboratory",
+    "Midwifery": "Midwifery & Birth Center",
+    "Musculoskeletal": "Bone & Joint Center",
+    "Neurologic": "Brain & Spine Center",
+    "Nursing": "Nursing Services",
+    "Obstetric": "Maternity Care",
+    "Oncologic": "Cancer Center",
+    "Optometric": "Vision Care Center",
+    "Otolaryngologic": "Ear, Nose & Throat",
+    "Pathology": "Diagnostic Pathology",
+    "Pediatric": "Children's Health",
+    "Pharmacy Specialty": "Clinical Pharmacy",
+    "Physiotherapy": "Physical Rehabilitation",
+    "Plastic Surgery": "Reconstructive & Cosmetic Surgery",
+    "Podiatric": "Foot & Ankle Center",
+    "Primary Care": "Family Medicine",
+    "Psychiatric": "Mental Health Services",
+    "Public Health": "Population Health Center",
+    "Pulmonary": "Lung & Breathing Center",
+    "Radiography": "Medical Imaging",
+    "Renal": "Kidney Care Center",
+    "Respiratory Therapy": "Respiratory Care Services",
+    "Rheumatologic": "Arthritis & Rheumatism Center",
+    "Speech Pathology": "Speech & Language Therapy",
+    "Surgical": "Surgical Services",
+    "Toxicologic": "Poison Control Center",
+    "Urologic": "Urology & Kidney Health"
+}
+
 ###3 department name variations
 def department_name_variation(department, noise_severity = "low"):
-    contact_point_df = pd.read_csv("Data_source/Baseline/ContactPoint.csv")
     """Generate variations of a department name with balanced distribution"""
     possible_variations = []
     
@@ -454,103 +747,15 @@ def department_name_variation(department, noise_severity = "low"):
     if "serviceDepartmentName" in department:
         dept_name = department["serviceDepartmentName"]
         
-        abbreviations = {
-            "Anesthesia": "Anesth Dept",
-            "Cardiovascular": "Cardio",
-            "Community Health": "Comm Health",
-            "Dentistry": "Dental",
-            "Dermatology": "Derm",
-            "Diet Nutrition": "Diet & Nutr",
-            "Emergency": "ER",
-            "Endocrine": "Endo",
-            "Gastroenterologic": "GI",
-            "Genetic": "Gen Med",
-            "Geriatric": "Geri",
-            "Gynecologic": "GYN",
-            "Hematologic": "Hema",
-            "Infectious": "ID",
-            "Laboratory Science": "Lab",
-            "Midwifery": "Midwife Svc",
-            "Musculoskeletal": "MSK",
-            "Neurologic": "Neuro",
-            "Nursing": "Nurs",
-            "Obstetric": "OB",
-            "Oncologic": "Onc",
-            "Optometric": "Opt",
-            "Otolaryngologic": "ENT",
-            "Pathology": "Path",
-            "Pediatric": "Peds",
-            "Pharmacy Specialty": "Pharm",
-            "Physiotherapy": "PT",
-            "Plastic Surgery": "Plastics",
-            "Podiatric": "Foot Care",
-            "Primary Care": "PCP",
-            "Psychiatric": "Psych",
-            "Public Health": "Pub Health",
-            "Pulmonary": "Pulm",
-            "Radiography": "Rad",
-            "Renal": "Kidney",
-            "Respiratory Therapy": "Resp",
-            "Rheumatologic": "Rheum",
-            "Speech Pathology": "Speech",
-            "Surgical": "Surg",
-            "Toxicologic": "Tox",
-            "Urologic": "Uro"
-        }
-        
-        alternatives = {
-            "Anesthesia": "Anesthesiology Department",
-            "Cardiovascular": "Heart Center",
-            "Community Health": "Community Care Services",
-            "Dentistry": "Dental Services",
-            "Dermatology": "Skin Care Center",
-            "Diet Nutrition": "Nutritional Services",
-            "Emergency": "Emergency Services",
-            "Endocrine": "Hormone & Metabolism Center",
-            "Gastroenterologic": "Digestive Health Center",
-            "Genetic": "Medical Genetics Department",
-            "Geriatric": "Elderly Care Services",
-            "Gynecologic": "Women's Health Center",
-            "Hematologic": "Blood Disorders Clinic",
-            "Infectious": "Infection Control & Prevention",
-            "Laboratory Science": "Clinical Laboratory",
-            "Midwifery": "Midwifery & Birth Center",
-            "Musculoskeletal": "Bone & Joint Center",
-            "Neurologic": "Brain & Spine Center",
-            "Nursing": "Nursing Services",
-            "Obstetric": "Maternity Care",
-            "Oncologic": "Cancer Center",
-            "Optometric": "Vision Care Center",
-            "Otolaryngologic": "Ear, Nose & Throat",
-            "Pathology": "Diagnostic Pathology",
-            "Pediatric": "Children's Health",
-            "Pharmacy Specialty": "Clinical Pharmacy",
-            "Physiotherapy": "Physical Rehabilitation",
-            "Plastic Surgery": "Reconstructive & Cosmetic Surgery",
-            "Podiatric": "Foot & Ankle Center",
-            "Primary Care": "Family Medicine",
-            "Psychiatric": "Mental Health Services",
-            "Public Health": "Population Health Center",
-            "Pulmonary": "Lung & Breathing Center",
-            "Radiography": "Medical Imaging",
-            "Renal": "Kidney Care Center",
-            "Respiratory Therapy": "Respiratory Care Services",
-            "Rheumatologic": "Arthritis & Rheumatism Center",
-            "Speech Pathology": "Speech & Language Therapy",
-            "Surgical": "Surgical Services",
-            "Toxicologic": "Poison Control Center",
-            "Urologic": "Urology & Kidney Health"
-        }
-        
         # Check if the department name can be abbreviated
-        for full, _ in abbreviations.items():
+        for full in department_abbreviations:
             if full in dept_name:
                 if noise_severity == "high":
                     possible_variations.append("department_abbreviation")        
                 break
                 
         # Check if name has an alternative
-        if dept_name in alternatives:
+        if dept_name in department_alternatives:
             if noise_severity == "high":
                 possible_variations.append("alternative_naming")
             if noise_severity == "medium" or noise_severity == 'high':
@@ -577,51 +782,7 @@ def department_name_variation(department, noise_severity = "low"):
         var = copy.deepcopy(department)
         original_name = var["serviceDepartmentName"]
         dept_name = var["serviceDepartmentName"]
-        abbreviations = {
-            "Anesthesia": "Anesth Dept",
-            "Cardiovascular": "Cardio",
-            "Community Health": "Comm Health",
-            "Dentistry": "Dental",
-            "Dermatology": "Derm",
-            "Diet Nutrition": "Diet & Nutr",
-            "Emergency": "ER",
-            "Endocrine": "Endo",
-            "Gastroenterologic": "GI",
-            "Genetic": "Gen Med",
-            "Geriatric": "Geri",
-            "Gynecologic": "GYN",
-            "Hematologic": "Hema",
-            "Infectious": "ID",
-            "Laboratory Science": "Lab",
-            "Midwifery": "Midwife Svc",
-            "Musculoskeletal": "MSK",
-            "Neurologic": "Neuro",
-            "Nursing": "Nurs",
-            "Obstetric": "OB",
-            "Oncologic": "Onc",
-            "Optometric": "Opt",
-            "Otolaryngologic": "ENT",
-            "Pathology": "Path",
-            "Pediatric": "Peds",
-            "Pharmacy Specialty": "Pharm",
-            "Physiotherapy": "PT",
-            "Plastic Surgery": "Plastics",
-            "Podiatric": "Foot Care",
-            "Primary Care": "PCP",
-            "Psychiatric": "Psych",
-            "Public Health": "Pub Health",
-            "Pulmonary": "Pulm",
-            "Radiography": "Rad",
-            "Renal": "Kidney",
-            "Respiratory Therapy": "Resp",
-            "Rheumatologic": "Rheum",
-            "Speech Pathology": "Speech",
-            "Surgical": "Surg",
-            "Toxicologic": "Tox",
-            "Urologic": "Uro"
-        }
-        
-        for full, abbr in abbreviations.items():
+        for full, abbr in department_abbreviations.items():
             if full in dept_name:
                 var["serviceDepartmentName"] = dept_name.replace(full, abbr)
                 var["identifier"] = fake.uuid4()  # Generate a new UUID
@@ -637,52 +798,8 @@ def department_name_variation(department, noise_severity = "low"):
         var = copy.deepcopy(department)
         original_name = var["serviceDepartmentName"]
         dept_name = var["serviceDepartmentName"]
-        alternatives = {
-            "Anesthesia": "Anesthesiology Department",
-            "Cardiovascular": "Heart Center",
-            "Community Health": "Community Care Services",
-            "Dentistry": "Dental Services",
-            "Dermatology": "Skin Care Center",
-            "Diet Nutrition": "Nutritional Services",
-            "Emergency": "Emergency Services",
-            "Endocrine": "Hormone & Metabolism Center",
-            "Gastroenterologic": "Digestive Health Center",
-            "Genetic": "Medical Genetics Department",
-            "Geriatric": "Elderly Care Services",
-            "Gynecologic": "Women's Health Center",
-            "Hematologic": "Blood Disorders Clinic",
-            "Infectious": "Infection Control & Prevention",
-            "Laboratory Science": "Clinical Laboratory",
-            "Midwifery": "Midwifery & Birth Center",
-            "Musculoskeletal": "Bone & Joint Center",
-            "Neurologic": "Brain & Spine Center",
-            "Nursing": "Nursing Services",
-            "Obstetric": "Maternity Care",
-            "Oncologic": "Cancer Center",
-            "Optometric": "Vision Care Center",
-            "Otolaryngologic": "Ear, Nose & Throat",
-            "Pathology": "Diagnostic Pathology",
-            "Pediatric": "Children's Health",
-            "Pharmacy Specialty": "Clinical Pharmacy",
-            "Physiotherapy": "Physical Rehabilitation",
-            "Plastic Surgery": "Reconstructive & Cosmetic Surgery",
-            "Podiatric": "Foot & Ankle Center",
-            "Primary Care": "Family Medicine",
-            "Psychiatric": "Mental Health Services",
-            "Public Health": "Population Health Center",
-            "Pulmonary": "Lung & Breathing Center",
-            "Radiography": "Medical Imaging",
-            "Renal": "Kidney Care Center",
-            "Respiratory Therapy": "Respiratory Care Services",
-            "Rheumatologic": "Arthritis & Rheumatism Center",
-            "Speech Pathology": "Speech & Language Therapy",
-            "Surgical": "Surgical Services",
-            "Toxicologic": "Poison Control Center",
-            "Urologic": "Urology & Kidney Health"
-        }
-        
-        if dept_name in alternatives:
-            var["serviceDepartmentName"] = alternatives[dept_name]
+        if dept_name in department_alternatives:
+            var["serviceDepartmentName"] = department_alternatives[dept_name]
             var["identifier"] = fake.uuid4()  # Generate a new UUID
             return var, {
                 "variation_type": "alternative_naming", 
@@ -694,20 +811,9 @@ def department_name_variation(department, noise_severity = "low"):
     if selected_variation == "translation":
         var = copy.deepcopy(department)
         original_name = var["serviceDepartmentName"]
-        contactidentifier = var["contactPoint"]
-        contact_point = contact_point_df[contact_point_df["identifier"] == contactidentifier]
-        tranlation_language = contact_point["availableLanguage"]
-        language = tranlation_language.str.strip('[]').str.split(',').str[0]
-        str_language = language.iloc[0].strip("'")
-        language_map = {
-                        "nl": "dutch",
-                        "de": "german",
-                        "et": "estonian",
-                        "en": "english"
-                    }
-        language_code = language_map.get(str_language.lower(), "english")
-        translator = GoogleTranslator(source="english", target=language_code)
-        translated_name = translator.translate(original_name)
+        str_language = contact_point_language(var["contactPoint"])
+        language_code = translation_languages.get(str_language.lower(), "english")
+        translated_name = translate(original_name, language_code)
         var["serviceDepartmentName"] = translated_name
         var["identifier"] = fake.uuid4()
         return var, {
@@ -739,7 +845,7 @@ def department_name_variation(department, noise_severity = "low"):
             
         changed_word = "".join(word_chars)
             
-        var["healthcareOrganizationName"] = changed_word
+        var["serviceDepartmentName"] = changed_word
         var["identifier"] = fake.uuid4()  # Generate a new UUID
         return var, {
             "variation_type": "department_typo", 
@@ -802,17 +908,13 @@ def email_variation(entity, noise_severity = "low"):
         var = copy.deepcopy(entity)
         contact_type = var["contactType"].lower()
         tranlation_language = var["availableLanguage"]
+        # In-memory tables hold the list itself, CSV files its string form "['nl', 'en']"
+        if isinstance(tranlation_language, list):
+            tranlation_language = str(tranlation_language)
         language = tranlation_language.strip('[]').split(',')[0]
         str_language = language.strip("'")
-        language_map = {
-                        "nl": "dutch",
-                        "de": "german",
-                        "et": "estonian",
-                        "en": "english"
-                    }
-        language_code = language_map.get(str_language.lower(), "english")
-        translator = GoogleTranslator(source="english", target=language_code)
-        translated_name = translator.translate(contact_type)
+        language_code = translation_languages.get(str_language.lower(), "english")
+        translated_name = translate(contact_type, language_code)
         var['contactType'] = translated_name
         var["identifier"] = fake.uuid4()
         return var, {
@@ -916,6 +1018,40 @@ def email_variation(entity, noise_severity = "low"):
         "varied_value": var_default.get("email", "")
     }
 
+# Column order of the duplicate registry exports in ground_truths/
+registry_columns = ['original_id', 'duplicate_id', 'entity_type', 'variation_type', 'field_name', 'original_value', 'varied_value']
+
+def duplicate_registry_frame():
+    """Return the duplicate registry as a DataFrame with the columns of export_duplicate_registry"""
+    import pandas as pd
+    rows = [(original_id,) + dup.to_row() for original_id, duplicates in duplicate_registry.items() for dup in duplicates]
+    return pd.DataFrame(rows, columns=registry_columns)
+
+def apply_golden_variations(entity_dataframes, golden_df, anchor_column="anchor"):
+    """
+    Write the varied values of a golden standard into the matching rows (by anchor) of each table.
+    When one field of an entity was varied more than once, the last variation wins.
+    Args:
+        entity_dataframes: Dict mapping entity type to DataFrame with an anchor column
+        golden_df: DataFrame with entity_type, original_id, field_name and varied_value columns
+        anchor_column: Column holding the original identifier
+    Returns:
+        Dict of updated DataFrame copies
+    """
+    updated = {}
+    for entity_type, df in entity_dataframes.items():
+        df = df.copy()
+        rows = golden_df[golden_df['entity_type'] == entity_type].drop_duplicates(['original_id', 'field_name'], keep='last')
+        for field_name, changes in rows.groupby('field_name'):
+            if field_name not in df.columns:
+                continue
+            varied = changes.set_index('original_id')['varied_value']
+            mask = df[anchor_column].isin(varied.index)
+            df[field_name] = df[field_name].astype(object)
+            df.loc[mask, field_name] = df.loc[mask, anchor_column].map(varied)
+        updated[entity_type] = df
+    return updated
+
 def export_duplicate_registry(filename='duplicate_registry.csv'):
     """
     Export the duplicate registry to a CSV file for reference
@@ -0,0 +1,370 @@
+import re
+import random
+import numpy as np
+import pandas as pd
+import instrumentation
+from variation_helpers import (
+    generate_consistent_uuid, register_duplicate, translate, contact_point_language, translation_languages,
+    country_names, language_names, organization_suffixes, department_abbreviations, department_alternatives,
+    variation_rate_default
+)
+# Table-level counterpart of the *_variation functions in variation_helpers.py.
+# Instead of building the list of possible variations per record and picking one with random.choice,
+# the planner evaluates every eligibility rule once per table with vectorised string predicates,
+# draws one variation type per row from the eligible types in a single weighted draw, and then
+# hands the rows of each type to a batch applier. With equal weights the types are picked
+# uniformly like random.choice; other weights give skewed noise mixes, e.g. {"name_typo": 5}.
+
+ALL_LEVELS = ("low", "medium", "high")
+
+# Field reported for rows without any eligible variation (as in the *_variation functions)
+NO_CHANGE_FIELDS = {
+    'Address': 'address',
+    'Person': 'person',
+    'HealthcareOrganization': 'organization',
+    'ServiceDepartment': 'department',
+    'HealthcarePersonnel': 'email',
+    'ContactPoint': 'email'
+}
+
+# Identifier namespace of the variations; personnel share their identifier with the person
+PARENT_ENTITY_TYPES = {'HealthcarePersonnel': 'Person'}
+
+_house_number = re.compile(r"(?<!\S)\d+[^\d\s]?(?!\S)")
+
+
+def _text(df, column):
+    """Column as strings, with '' for missing values or a missing column"""
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[column].where(df[column].notna(), "").astype(str)
+
+
+def _typos(words, operations, rng):
+    """
+    Apply one typo per word at a random inner position (like the per-record typo code)
+    Args:
+        words: Strings of at least 3 characters
+        operations: Typo kinds to choose from: swap, missing, extra, duplicate, substitute
+        rng: NumPy generator
+    Returns:
+        List of changed strings
+    """
+    n = len(words)
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=n)
+    positions = 1 + (rng.random(n) * (lengths - 2)).astype(np.int64)
+    kinds = np.asarray(operations)[rng.integers(len(operations), size=n)]
+    letters = rng.integers(ord("a"), ord("z") + 1, size=n)
+    changed = []
+    for word, pos, kind, letter in zip(words, positions.tolist(), kinds.tolist(), letters.tolist()):
+        if kind == "swap":
+            word = word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+        elif kind == "missing":
+            word = word[:pos] + word[pos + 1:]
+        elif kind == "extra":
+            word = word[:pos] + chr(letter) + word[pos:]
+        elif kind == "duplicate":
+            word = word[:pos] + word[pos] + word[pos:]
+        else:
+            word = word[:pos] + chr(letter) + word[pos + 1:]
+        changed.append(word)
+    return changed
+
+
+def _typo_in_word(values, min_length, operations, rng):
+    # Typo in a random word longer than min_length, replacing its first occurrence
+    choices = rng.random(len(values))
+    words = []
+    for value, choice in zip(values, choices):
+        candidates = [word for word in value.split() if len(word) > min_length]
+        words.append(candidates[int(choice * len(candidates))])
+    changed = _typos(words, operations, rng)
+    return [value.replace(word, new, 1) for value, word, new in zip(values, words, changed)]
+
+
+def _split_suffix(name):
+    for suffix in organization_suffixes:
+        if name.endswith(suffix):
+            return name[:-len(suffix)], suffix
+    return name, ""
+
+
+def _languages(df):
+    """First of nl/de/et in availableLanguage per row ('' if none); lists and their string form both work"""
+    codes = _text(df, "availableLanguage").str.lower().str.findall(r"\b(nl|de|et)\b")
+    return codes.str[0].fillna("")
+
+
+# Address
+def _house_number_suffix(rows, rng):
+    suffixes = np.array(["A", "B", "C"])[rng.integers(3, size=len(rows))]
+    return [_house_number.sub(lambda m, s=s: m.group(0) + s, text, count=1) for text, s in zip(rows["text"], suffixes)]
+
+
+def _postal_format(rows, rng):
+    postal = rows["postalCode"].astype(str)
+    return np.where(postal.str.contains(" ", regex=False), postal.str.replace(" ", "", regex=False), postal + " ")
+
+
+# Person
+def _name_swap(rows, rng):
+    return rows["personName"].str.split().str[::-1].str.join(" ")
+
+
+def _abbreviated_first_name(rows, rng):
+    names = rows["personName"].str.split()
+    return names.str[0].str[0] + ". " + names.str[1:].str.join(" ")
+
+
+def _date_format(rows, rng):
+    return rows["birthDate"].astype(str).str.replace(r"^([^-]*)-([^-]*)-([^-]*)$", r"\1-\3-\2", regex=True)
+
+
+# Organization
+def _organization_abbreviation(rows, rng):
+    changed = []
+    for name in rows["healthcareOrganizationName"]:
+        main_name, suffix = _split_suffix(name)
+        changed.append("".join(c for c in main_name if c.isupper()) + suffix)
+    return changed
+
+
+def _organization_typo(rows, rng):
+    parts = [_split_suffix(name) for name in rows["healthcareOrganizationName"]]
+    changed = _typo_in_word([main for main, _ in parts], 3, ["swap", "missing", "extra", "substitute"], rng)
+    return [main + suffix for main, (_, suffix) in zip(changed, parts)]
+
+
+# Department
+def _department_abbreviation(rows, rng):
+    names = rows["serviceDepartmentName"].astype(str)
+    changed = names.copy()
+    pending = pd.Series(True, index=names.index)
+    for full, abbreviation in department_abbreviations.items():
+        hit = pending & names.str.contains(full, regex=False)
+        changed[hit] = names[hit].str.replace(full, abbreviation, regex=False)
+        pending &= ~hit
+    return changed
+
+
+def _department_translation(rows, rng):
+    languages = [translation_languages.get(contact_point_language(c).lower(), "english") for c in rows["contactPoint"]]
+    return _translate_unique(rows["serviceDepartmentName"], languages)
+
+
+# Email (personnel and contact points)
+def _contact_type_translation(rows, rng):
+    first = _text(rows, "availableLanguage").str.strip("[]").str.split(",").str[0].str.strip("'")
+    languages = [translation_languages.get(code.lower(), "english") for code in first]
+    return _translate_unique(rows["contactType"].str.lower(), languages)
+
+
+def _email_typo(rows, rng):
+    parts = rows["email"].str.split("@")
+    changed = _typos(parts.str[0].tolist(), ["swap", "missing", "extra", "duplicate"], rng)
+    return [f"{local}@{domain}" for local, domain in zip(changed, parts.str[1])]
+
+
+def _email_domain_change(rows, rng):
+    return rows["email"].str.replace(r"\.[^.]*$", "", regex=True) + "." + _languages(rows)
+
+
+def _translate_unique(texts, languages):
+    # Every distinct (text, language) pair is translated once
+    keys = list(zip(texts, languages))
+    translations = {key: translate(*key) for key in dict.fromkeys(keys)}
+    return [translations[key] for key in keys]
+
+
+def _typo_applier(field, operations):
+    return lambda rows, rng: _typos(rows[field].astype(str).tolist(), operations, rng)
+
+
+def _any_word_longer(values, length):
+    return values.str.contains(r"\S{%d,}" % (length + 1))
+
+
+def _several_words(values):
+    return values.str.strip().str.contains(r"\s")
+
+
+def _main_names(values):
+    # Organization names without their suffix
+    return values.str.replace("(?:%s)$" % "|".join(map(re.escape, organization_suffixes)), "", regex=True)
+
+
+# Entity type -> variation type -> field, noise levels it is allowed at, eligibility predicate (df, noise) -> mask
+# and batch applier (rows, rng) -> new values. The rules mirror the *_variation functions in variation_helpers.py.
+VARIATIONS = {
+    'Address': {
+        'house_number_suffix': ('text', ALL_LEVELS, lambda df, noise: _text(df, 'text') != '', _house_number_suffix),
+        'city_typo': ('city', ALL_LEVELS, lambda df, noise: _text(df, 'city').str.len() > 3,
+                      _typo_applier('city', ["swap", "duplicate", "missing", "extra"])),
+        'country_expansion': ('country', ("high",), lambda df, noise: _text(df, 'country').isin(list(country_names)),
+                              lambda rows, rng: rows['country'].map(country_names)),
+        'postal_format': ('postalCode', ALL_LEVELS,
+                          lambda df, noise: _text(df, 'postalCode').str.len() > (0 if noise == "high" else 3), _postal_format)
+    },
+    'Person': {
+        'name_swap': ('personName', ALL_LEVELS, lambda df, noise: _several_words(_text(df, 'personName')), _name_swap),
+        'abbreviated_first_name': ('personName', ALL_LEVELS,
+                                   lambda df, noise: _several_words(_text(df, 'personName')), _abbreviated_first_name),
+        'name_typo': ('personName', ALL_LEVELS, lambda df, noise: _any_word_longer(_text(df, 'personName'), 2),
+                      lambda rows, rng: _typo_in_word(rows['personName'].tolist(), 2, ["swap", "missing", "extra", "substitute"], rng)),
+        'language_expansion': ('knowsLanguage', ("high",), lambda df, noise: _text(df, 'knowsLanguage').isin(list(language_names)),
+                               lambda rows, rng: rows['knowsLanguage'].map(language_names)),
+        'date_format_variation': ('birthDate', ALL_LEVELS, lambda df, noise: _text(df, 'birthDate').str.count('-') == 2, _date_format)
+    },
+    'HealthcareOrganization': {
+        'name_abbreviation': ('healthcareOrganizationName', ("medium", "high"),
+                              lambda df, noise: _text(df, 'healthcareOrganizationName').str.count(r'[A-Z]') >= 2,
+                              _organization_abbreviation),
+        'name_typo': ('healthcareOrganizationName', ALL_LEVELS,
+                      lambda df, noise: _any_word_longer(_main_names(_text(df, 'healthcareOrganizationName')), 3),
+                      _organization_typo)
+    },
+    'ServiceDepartment': {
+        'department_abbreviation': ('serviceDepartmentName', ("high",),
+                                    lambda df, noise: _text(df, 'serviceDepartmentName').str.contains(
+                                        '|'.join(map(re.escape, department_abbreviations))),
+                                    _department_abbreviation),
+        'alternative_naming': ('serviceDepartmentName', ("high",),
+                               lambda df, noise: _text(df, 'serviceDepartmentName').isin(list(department_alternatives)),
+                               lambda rows, rng: rows['serviceDepartmentName'].map(department_alternatives)),
+        'translation': ('serviceDepartmentName', ("medium", "high"),
+                        lambda df, noise: _text(df, 'serviceDepartmentName').isin(list(department_alternatives)),
+                        _department_translation),
+        'department_typo': ('serviceDepartmentName', ALL_LEVELS, lambda df, noise: _text(df, 'serviceDepartmentName').str.len() >= 3,
+                            _typo_applier('serviceDepartmentName', ["swap", "missing", "extra", "substitute"]))
+    }
+}
+VARIATIONS['HealthcarePersonnel'] = VARIATIONS['ContactPoint'] = {
+    'translation': ('contactType', ("medium", "high"), lambda df, noise: _text(df, 'contactType') != '', _contact_type_translation),
+    'email_typo': ('email', ALL_LEVELS,
+                   lambda df, noise: (_text(df, 'email').str.count('@') == 1) & (_text(df, 'email').str.find('@') > 3), _email_typo),
+    'email_domain_change': ('email', ALL_LEVELS,
+                            lambda df, noise: (_text(df, 'email').str.count('@') == 1)
+                            & _text(df, 'email').str.split('@').str[1].str.contains('.', regex=False) & (_languages(df) != ''),
+                            _email_domain_change)
+}
+
+
+def eligibility(df, entity_type, noise="low"):
+    """
+    Evaluate the eligibility rules of an entity type for a whole table
+    Args:
+        df: DataFrame of one entity type
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        noise: "low", "medium" or "high"
+    Returns:
+        Tuple of (list of variation types allowed at this noise level, boolean matrix rows x types)
+    """
+    names = [name for name, (_, levels, _, _) in VARIATIONS[entity_type].items() if noise in levels]
+    matrix = np.zeros((len(df), len(names)), dtype=bool)
+    for position, name in enumerate(names):
+        matrix[:, position] = VARIATIONS[entity_type][name][2](df, noise).to_numpy(dtype=bool)
+    return names, matrix
+
+
+def plan_variations(df, entity_type, noise="low", weights=None, rng=None):
+    """
+    Pick one variation type per row from the types it is eligible for, in one weighted draw
+    Args:
+        df: DataFrame of one entity type
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        noise: "low", "medium" or "high"
+        weights: Optional dict variation type -> weight (missing types weigh 1.0, 0 disables a type)
+        rng: Optional NumPy generator; by default it is seeded from the random module
+    Returns:
+        NumPy object array with the variation type of every row, None where no type is eligible
+    """
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    names, eligible = eligibility(df, entity_type, noise)
+    plan = np.full(len(df), None, dtype=object)
+    if not names:
+        return plan
+    scores = eligible * np.array([(weights or {}).get(name, 1.0) for name in names], dtype=float)
+    cumulative = np.cumsum(scores, axis=1)
+    total = cumulative[:, -1]
+    picks = (cumulative <= (rng.random(len(df)) * total)[:, None]).sum(axis=1)
+    chosen = total > 0
+    plan[chosen] = np.asarray(names, dtype=object)[np.minimum(picks[chosen], len(names) - 1)]
+    return plan
+
+
+def apply_variations(df, entity_type, plan, rng=None):
+    """
+    Apply a plan with one batch applier call per variation type
+    Args:
+        df: DataFrame of one entity type
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        plan: Variation type per row, as returned by plan_variations
+        rng: Optional NumPy generator; by default it is seeded from the random module
+    Returns:
+        Tuple of (varied copy of df, DataFrame with variation_type, field_name, original_value and varied_value per row)
+    """
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    varied = df.copy()
+    changes = pd.DataFrame({
+        "variation_type": "no_change",
+        "field_name": NO_CHANGE_FIELDS.get(entity_type, ""),
+        "original_value": "",
+        "varied_value": ""
+    }, index=df.index)
+    plan = pd.Series(plan, index=df.index)
+    for name, (field, _, _, applier) in VARIATIONS[entity_type].items():
+        rows = plan.index[plan.values == name]
+        if len(rows) == 0:
+            continue
+        with instrumentation.stage("apply_variations", records=len(rows), entity_type=entity_type):
+            values = np.asarray(applier(df.loc[rows], rng), dtype=object)
+        varied[field] = varied[field].astype(object)
+        varied.loc[rows, field] = values
+        changes.loc[rows, ["variation_type", "field_name"]] = [name, field]
+        changes.loc[rows, "original_value"] = df.loc[rows, field].values
+        changes.loc[rows, "varied_value"] = values
+        instrumentation.count("plan_variations", len(rows), entity_type=entity_type, variation_type=name)
+
+    # Rows without a variation report their whole record (or the email) like the per-record functions
+    unchanged = plan.index[plan.isna().values]
+    if len(unchanged):
+        if NO_CHANGE_FIELDS.get(entity_type) == "email":
+            values = _text(df.loc[unchanged], "email").values
+        else:
+            values = [str(row) for row in df.loc[unchanged].to_dict("records")]
+        changes.loc[unchanged, "original_value"] = values
+        changes.loc[unchanged, "varied_value"] = values
+    return varied, changes
+
+
+def introduce_planned_variations(df, entity_type, variation_rate=variation_rate_default, noise="low", weights=None, seed=None):
+    """
+    Planner version of introduce_table_variations: vary a fraction of the rows and register the duplicates
+    Args:
+        df: DataFrame of one entity type
+        entity_type: Entity type name from schema.ENTITY_TYPES
+        variation_rate: Fraction of rows that get a variation
+        noise: "low", "medium" or "high"
+        weights: Optional dict variation type -> weight
+        seed: Optional seed; by default it is drawn from the random module so random.seed() still applies
+    Returns:
+        DataFrame with the original rows followed by the variations
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = np.random.default_rng(seed)
+    selected = df.iloc[rng.permutation(len(df))[:int(len(df) * variation_rate)]]
+    with instrumentation.stage("plan_variations", records=len(selected), entity_type=entity_type):
+        plan = plan_variations(selected, entity_type, noise, weights, rng)
+    varied, changes = apply_variations(selected, entity_type, plan, rng)
+
+    parent_entity_type = PARENT_ENTITY_TYPES.get(entity_type, entity_type)
+    original_ids = selected["identifier"].tolist()
+    duplicate_ids = [generate_consistent_uuid(original_id, parent_entity_type) for original_id in original_ids]
+    varied["identifier"] = duplicate_ids
+    for original_id, duplicate_id, variation_type, field_name, original_value, varied_value in zip(
+            original_ids, duplicate_ids, *(changes[column].tolist() for column in changes.columns)):
+        register_duplicate(original_id, duplicate_id, entity_type, variation_type, field_name, original_value, varied_value)
+    return pd.concat([df, varied], ignore_index=True)
@@ -0,0 +1,163 @@
+import os
+import random
+import numpy as np
+# Per-locale vocabularies sampled from Faker providers once and held as NumPy arrays,
+# so batch generators can pick values with vectorised random draws instead of Faker calls.
+# Extracted vocabularies are cached on disk as .npy files and memory-mapped on load, so
+# later runs (and parallel worker processes) skip Faker entirely and share the pages.
+#   MDG_VOCABULARY_DIR = cache directory (default vocabulary_cache/ next to this file)
+
+# Country code -> Faker locale (anything else falls back to en_US)
+locales = {"NL": "nl_NL", "AT": "de_AT", "EE": "et_EE"}
+default_locale = "en_US"
+locale_fakers = {}
+
+VOCABULARY_SIZE = 10000   # samples drawn per locale and provider
+VOCABULARY_SEED = 0       # extraction seed, so the vocabularies are the same on every run
+
+# Provider -> keyword arguments for the Faker call
+PROVIDERS = {
+    "company": {},
+    "city": {},
+    "street_name": {},
+    "phone_number": {},
+    "first_name": {},
+    "last_name": {},
+    "date_of_birth": {"minimum_age": 25, "maximum_age": 65}
+}
+
+cache_dir = os.environ.get("MDG_VOCABULARY_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "vocabulary_cache")
+
+# (locale, provider) -> NumPy array of sampled values
+vocabularies = {}
+
+
+def get_locale_faker(country_code):
+    """Return the (cached) Faker for a country code, falling back to en_US"""
+    from faker import Faker
+    locale = locales.get(country_code, default_locale)
+    if locale not in locale_fakers:
+        locale_fakers[locale] = Faker(locale)
+    return locale_fakers[locale]
+
+
+def extract_vocabulary(locale, provider, size=VOCABULARY_SIZE, seed=VOCABULARY_SEED):
+    """
+    Sample a Faker provider size times.
+    Samples are kept with their repeats so the array follows the provider's own distribution.
+    Dates are stored as ISO strings.
+    Args:
+        locale: Faker locale, e.g. "nl_NL"
+        provider: Name of a Faker provider method, e.g. "street_name" or "city"
+        size: Number of samples
+        seed: Seed for a dedicated Faker instance (the shared instances are left untouched)
+    Returns:
+        NumPy unicode array of samples
+    """
+    from faker import Faker
+    extractor = Faker(locale)
+    extractor.seed_instance(seed)
+    method = getattr(extractor, provider)
+    kwargs = PROVIDERS.get(provider, {})
+    samples = [method(**kwargs) for _ in range(size)]
+    if samples and hasattr(samples[0], "isoformat"):
+        samples = [sample.isoformat() for sample in samples]
+    return np.array(samples, dtype=str)
+
+
+def cache_path(locale, provider, size=VOCABULARY_SIZE, seed=VOCABULARY_SEED):
+    """Path of the cached vocabulary; size and seed are part of the name so changing them re-extracts"""
+    return os.path.join(cache_dir, f"{locale}.{provider}.{size}.{seed}.npy")
+
+
+def load_vocabulary(locale, provider, size=VOCABULARY_SIZE, seed=VOCABULARY_SEED):
+    """
+    Load a vocabulary from the disk cache, extracting and caching it first if needed
+    Args:
+        locale: Faker locale
+        provider: Name of a Faker provider method
+        size: Number of samples
+        seed: Extraction seed
+    Returns:
+        Read-only memory-mapped NumPy array
+    """
+    path = cache_path(locale, provider, size, seed)
+    if not os.path.exists(path):
+        values = extract_vocabulary(locale, provider, size, seed)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first so concurrent processes never read a partial file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, values)
+        os.replace(temporary, path)
+    return np.load(path, mmap_mode="r")
+
+
+def extract_all(country_codes=None, providers=None):
+    """
+    Extract and cache every vocabulary up front (the one-time step before generating data)
+    Args:
+        country_codes: Country codes to extract (defaults to all configured locales plus the default locale)
+        providers: Provider names (defaults to PROVIDERS)
+    Returns:
+        List of cache file paths
+    """
+    locale_names = [locales.get(code, default_locale) for code in country_codes] if country_codes else list(locales.values()) + [default_locale]
+    paths = []
+    for locale in dict.fromkeys(locale_names):
+        for provider in providers or PROVIDERS:
+            load_vocabulary(locale, provider)
+            paths.append(cache_path(locale, provider))
+    return paths
+
+
+def get_vocabulary(country_code, provider):
+    """
+    Return the vocabulary of a provider for a country code, extracting it on first use
+    Args:
+        country_code: Country code such as "NL" (None or unknown codes use en_US)
+        provider: Name of a Faker provider method
+    Returns:
+        NumPy unicode array of values
+    """
+    key = (locales.get(country_code, default_locale), provider)
+    if key not in vocabularies:
+        vocabularies[key] = load_vocabulary(*key)
+    return vocabularies[key]
+
+
+def pick(country_code, provider):
+    """Pick a single value with the random module, so random.seed() still applies"""
+    values = get_vocabulary(country_code, provider)
+    return str(values[random.randrange(len(values))])
+
+
+def draw(country_code, provider, rng, n):
+    """Draw n values from a vocabulary with a NumPy generator"""
+    values = get_vocabulary(country_code, provider)
+    return values[rng.integers(0, len(values), size=n)]
+
+
+def draw_by_country(codes, country, provider, rng):
+    """
+    Draw one value per row from the vocabulary of the row's country in a single gather
+    Args:
+        codes: Unique country codes
+        country: Index into codes for every row (as returned by np.unique(..., return_inverse=True))
+        provider: Name of a Faker provider method
+        rng: NumPy generator
+    Returns:
+        NumPy unicode array with one value per row
+    """
+    parts = [get_vocabulary(code, provider) for code in codes]
+    if not parts:
+        return np.array([], dtype=str)
+    sizes = np.array([len(part) for part in parts])
+    offsets = np.cumsum(sizes) - sizes
+    picks = (rng.random(len(country)) * sizes[country]).astype(np.int64)
+    return np.concatenate(parts)[offsets[country] + picks]
+
+
+if __name__ == "__main__":
+    for path in extract_all():
+        print(f"{path} ready")